@@ -1,5 +1,6 @@
 import { app, BrowserWindow, ipcMain, shell, session } from 'electron'
 import { spawn, type ChildProcessWithoutNullStreams } from 'node:child_process'
+import { randomBytes } from 'node:crypto'
 import { electronApp, optimizer } from '@electron-toolkit/utils'
 import { autoUpdater } from 'electron-updater'
 import * as path from 'node:path'
@@ -17,6 +18,9 @@ import {
   startOverlayProximityWatcher,
   stopOverlayProximityWatcher,
 } from './overlay'
+import { createStdoutLineParser, type VisionEvent } from './visionEvents'
+import { connectControlChannel, type ControlChannel } from './visionProtocol'
+import { connectPreviewStream } from './visionPreview'
 
 type AuthResult = { ok: true } | { ok: false; error: string }
 type CreateUserFn = (email: string, password: string) => Promise<AuthResult>
@@ -36,6 +40,13 @@ let pythonProcess: ChildProcessWithoutNullStreams | undefined
 let mainWindow: BrowserWindow | null = null
 let overlayWindow: BrowserWindow | null = null
 let isQuitting = false
+let previewPort: number | undefined // Announced by Python's preview_stream event
+let previewWanted = false
+let disconnectPreview: (() => void) | undefined
+const PREVIEW_RECONNECT_MS = 500
+let controlChannel: ControlChannel | undefined // Framed commands/events once Python announces it
+// Python's loopback sockets only serve a client that sends this first; new for every launch
+const sessionToken = randomBytes(32).toString('hex')
 
 // --- Helper Functions to get File Paths ---
 function getRepoRoot(): string {
@@ -54,10 +65,7 @@ function resolveExisting(...candidates: string[]): string {
 function getPythonScriptPath(): string {
   if (!app.isPackaged) {
     const repoRoot = getRepoRoot()
-    return resolveExisting(
-      path.join(repoRoot, 'services', 'vision', 'src', 'head_wink_combined.py'),
-      path.join(repoRoot, 'services', 'vision', 'src', 'detector_process.py')
-    )
+    return resolveExisting(path.join(repoRoot, 'services', 'vision', 'src', 'head_wink_combined.py'))
   }
   return path.join(process.resourcesPath, 'vision', 'src', 'head_wink_combined.py')
 }
@@ -106,6 +114,66 @@ function tryStopPython() {
   }, 1000)
 }
 
+// Python only renders the preview while we are connected, so connect only while a page shows it
+function startPreview() {
+  if (disconnectPreview || previewPort === undefined) return
+  disconnectPreview = connectPreviewStream(
+    previewPort,
+    sessionToken,
+    (frame) => mainWindow?.webContents.send('vision:preview-frame', frame),
+    (e) => {
+      disconnectPreview = undefined
+      if (e) {
+        derr('Preview stream error:', e) // Reconnects on the next preview_stream event or page toggle
+        return
+      }
+      // Python closed it cleanly (a client that fell behind is dropped); pick the stream back up
+      if (previewWanted) setTimeout(startPreview, PREVIEW_RECONNECT_MS)
+    }
+  )
+}
+
+function stopPreview() {
+  disconnectPreview?.()
+  disconnectPreview = undefined
+}
+
+// Events arrive on stdout until the control channel is up, then over the channel
+function handleVisionEvent(event: VisionEvent) {
+  if (event.type === 'latency_stats') mainWindow?.webContents.send('vision:latency', event)
+  if (event.type === 'wink') mainWindow?.webContents.send('vision:wink', event)
+  // Sent once the first frame has gone through the pipeline; startup_s has the timings
+  if (event.type === 'ready') mainWindow?.webContents.send('vision:ready', event)
+  if (event.type === 'preview_stream' && typeof event.port === 'number') {
+    previewPort = event.port
+    if (previewWanted) startPreview()
+  }
+  if (event.type === 'control_channel' && typeof event.port === 'number' && !controlChannel) {
+    controlChannel = connectControlChannel(event.port, sessionToken, {
+      onEvent: handleVisionEvent,
+      onPose: (pose) => mainWindow?.webContents.send('vision:pose', pose),
+      onClose: () => (controlChannel = undefined),
+    })
+  }
+  if (DEBUG) console.log(`Python event: ${JSON.stringify(event)}`)
+}
+
+// Acked over the control channel when it is up; otherwise written to stdin unacknowledged
+async function sendVisionCommand(command: {
+  type: string
+  [key: string]: unknown
+}): Promise<{ success: boolean; error?: string }> {
+  if (controlChannel) {
+    const ack = await controlChannel.send(command)
+    return ack.ok ? { success: true } : { success: false, error: ack.error }
+  }
+  if (pythonProcess?.stdin?.writable) {
+    pythonProcess.stdin.write(JSON.stringify(command) + '\n')
+    return { success: true }
+  }
+  return { success: false, error: 'Python process not active.' }
+}
+
 function getLibraryFilePath(): string {
   const userDataPath = app.getPath('userData')
   return path.join(userDataPath, 'library.json')
@@ -145,7 +213,9 @@ app.whenReady().then(async () => {
   app.on('before-quit', () => {
     isQuitting = true
     stopOverlayProximityWatcher()
+    stopPreview()
     tryStopPython()
+    controlChannel?.close()
   })
 
   // --- Python Script Spawning ---
@@ -155,14 +225,24 @@ app.whenReady().then(async () => {
 
   pythonProcess = spawn(exe, [script, model], {
     stdio: ['pipe', 'pipe', 'pipe'],
-    env: { ...process.env }, // keep PATH/venv vars
+    // keep PATH/venv vars; the preview goes over its own socket, not stdout
+    env: {
+      ...process.env,
+      WINKS_PREVIEW: process.env.WINKS_PREVIEW ?? 'stream',
+      WINKS_SESSION_TOKEN: sessionToken,
+    },
   })
 
-  // stdout/stderr (only when DEBUG)
-  if (DEBUG) {
-    pythonProcess.stdout.on('data', (data: Buffer) => {
-      console.log(`Python: ${data.toString().trim()}`)
+  // stdout is always drained for structured events; log text only shows when DEBUG
+  pythonProcess.stdout.on(
+    'data',
+    createStdoutLineParser(handleVisionEvent, (line) => {
+      if (DEBUG) console.log(`Python: ${line}`)
     })
+  )
+
+  // stderr (only when DEBUG)
+  if (DEBUG) {
     pythonProcess.stderr.on('data', (data: Buffer) => {
       console.error(`Python stderr: ${data.toString().trim()}`)
     })
@@ -502,22 +582,18 @@ ipcMain.handle('update:install', () => {
 })
 
 // --- Python Settings Handlers ---
-ipcMain.handle('update-sensitivities', async (_event, yaw: number, pitch: number) => {
-  if (pythonProcess?.stdin?.writable) {
-    pythonProcess.stdin.write(JSON.stringify({ type: 'update_sensitivities', yaw, pitch }) + '\n')
-    return { success: true }
-  }
-  return { success: false, error: 'Python process not active.' }
-})
-
-ipcMain.handle('update-calibration', async (_event, calibrationData: Record<string, unknown>) => {
-  if (pythonProcess?.stdin?.writable) {
-    pythonProcess.stdin.write(
-      JSON.stringify({ type: 'update_calibration', ...calibrationData }) + '\n'
-    )
-    return { success: true }
-  }
-  return { success: false, error: 'Python process not active.' }
+ipcMain.handle('update-sensitivities', async (_event, yaw: number, pitch: number) =>
+  sendVisionCommand({ type: 'update_sensitivities', yaw, pitch })
+)
+
+ipcMain.handle('update-calibration', async (_event, calibrationData: Record<string, unknown>) =>
+  sendVisionCommand({ type: 'update_calibration', ...calibrationData })
+)
+
+ipcMain.on('vision:preview', (_event, enabled: boolean) => {
+  previewWanted = enabled === true
+  if (previewWanted) startPreview()
+  else stopPreview()
 })
 
 // Overlay UI Handlers
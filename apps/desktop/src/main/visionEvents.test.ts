@@ -0,0 +1,33 @@
+import { describe, it, expect, vi } from 'vitest'
+import { createStdoutLineParser, parseVisionEvent } from './visionEvents'
+
+describe('parseVisionEvent', () => {
+  it('accepts JSON objects with a string type', () => {
+    expect(parseVisionEvent('{"type": "latency_stats", "source": "x"}')).toEqual({
+      type: 'latency_stats',
+      source: 'x',
+    })
+  })
+
+  it('treats log text and untyped JSON as text', () => {
+    expect(parseVisionEvent('Main Thread: Application starting.')).toBeUndefined()
+    expect(parseVisionEvent('{"source": "x"}')).toBeUndefined()
+    expect(parseVisionEvent('{not json')).toBeUndefined()
+  })
+})
+
+describe('createStdoutLineParser', () => {
+  it('reassembles lines split across chunks and separates events from text', () => {
+    const onEvent = vi.fn()
+    const onText = vi.fn()
+    const handle = createStdoutLineParser(onEvent, onText)
+
+    handle(Buffer.from('Camera Thread: Starting.\r\n{"type": "laten'))
+    expect(onText).toHaveBeenCalledWith('Camera Thread: Starting.')
+    expect(onEvent).not.toHaveBeenCalled()
+
+    handle('cy_stats", "interval_s": 5.0}\n\n')
+    expect(onEvent).toHaveBeenCalledWith({ type: 'latency_stats', interval_s: 5.0 })
+    expect(onText).toHaveBeenCalledTimes(1)
+  })
+})
@@ -0,0 +1,38 @@
+// Structured events from the Python vision process.
+// Python writes one JSON object per line with a "type" field (the same shape as
+// the commands we send on its stdin); every other stdout line is log text.
+
+export interface VisionEvent {
+  type: string
+  [key: string]: unknown
+}
+
+export function parseVisionEvent(line: string): VisionEvent | undefined {
+  if (!line.startsWith('{')) return undefined
+  try {
+    const value = JSON.parse(line)
+    if (value && typeof value === 'object' && typeof value.type === 'string') return value
+  } catch {}
+  return undefined
+}
+
+// Returns a 'data' handler for the child's stdout. Chunks can split or join
+// lines, so partial lines are held until their newline arrives.
+export function createStdoutLineParser(
+  onEvent: (event: VisionEvent) => void,
+  onText: (line: string) => void
+): (chunk: Buffer | string) => void {
+  let pending = ''
+  return (chunk) => {
+    pending += chunk.toString()
+    const lines = pending.split(/\r?\n/)
+    pending = lines.pop() ?? ''
+    for (const raw of lines) {
+      const line = raw.trim()
+      if (!line) continue
+      const event = parseVisionEvent(line)
+      if (event) onEvent(event)
+      else onText(line)
+    }
+  }
+}
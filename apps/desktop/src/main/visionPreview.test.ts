@@ -0,0 +1,98 @@
+import net from 'node:net'
+import { describe, it, expect, vi } from 'vitest'
+import { connectPreviewStream, createPreviewFrameParser } from './visionPreview'
+
+function message(width: number, height: number, jpeg: Buffer): Buffer {
+  const header = Buffer.alloc(12)
+  header.write('WKPV', 0, 'latin1')
+  header.writeUInt32LE(jpeg.length, 4)
+  header.writeUInt16LE(width, 8)
+  header.writeUInt16LE(height, 10)
+  return Buffer.concat([header, jpeg])
+}
+
+describe('createPreviewFrameParser', () => {
+  it('reassembles frames split across and joined within chunks', () => {
+    const onFrame = vi.fn()
+    const handle = createPreviewFrameParser(onFrame)
+    const stream = Buffer.concat([
+      message(480, 360, Buffer.from([1, 2, 3])),
+      message(320, 240, Buffer.from([4, 5])),
+    ])
+
+    handle(stream.subarray(0, 7))
+    handle(stream.subarray(7, 20))
+    expect(onFrame).toHaveBeenCalledTimes(1)
+    expect(onFrame.mock.calls[0]![0]).toMatchObject({ width: 480, height: 360 })
+    expect([...onFrame.mock.calls[0]![0].jpeg]).toEqual([1, 2, 3])
+
+    handle(stream.subarray(20))
+    expect(onFrame).toHaveBeenCalledTimes(2)
+    expect([...onFrame.mock.calls[1]![0].jpeg]).toEqual([4, 5])
+  })
+
+  it('throws when the stream is out of sync', () => {
+    const handle = createPreviewFrameParser(vi.fn())
+    expect(() => handle(Buffer.alloc(16))).toThrow('out of sync')
+  })
+})
+
+describe('connectPreviewStream', () => {
+  async function listen(onConnection: (socket: net.Socket) => void): Promise<net.Server> {
+    const server = net.createServer(onConnection)
+    await new Promise<void>((resolve) => server.listen(0, '127.0.0.1', resolve))
+    return server
+  }
+
+  it('reports a stream the server closed, without an error', async () => {
+    const server = await listen((socket) => socket.end(message(2, 2, Buffer.from([9]))))
+    const onFrame = vi.fn()
+    const error = await new Promise<Error | undefined>((resolve) =>
+      connectPreviewStream((server.address() as net.AddressInfo).port, 'token', onFrame, resolve)
+    )
+    server.close()
+    expect(error).toBeUndefined()
+    expect(onFrame).toHaveBeenCalledTimes(1)
+  })
+
+  it('reports a stream that goes out of sync with the error', async () => {
+    const server = await listen((socket) => socket.write(Buffer.alloc(16)))
+    const error = await new Promise<Error | undefined>((resolve) =>
+      connectPreviewStream((server.address() as net.AddressInfo).port, 'token', vi.fn(), resolve)
+    )
+    server.close()
+    expect(error?.message).toContain('out of sync')
+  })
+
+  it('sends the session token first', async () => {
+    const received: Buffer[] = []
+    const server = await listen((socket) => {
+      socket.on('data', (chunk) => {
+        received.push(chunk)
+        if (Buffer.concat(received).length >= 5) socket.end()
+      })
+    })
+    await new Promise((resolve) =>
+      connectPreviewStream((server.address() as net.AddressInfo).port, 'token', vi.fn(), resolve)
+    )
+    server.close()
+    expect(Buffer.concat(received).toString()).toBe('token')
+  })
+
+  it('stays quiet when disconnected on purpose', async () => {
+    let serverSide: net.Socket | undefined
+    const server = await listen((socket) => (serverSide = socket))
+    const onClose = vi.fn()
+    const disconnect = connectPreviewStream(
+      (server.address() as net.AddressInfo).port,
+      'token',
+      vi.fn(),
+      onClose
+    )
+    await vi.waitFor(() => expect(serverSide).toBeDefined())
+    disconnect()
+    await new Promise((resolve) => serverSide!.on('close', resolve))
+    server.close()
+    expect(onClose).not.toHaveBeenCalled()
+  })
+})
@@ -0,0 +1,77 @@
+// Preview frames from the Python vision process.
+// When WINKS_PREVIEW=stream, Python listens on a loopback port (announced by a
+// "preview_stream" event) and streams annotated JPEGs to whoever connects. Each
+// message is a 12-byte little-endian header (magic "WKPV", JPEG length,
+// width, height) followed by the JPEG bytes. The client first sends the
+// launch's session token, or Python closes the connection without sending a
+// frame. See services/vision/src/preview.py.
+
+import net from 'node:net'
+
+export interface PreviewFrame {
+  width: number
+  height: number
+  jpeg: Buffer
+}
+
+const PREVIEW_MAGIC = 'WKPV'
+const HEADER_BYTES = 12
+
+// Returns a 'data' handler for the preview socket. Chunks can split or join
+// messages, so bytes are held until a whole frame has arrived. Throws if the
+// stream is out of sync.
+export function createPreviewFrameParser(
+  onFrame: (frame: PreviewFrame) => void
+): (chunk: Buffer) => void {
+  let pending = Buffer.alloc(0)
+  return (chunk) => {
+    pending = pending.length ? Buffer.concat([pending, chunk]) : chunk
+    while (pending.length >= HEADER_BYTES) {
+      if (pending.toString('latin1', 0, 4) !== PREVIEW_MAGIC) {
+        throw new Error('Preview stream out of sync')
+      }
+      const length = pending.readUInt32LE(4)
+      if (pending.length < HEADER_BYTES + length) break
+      onFrame({
+        width: pending.readUInt16LE(8),
+        height: pending.readUInt16LE(10),
+        jpeg: pending.subarray(HEADER_BYTES, HEADER_BYTES + length),
+      })
+      pending = pending.subarray(HEADER_BYTES + length)
+    }
+  }
+}
+
+// Connects to the preview port. Python only renders while a client is
+// connected, so call the returned function to disconnect when nobody watches.
+// onClose runs once when the stream ends any other way: with the error when
+// the socket failed or the stream went out of sync, without one when Python
+// closed it (e.g. after dropping a client that stopped reading).
+export function connectPreviewStream(
+  port: number,
+  token: string,
+  onFrame: (frame: PreviewFrame) => void,
+  onClose: (error?: Error) => void
+): () => void {
+  const socket = net.createConnection({ host: '127.0.0.1', port })
+  socket.write(token)
+  const parse = createPreviewFrameParser(onFrame)
+  let failure: Error | undefined
+  let disconnected = false
+  socket.on('data', (chunk: Buffer) => {
+    try {
+      parse(chunk)
+    } catch (error) {
+      socket.destroy(error as Error)
+    }
+  })
+  socket.on('error', (error) => (failure = error))
+  socket.on('end', () => socket.destroy())
+  socket.on('close', () => {
+    if (!disconnected) onClose(failure)
+  })
+  return () => {
+    disconnected = true
+    socket.destroy()
+  }
+}
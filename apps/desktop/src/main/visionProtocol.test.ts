@@ -0,0 +1,73 @@
+import net from 'node:net'
+import { describe, it, expect, vi } from 'vitest'
+import {
+  KIND_COMMAND,
+  KIND_POSE,
+  connectControlChannel,
+  createMessageParser,
+  decodePose,
+  encodeMessage,
+} from './visionProtocol'
+
+function poseMessage(): Buffer {
+  const payload = Buffer.alloc(21)
+  payload.writeDoubleLE(12.5, 0)
+  payload.writeFloatLE(4, 8)
+  payload.writeFloatLE(-2, 12)
+  payload.writeFloatLE(30, 16)
+  payload.writeUInt8(1, 20)
+  const header = Buffer.alloc(5)
+  header.writeUInt8(KIND_POSE, 0)
+  header.writeUInt32LE(payload.length, 1)
+  return Buffer.concat([header, payload])
+}
+
+describe('createMessageParser', () => {
+  it('reassembles messages split across and joined within chunks', () => {
+    const onMessage = vi.fn()
+    const handle = createMessageParser(onMessage)
+    const stream = Buffer.concat([encodeMessage(KIND_COMMAND, { id: 1, type: 'stop' }), poseMessage()])
+
+    handle(stream.subarray(0, 3))
+    handle(stream.subarray(3, 30))
+    expect(onMessage).toHaveBeenCalledTimes(1)
+    const [kind, payload] = onMessage.mock.calls[0]!
+    expect(kind).toBe(KIND_COMMAND)
+    expect(JSON.parse(payload.toString())).toEqual({ id: 1, type: 'stop' })
+
+    handle(stream.subarray(30))
+    expect(onMessage).toHaveBeenCalledTimes(2)
+    expect(decodePose(onMessage.mock.calls[1]![1])).toEqual({
+      capturedAt: 12.5,
+      yaw: 4,
+      pitch: -2,
+      fps: 30,
+      face: true,
+    })
+  })
+})
+
+describe('connectControlChannel', () => {
+  it('sends the session token before any command', async () => {
+    const received: Buffer[] = []
+    let serverSide: net.Socket | undefined
+    const server = net.createServer((socket) => {
+      serverSide = socket
+      socket.on('data', (chunk) => received.push(chunk))
+    })
+    await new Promise<void>((resolve) => server.listen(0, '127.0.0.1', resolve))
+    const channel = connectControlChannel((server.address() as net.AddressInfo).port, 'secret', {
+      onEvent: vi.fn(),
+      onPose: vi.fn(),
+      onClose: vi.fn(),
+    })
+    void channel.send({ type: 'stop' })
+    await vi.waitFor(() => expect(Buffer.concat(received).length).toBeGreaterThan(6))
+    channel.close()
+    serverSide?.destroy()
+    server.close()
+    const bytes = Buffer.concat(received)
+    expect(bytes.subarray(0, 6).toString()).toBe('secret')
+    expect(bytes.readUInt8(6)).toBe(KIND_COMMAND)
+  })
+})
@@ -0,0 +1,130 @@
+// Framed control channel to the Python vision process.
+// Python listens on a loopback port (announced by a "control_channel" event on
+// stdout). Every message is a 5-byte little-endian header (kind, payload
+// length) and a payload: JSON for commands, acks and events, a packed struct
+// for pose samples. The client's first bytes are the launch's session token,
+// without a header. See services/vision/src/control_channel.py.
+
+import net from 'node:net'
+import type { VisionEvent } from './visionEvents'
+
+export const KIND_COMMAND = 1
+export const KIND_ACK = 2
+export const KIND_EVENT = 3
+export const KIND_POSE = 4
+
+const HEADER_BYTES = 5
+const POSE_BYTES = 21 // float64 captured_at, float32 yaw, pitch, fps, uint8 face
+const ACK_TIMEOUT_MS = 2000
+
+export interface VisionPose {
+  capturedAt: number
+  yaw: number
+  pitch: number
+  fps: number
+  face: boolean
+}
+
+export type VisionAck = { ok: true } | { ok: false; error: string }
+
+export function encodeMessage(kind: number, payload: object): Buffer {
+  const body = Buffer.from(JSON.stringify(payload))
+  const header = Buffer.alloc(HEADER_BYTES)
+  header.writeUInt8(kind, 0)
+  header.writeUInt32LE(body.length, 1)
+  return Buffer.concat([header, body])
+}
+
+export function decodePose(payload: Buffer): VisionPose {
+  if (payload.length !== POSE_BYTES) throw new Error(`Pose of ${payload.length} bytes`)
+  return {
+    capturedAt: payload.readDoubleLE(0),
+    yaw: payload.readFloatLE(8),
+    pitch: payload.readFloatLE(12),
+    fps: payload.readFloatLE(16),
+    face: payload.readUInt8(20) !== 0,
+  }
+}
+
+// Returns a 'data' handler for the socket. Chunks can split or join messages,
+// so bytes are held until a whole message has arrived.
+export function createMessageParser(
+  onMessage: (kind: number, payload: Buffer) => void
+): (chunk: Buffer) => void {
+  let pending = Buffer.alloc(0)
+  return (chunk) => {
+    pending = pending.length ? Buffer.concat([pending, chunk]) : chunk
+    while (pending.length >= HEADER_BYTES) {
+      const length = pending.readUInt32LE(1)
+      if (pending.length < HEADER_BYTES + length) break
+      onMessage(pending.readUInt8(0), pending.subarray(HEADER_BYTES, HEADER_BYTES + length))
+      pending = pending.subarray(HEADER_BYTES + length)
+    }
+  }
+}
+
+export interface ControlChannelHandlers {
+  onEvent: (event: VisionEvent) => void
+  onPose: (pose: VisionPose) => void
+  onClose: () => void
+}
+
+export interface ControlChannel {
+  // Resolves with Python's ack, or an error if none arrives in time
+  send: (command: { type: string; [key: string]: unknown }) => Promise<VisionAck>
+  close: () => void
+}
+
+// token is the launch's session token (WINKS_SESSION_TOKEN); Python closes a
+// connection that does not send it first.
+export function connectControlChannel(
+  port: number,
+  token: string,
+  handlers: ControlChannelHandlers
+): ControlChannel {
+  const socket = net.createConnection({ host: '127.0.0.1', port })
+  socket.setNoDelay(true)
+  socket.write(token)
+  const waiting = new Map<number, (ack: VisionAck) => void>()
+  let nextId = 1
+
+  socket.on(
+    'data',
+    createMessageParser((kind, payload) => {
+      try {
+        if (kind === KIND_POSE) {
+          handlers.onPose(decodePose(payload))
+        } else if (kind === KIND_ACK) {
+          const ack = JSON.parse(payload.toString())
+          waiting.get(ack.id)?.(ack.ok ? { ok: true } : { ok: false, error: String(ack.error) })
+          waiting.delete(ack.id)
+        } else if (kind === KIND_EVENT) {
+          handlers.onEvent(JSON.parse(payload.toString()))
+        }
+      } catch {}
+    })
+  )
+  socket.on('error', () => socket.destroy())
+  socket.on('close', () => {
+    for (const resolve of waiting.values()) resolve({ ok: false, error: 'Control channel closed.' })
+    waiting.clear()
+    handlers.onClose()
+  })
+
+  return {
+    send: (command) =>
+      new Promise((resolve) => {
+        const id = nextId++
+        const timer = setTimeout(() => {
+          waiting.delete(id)
+          resolve({ ok: false, error: 'No ack from the vision process.' })
+        }, ACK_TIMEOUT_MS)
+        waiting.set(id, (ack) => {
+          clearTimeout(timer)
+          resolve(ack)
+        })
+        socket.write(encodeMessage(KIND_COMMAND, { ...command, id }))
+      }),
+    close: () => socket.destroy(),
+  }
+}
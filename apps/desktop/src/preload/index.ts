@@ -39,6 +39,7 @@ type SendChannel =
   | 'fetch-website-info'
   | 'add-website'
   | 'launch-website'
+  | 'vision:preview'
 
 type ReceiveChannel =
   | 'set-coordinate-type'
@@ -53,6 +54,11 @@ type ReceiveChannel =
   | 'update:progress'
   | 'python:exit'
   | 'python:error'
+  | 'vision:latency'
+  | 'vision:preview-frame'
+  | 'vision:pose'
+  | 'vision:wink'
+  | 'vision:ready'
 
 // Match your main process shapes
 export interface LibraryItem {
@@ -96,6 +102,7 @@ const validSendChannels: readonly SendChannel[] = [
   'fetch-website-info',
   'add-website',
   'launch-website',
+  'vision:preview',
 ] as const
 
 const validReceiveChannels: readonly ReceiveChannel[] = [
@@ -111,6 +118,11 @@ const validReceiveChannels: readonly ReceiveChannel[] = [
   'update:progress',
   'python:exit',
   'python:error',
+  'vision:latency',
+  'vision:preview-frame',
+  'vision:pose',
+  'vision:wink',
+  'vision:ready',
 ] as const
 
 // -----------------------------
@@ -1,4 +1,4 @@
-import { useState } from 'react'
+import { useEffect, useRef, useState } from 'react'
 import { useNavigate } from 'react-router-dom'
 import './Homepage.css'
 
@@ -7,8 +7,32 @@ export default function CalibrationPage() {
   const [pitch, setPitch] = useState(45)
   const [deadZone, setDeadZone] = useState(6)
   const [tiltAngle, setTiltAngle] = useState(20)
+  const [previewUrl, setPreviewUrl] = useState<string>()
+  const previewBusy = useRef(false)
   const navigate = useNavigate()
 
+  // Live view of what the tracker sees; Python only renders it while this page is open
+  useEffect(() => {
+    let url: string | undefined
+    window.electron.send('vision:preview', true)
+    const unsubscribe = window.electron.on(
+      'vision:preview-frame',
+      (frame: { width: number; height: number; jpeg: Uint8Array }) => {
+        // Drop frames while the last one is still decoding rather than queue them
+        if (previewBusy.current) return
+        previewBusy.current = true
+        if (url) URL.revokeObjectURL(url)
+        url = URL.createObjectURL(new Blob([frame.jpeg], { type: 'image/jpeg' }))
+        setPreviewUrl(url)
+      }
+    )
+    return () => {
+      window.electron.send('vision:preview', false)
+      unsubscribe?.()
+      if (url) URL.revokeObjectURL(url)
+    }
+  }, [])
+
   const handleSave = () => {
     const settings = { yaw, pitch, deadZone, tiltAngle }
     console.log('Saving settings:', settings)
@@ -33,6 +57,22 @@ export default function CalibrationPage() {
         Fine-tune your head tracking for a smooth and personalized experience.
       </p>
 
+      {previewUrl && (
+        <img
+          src={previewUrl}
+          alt="Camera preview"
+          onLoad={() => (previewBusy.current = false)}
+          onError={() => (previewBusy.current = false)}
+          style={{
+            width: '70%',
+            maxWidth: '480px',
+            borderRadius: '16px',
+            boxShadow: '0 6px 18px rgba(0,0,0,0.1)',
+            marginTop: '10px',
+          }}
+        />
+      )}
+
       <div
         style={{
           width: '70%',
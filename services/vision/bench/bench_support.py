@@ -0,0 +1,18 @@
+# bench_support.py
+# Shared helpers for the scripts in bench/: puts services/vision/src on the
+# import path and routes cursor output to a call-counting backend so benchmarks
+# run on headless build boxes without ever touching the real cursor.
+
+import os
+import sys
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+DEFAULT_MODEL_PATH = os.path.join(SRC_DIR, 'face_landmarker.task')
+
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+def use_null_input_backend():
+    """Make pipeline modules open input_backends.RecordingBackend instead of
+    driving the real cursor. Must run before importing them."""
+    os.environ["WINKS_INPUT_BACKEND"] = "null"
@@ -0,0 +1,121 @@
+# cpu_contention_benchmark.py
+# How much the pipeline's latency degrades when something else wants the CPU,
+# and how much a CPU budget (cpu_budget.py) wins back. Replays a clip at
+# realtime pace with bench/replay_benchmark.py, once per scenario:
+#
+#   quiet    nothing else running
+#   hog      --hogs busy-looping processes next to it, no budget
+#   budget   the same hogs, with --max-cores / --cv-threads / --priority applied
+#
+# and prints, per scenario, fps, dropped frames and p50/p95 of detect,
+# frame_age (capture -> logic done) and glass_to_cursor, plus how many times
+# slower each p95 is than in the quiet run. The hogs run at normal priority,
+# like the user's own work would. Each replay is a fresh interpreter, so the
+# budget is applied at startup exactly as head_wink_combined.py applies it.
+# The latency target (quality_controller.py) is left as the environment sets
+# it; quality_level is the level each run ended at.
+#
+# Usage:
+#   python bench/cpu_contention_benchmark.py CLIP [--executor thread|process] [--hogs N]
+#                                            [--max-cores N] [--cv-threads N] [--priority low|normal|high]
+#                                            [--out report.json]
+
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+
+from bench_support import DEFAULT_MODEL_PATH
+
+STAGES = ("detect", "frame_age", "glass_to_cursor")
+
+def burn(stop_event):
+    """A synthetic CPU hog: spin until told to stop."""
+    while not stop_event.is_set():
+        sum(range(10000))
+
+def start_hogs(count):
+    context = multiprocessing.get_context("spawn")
+    stop_event = context.Event()
+    hogs = [context.Process(target=burn, args=(stop_event,), daemon=True) for _ in range(count)]
+    for hog in hogs:
+        hog.start()
+    return stop_event, hogs
+
+def replay(clip, model_path, executor, budget_env):
+    env = dict(os.environ, WINKS_PREVIEW="off")
+    for name in ("WINKS_MAX_CORES", "WINKS_CV_THREADS", "WINKS_PRIORITY"):
+        env.pop(name, None)
+    env.update(budget_env)
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "replay_benchmark.py")
+    completed = subprocess.run([sys.executable, script, clip, "--model", model_path, "--pace", "realtime",
+                                "--executor", executor],
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, env=env, check=True)
+    return json.loads(completed.stdout)
+
+def summarize(report):
+    stages = report["stages"]
+    summary = {
+        "cpu_budget": report["environment"]["cpu_budget"],
+        "fps": report["fps"],
+        "frames_processed": report["frames_processed"],
+        "frames_dropped": report["frames_dropped"],
+        "frames_quality_skipped": report["frames_quality_skipped"],
+        "quality_level": report["quality_level"],
+    }
+    for stage in STAGES:
+        if stage in stages:
+            summary[f"{stage}_p50_ms"] = stages[stage]["p50_ms"]
+            summary[f"{stage}_p95_ms"] = stages[stage]["p95_ms"]
+    return summary
+
+def run_scenario(clip, model_path, executor, hogs, budget_env):
+    stop_event, processes = start_hogs(hogs)
+    try:
+        return summarize(replay(clip, model_path, executor, budget_env))
+    finally:
+        stop_event.set()
+        for process in processes:
+            process.join(timeout=2)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure pipeline latency next to a synthetic CPU hog.")
+    parser.add_argument("clip", help="Video file or directory of images to replay")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="Path to face_landmarker.task")
+    parser.add_argument("--executor", choices=("thread", "process"), default="thread")
+    parser.add_argument("--hogs", type=int, default=os.cpu_count() or 1,
+                        help="Busy-looping processes to run next to the pipeline (default: one per core)")
+    parser.add_argument("--max-cores", type=int, help="WINKS_MAX_CORES for the budget scenario")
+    parser.add_argument("--cv-threads", type=int, help="WINKS_CV_THREADS for the budget scenario")
+    parser.add_argument("--priority", choices=("low", "normal", "high"), default="high",
+                        help="WINKS_PRIORITY for the budget scenario")
+    parser.add_argument("--out", help="Write the JSON report to this file as well as stdout")
+    args = parser.parse_args()
+
+    budget_env = {"WINKS_PRIORITY": args.priority}
+    if args.max_cores:
+        budget_env["WINKS_MAX_CORES"] = str(args.max_cores)
+    if args.cv_threads is not None:
+        budget_env["WINKS_CV_THREADS"] = str(args.cv_threads)
+    model_path = os.path.abspath(args.model)
+    scenarios = {
+        "quiet": run_scenario(args.clip, model_path, args.executor, 0, {}),
+        "hog": run_scenario(args.clip, model_path, args.executor, args.hogs, {}),
+        "budget": run_scenario(args.clip, model_path, args.executor, args.hogs, budget_env),
+    }
+    quiet = scenarios["quiet"]
+    for name in ("hog", "budget"):
+        for stage in STAGES:
+            key = f"{stage}_p95_ms"
+            if quiet.get(key) and key in scenarios[name]:
+                scenarios[name][f"{stage}_p95_slowdown"] = round(scenarios[name][key] / quiet[key], 2)
+
+    report = {"clip": args.clip, "executor": args.executor, "hogs": args.hogs, "budget_env": budget_env,
+              "scenarios": scenarios}
+    text = json.dumps(report, indent=2, sort_keys=True)
+    print(text)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(text + "\n")
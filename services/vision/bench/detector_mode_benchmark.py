@@ -0,0 +1,100 @@
+# detector_mode_benchmark.py
+# Latency comparison of the FaceLandmarker running modes on a recorded clip.
+# Frames are decoded up front so only inference is timed. Each frame gets the
+# timestamp it would have had from the camera (index / clip FPS).
+#
+#   image, video: synchronous; per-call latency of detect()/detect_for_video()
+#   live_stream:  frames submitted at the clip FPS; latency is submit -> callback
+#
+# Usage:
+#   python bench/detector_mode_benchmark.py CLIP [--model PATH] [--modes image,video,live_stream]
+
+import argparse
+import json
+import time
+
+from bench_support import DEFAULT_MODEL_PATH
+
+def load_frames(clip):
+    import cv2
+    from frame_sources import open_frame_source
+    source = open_frame_source(clip)
+    if not source.open():
+        raise SystemExit(f"Could not open {clip}")
+    frames = []
+    while True:
+        ret, frame = source.read()
+        if not ret:
+            break
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    source.release()
+    return frames, source.fps
+
+def percentiles_ms(seconds):
+    import numpy as np
+    if not seconds:
+        return {}
+    ms = np.asarray(seconds) * 1000.0
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"mean_ms": round(float(ms.mean()), 3), "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3), "p99_ms": round(float(p99), 3)}
+
+def run_mode(mode, frames, fps, model_path):
+    import mediapipe as mp
+    from landmarker import FaceLandmarkerRunner
+
+    submitted_at = {}
+    latencies = []
+    faces = [0]
+
+    class TimedRunner(FaceLandmarkerRunner):
+        def _on_result(self, detection_result, output_image, timestamp_ms):
+            super()._on_result(detection_result, output_image, timestamp_ms)
+            if timestamp_ms in submitted_at:
+                latencies.append(time.perf_counter() - submitted_at.pop(timestamp_ms))
+            if detection_result.face_landmarks:
+                faces[0] += 1
+
+    runner = TimedRunner(model_path, mode)
+    frame_interval = 1.0 / fps
+    started = time.perf_counter()
+    for index, frame_rgb in enumerate(frames):
+        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame_rgb)
+        timestamp_ms = int(index * frame_interval * 1000)
+        if mode == "live_stream":
+            # Pace like a camera; the async graph drops frames it cannot keep up with.
+            target = started + index * frame_interval
+            delay = target - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            submitted_at[timestamp_ms] = time.perf_counter()
+            runner.detect(mp_image, timestamp_ms)
+        else:
+            call_start = time.perf_counter()
+            detection_result = runner.detect(mp_image, timestamp_ms)
+            latencies.append(time.perf_counter() - call_start)
+            if detection_result.face_landmarks:
+                faces[0] += 1
+    if mode == "live_stream":
+        time.sleep(0.5)  # let the last results arrive
+    elapsed = time.perf_counter() - started
+    runner.close()
+
+    report = {"frames": len(frames), "results": len(latencies), "frames_with_face": faces[0],
+              "wall_time_s": round(elapsed, 3), "latency": percentiles_ms(latencies)}
+    if mode != "live_stream":
+        report["fps"] = round(len(frames) / elapsed, 2)
+    return report
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare FaceLandmarker IMAGE / VIDEO / LIVE_STREAM latency.")
+    parser.add_argument("clip", help="Video file or directory of images")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--modes", default="image,video,live_stream")
+    args = parser.parse_args()
+
+    frames, fps = load_frames(args.clip)
+    report = {"clip": args.clip, "clip_fps": fps, "modes": {}}
+    for mode in args.modes.split(","):
+        report["modes"][mode] = run_mode(mode.strip(), frames, fps, args.model)
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,108 @@
+# face_roi_benchmark.py
+# Full-frame vs face-ROI inference on a recorded clip. Runs the clip twice
+# (once per variant, each with its own landmarker) and reports per-frame CPU
+# and wall time for conversion + inference, plus how far the ROI variant's
+# yaw, pitch and EAR drift from full-frame inference on the same frames.
+#
+# Usage:
+#   python bench/face_roi_benchmark.py CLIP [--mode video] [--resize 1280x720]
+#
+# --resize upscales/downscales frames first to emulate a different camera resolution.
+
+import argparse
+import json
+import time
+
+from bench_support import DEFAULT_MODEL_PATH
+
+def load_frames(clip, resize):
+    import cv2
+    from frame_sources import open_frame_source
+    source = open_frame_source(clip)
+    if not source.open():
+        raise SystemExit(f"Could not open {clip}")
+    frames = []
+    while True:
+        ret, frame = source.read()
+        if not ret:
+            break
+        if resize:
+            frame = cv2.resize(frame, resize)
+        frames.append(frame)
+    source.release()
+    return frames, source.fps
+
+def run_variant(frames, fps, model_path, mode, use_roi):
+    import cv2
+    import numpy as np
+    import mediapipe as mp
+    from face_geometry import result_to_arrays, eye_aspect_ratios, yaw_pitch_degrees
+    from face_roi import FaceRoiTracker
+    from landmarker import FaceLandmarkerRunner
+
+    runner = FaceLandmarkerRunner(model_path, mode)
+    roi_tracker = FaceRoiTracker() if use_roi else None
+    wall, cpu, outputs = [], [], []
+    for index, frame_bgr in enumerate(frames):
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        timestamp_ms = index * 1000.0 / fps
+        if roi_tracker:
+            detection_result = roi_tracker.detect(runner, frame_bgr, timestamp_ms)
+        else:
+            frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+            detection_result = runner.detect(mp.Image(image_format=mp.ImageFormat.SRGB, data=frame_rgb), timestamp_ms)
+        wall.append(time.perf_counter() - wall_start)
+        cpu.append(time.process_time() - cpu_start)
+
+        landmarks, rotation = result_to_arrays(detection_result)
+        if landmarks is not None and rotation is not None:
+            outputs.append(tuple(yaw_pitch_degrees(rotation)) + tuple(eye_aspect_ratios(landmarks)))
+        else:
+            outputs.append(None)
+    runner.close()
+    wall_ms, cpu_ms = np.asarray(wall) * 1000.0, np.asarray(cpu) * 1000.0
+    summary = {
+        "wall_p50_ms": round(float(np.percentile(wall_ms, 50)), 3),
+        "wall_p95_ms": round(float(np.percentile(wall_ms, 95)), 3),
+        "cpu_mean_ms": round(float(cpu_ms.mean()), 3),
+        "frames_with_face": sum(o is not None for o in outputs),
+    }
+    if roi_tracker:
+        summary["reacquisitions"] = roi_tracker.reacquisitions
+        summary["roi_retries"] = roi_tracker.retries
+    return summary, outputs
+
+def compare(full_outputs, roi_outputs):
+    import numpy as np
+    pairs = [(f, r) for f, r in zip(full_outputs, roi_outputs) if f is not None and r is not None]
+    if not pairs:
+        return {"frames_compared": 0}
+    diff = np.abs(np.array([f for f, _ in pairs]) - np.array([r for _, r in pairs]))
+    report = {"frames_compared": len(pairs)}
+    for column, name in enumerate(("yaw_deg", "pitch_deg", "left_ear", "right_ear")):
+        report[name] = {"mean_abs_diff": round(float(diff[:, column].mean()), 4),
+                        "p95_abs_diff": round(float(np.percentile(diff[:, column], 95)), 4),
+                        "max_abs_diff": round(float(diff[:, column].max()), 4)}
+    return report
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare full-frame and face-ROI landmark inference.")
+    parser.add_argument("clip", help="Video file or directory of images")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--mode", default="video", choices=("image", "video"))
+    parser.add_argument("--resize", help="Resize frames to WIDTHxHEIGHT before inference")
+    args = parser.parse_args()
+
+    resize = tuple(int(v) for v in args.resize.lower().split("x")) if args.resize else None
+    frames, fps = load_frames(args.clip, resize)
+    full_summary, full_outputs = run_variant(frames, fps, args.model, args.mode, use_roi=False)
+    roi_summary, roi_outputs = run_variant(frames, fps, args.model, args.mode, use_roi=True)
+    report = {
+        "clip": args.clip,
+        "frame_shape": list(frames[0].shape) if frames else None,
+        "mode": args.mode,
+        "full_frame": full_summary,
+        "roi": roi_summary,
+        "roi_vs_full_frame": compare(full_outputs, roi_outputs),
+    }
+    print(json.dumps(report, indent=2))
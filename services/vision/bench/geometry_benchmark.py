@@ -0,0 +1,145 @@
+# geometry_benchmark.py
+# Microbenchmarks for face_geometry.py against the per-landmark Python helpers
+# it replaced (copied below as baseline_*). Reports, per frame:
+#
+#   baseline:  calculate_ear() for both eyes + rotation_matrix_to_identified_physical_angles()
+#   arrays:    result_to_arrays() conversion alone
+#   kernels:   eye_aspect_ratios() + yaw_pitch_degrees() on the converted arrays
+#   batch:     both kernels over all frames at once, divided by the frame count
+#
+# and the largest difference between the two implementations. Results come from
+# running the landmarker over CLIP, or are synthesized when no clip is given.
+#
+# Usage:
+#   python bench/geometry_benchmark.py [CLIP] [--frames 500] [--repeat 5]
+
+import argparse
+import json
+import math
+import time
+
+from bench_support import DEFAULT_MODEL_PATH
+
+BASELINE_LEFT_EYE = [362, 385, 387, 263, 373, 380]
+BASELINE_RIGHT_EYE = [33, 160, 158, 133, 153, 144]
+
+def baseline_rotation_angles(rotation_matrix):
+    sy = math.sqrt(rotation_matrix[0,0] * rotation_matrix[0,0] + rotation_matrix[1,0] * rotation_matrix[1,0])
+    singular = sy < 1e-6
+    if not singular:
+        phys_yaw_val = math.atan2(-rotation_matrix[2,0], sy)
+        phys_pitch_val = math.atan2(rotation_matrix[2,1] , rotation_matrix[2,2])
+    else:
+        phys_yaw_val = math.atan2(-rotation_matrix[2,0], sy)
+        phys_pitch_val = math.atan2(-rotation_matrix[1,2], rotation_matrix[1,1])
+    return math.degrees(phys_yaw_val), math.degrees(phys_pitch_val)
+
+def baseline_calculate_ear(landmarks, eye_points):
+    if not landmarks or max(eye_points) >= len(landmarks): return 999.0
+    points = [landmarks[i] for i in eye_points]
+    if any(lm is None for lm in points): return 999.0
+    top_y = (points[1].y + points[2].y) / 2
+    bottom_y = (points[4].y + points[5].y) / 2
+    horizontal_dist = abs(points[3].x - points[0].x)
+    if horizontal_dist == 0: return 999.0
+    return abs(top_y - bottom_y) / horizontal_dist
+
+def baseline_frame(detection_result):
+    import numpy as np
+    matrix = np.array(detection_result.facial_transformation_matrixes[0]).reshape(4,4)[:3,:3]
+    yaw, pitch = baseline_rotation_angles(matrix)
+    landmarks = detection_result.face_landmarks[0]
+    return (yaw, pitch,
+            baseline_calculate_ear(landmarks, BASELINE_LEFT_EYE),
+            baseline_calculate_ear(landmarks, BASELINE_RIGHT_EYE))
+
+def synthetic_results(count):
+    import numpy as np
+    from mediapipe.tasks.python.components.containers.landmark import NormalizedLandmark
+    from mediapipe.tasks.python.vision.face_landmarker import FaceLandmarkerResult
+    rng = np.random.default_rng(0)
+    results = []
+    for _ in range(count):
+        landmarks = [NormalizedLandmark(x=float(x), y=float(y), z=float(z)) for x, y, z in rng.random((478, 3))]
+        yaw, pitch = rng.uniform(-0.5, 0.5, 2)
+        rotation = np.array([[math.cos(yaw), 0, math.sin(yaw)], [0, 1, 0], [-math.sin(yaw), 0, math.cos(yaw)]]) @ \
+                   np.array([[1, 0, 0], [0, math.cos(pitch), -math.sin(pitch)], [0, math.sin(pitch), math.cos(pitch)]])
+        matrix = np.eye(4)
+        matrix[:3, :3] = rotation
+        results.append(FaceLandmarkerResult(face_landmarks=[landmarks], face_blendshapes=[], facial_transformation_matrixes=[matrix]))
+    return results
+
+def clip_results(clip, model_path, limit):
+    import cv2
+    import mediapipe as mp
+    from frame_sources import open_frame_source
+    from landmarker import FaceLandmarkerRunner
+    source = open_frame_source(clip)
+    if not source.open():
+        raise SystemExit(f"Could not open {clip}")
+    runner = FaceLandmarkerRunner(model_path, "image")
+    results = []
+    while len(results) < limit:
+        ret, frame = source.read()
+        if not ret:
+            break
+        detection_result = runner.detect(mp.Image(image_format=mp.ImageFormat.SRGB, data=cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)), 0)
+        if detection_result.face_landmarks and detection_result.facial_transformation_matrixes:
+            results.append(detection_result)
+    runner.close()
+    source.release()
+    return results
+
+def per_frame_us(func, items, repeat):
+    """Best-of-repeat mean time of func(item) over items, in microseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1e6 / len(items), 3)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark vectorized landmark geometry against the scalar helpers.")
+    parser.add_argument("clip", nargs="?", help="Video file or directory of images (default: synthetic landmarks)")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--frames", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    import numpy as np
+    from face_geometry import result_to_arrays, eye_aspect_ratios, yaw_pitch_degrees
+
+    results = clip_results(args.clip, args.model, args.frames) if args.clip else synthetic_results(args.frames)
+    if not results:
+        raise SystemExit("No frames with a face to benchmark")
+    arrays = [result_to_arrays(r) for r in results]
+    landmarks_batch = np.stack([landmarks for landmarks, _ in arrays])
+    rotation_batch = np.stack([rotation for _, rotation in arrays])
+
+    baseline = np.array([baseline_frame(r) for r in results])
+    vectorized = np.concatenate([yaw_pitch_degrees(rotation_batch), eye_aspect_ratios(landmarks_batch)], axis=1)
+    max_diff = np.abs(baseline - vectorized).max(axis=0)
+
+    def kernels(item):
+        landmarks, rotation = item
+        yaw_pitch_degrees(rotation)
+        eye_aspect_ratios(landmarks)
+
+    def batch(_):
+        yaw_pitch_degrees(rotation_batch)
+        eye_aspect_ratios(landmarks_batch)
+
+    report = {
+        "source": args.clip or "synthetic",
+        "frames": len(results),
+        "per_frame_us": {
+            "baseline": per_frame_us(baseline_frame, results, args.repeat),
+            "arrays": per_frame_us(result_to_arrays, results, args.repeat),
+            "kernels": per_frame_us(kernels, arrays, args.repeat),
+            "batch_kernels": round(per_frame_us(batch, [None], args.repeat) / len(results), 3),
+        },
+        "max_abs_diff": {name: float(value) for name, value in zip(("yaw_deg", "pitch_deg", "left_ear", "right_ear"), max_diff)},
+    }
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,103 @@
+# input_backend_benchmark.py
+# Cost of one relative cursor move on each input backend in input_backends.py,
+# and the event rate each one sustains. Per backend it reports:
+#
+#   move:          per-call latency of move(+/-1, 0) (p50/p95/p99)
+#   max_rate_hz:   back-to-back moves per second, including the time the X
+#                  server needs to catch up (xtest is synced at the end)
+#   paced:         moves issued on a fixed schedule at each --rates value the
+#                  way the cursor thread issues them; achieved rate and the
+#                  share of ticks that went out more than one interval late
+#
+# Moves alternate +1/-1 pixel so the pointer ends where it started; no clicks
+# are sent. Backends that cannot be opened are reported as unavailable. Run it
+# under a virtual X server so it never touches a real desktop:
+#
+#   xvfb-run -a python bench/input_backend_benchmark.py [--backends pyautogui,xtest,uinput,null]
+#
+# uinput additionally needs write access to /dev/uinput.
+
+import argparse
+import json
+import os
+import platform
+import time
+
+import bench_support # Puts src/ on the import path
+
+def measure_calls(backend, calls):
+    from stage_stats import StageStats
+    stats = StageStats()
+    for i in range(calls):
+        t0 = time.perf_counter()
+        backend.move(1 if i % 2 == 0 else -1, 0)
+        stats.record("move", time.perf_counter() - t0)
+    return stats.summary()["move"]
+
+def measure_max_rate(backend, seconds):
+    sync = getattr(backend, "sync", None)
+    count = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            backend.move(1 if count % 2 == 0 else -1, 0)
+            count += 1
+    if sync:
+        sync()
+    return round(count / (time.perf_counter() - started), 1)
+
+def measure_paced(backend, rate_hz, seconds):
+    interval = 1.0 / rate_hz
+    count, late = 0, 0
+    started = time.perf_counter()
+    next_tick = started
+    while next_tick < started + seconds:
+        delay = next_tick - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        elif -delay > interval:
+            late += 1
+        backend.move(1 if count % 2 == 0 else -1, 0)
+        count += 1
+        next_tick += interval
+    sync = getattr(backend, "sync", None)
+    if sync:
+        sync()
+    elapsed = time.perf_counter() - started
+    return {"achieved_hz": round(count / elapsed, 1), "late_ticks_pct": round(100.0 * late / count, 2)}
+
+def run_backend(kind, args):
+    from input_backends import INPUT_BACKEND_CLASSES
+    try:
+        backend = INPUT_BACKEND_CLASSES[kind]()
+    except Exception as e:
+        return {"available": False, "error": f"{type(e).__name__}: {e}"}
+    try:
+        measure_calls(backend, min(args.calls, 200))  # Warm up
+        return {
+            "available": True,
+            "move": measure_calls(backend, args.calls),
+            "max_rate_hz": measure_max_rate(backend, args.seconds),
+            "paced": {str(rate): measure_paced(backend, rate, args.seconds) for rate in args.rates},
+        }
+    finally:
+        backend.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark cursor input backends.")
+    parser.add_argument("--backends", default="pyautogui,xtest,uinput,null",
+                        help="Comma-separated backends from input_backends.py")
+    parser.add_argument("--calls", type=int, default=5000, help="Moves timed one by one per backend")
+    parser.add_argument("--seconds", type=float, default=2.0, help="Length of each rate run")
+    parser.add_argument("--rates", default="120,250,500,1000", help="Comma-separated paced rates (Hz)")
+    args = parser.parse_args()
+    args.rates = [int(rate) for rate in args.rates.split(",")]
+
+    report = {
+        "display": os.environ.get("DISPLAY"),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "backends": {kind: run_backend(kind, args) for kind in args.backends.split(",")},
+    }
+    print(json.dumps(report, indent=2))
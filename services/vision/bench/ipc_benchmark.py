@@ -0,0 +1,128 @@
+# ipc_benchmark.py
+# Per-frame IPC cost of the process executor in pipeline_executors.py, before
+# and after the shared-memory frame ring. Both variants move N frames from the
+# capture process through a detector stand-in (which does no inference) to a consumer
+# and back, so the measured time is pure transport:
+#
+#   queue: frame pickled into a Queue, then (FaceLandmarkerResult, frame) pickled again
+#   ring:  frame copied into a SharedFrameRing slot, (slot, seq, captured_at) and the compact result queued
+#
+# Usage:
+#   python bench/ipc_benchmark.py [--frames 300] [--width 640 --height 480]
+
+import argparse
+import json
+import multiprocessing
+import threading
+import time
+
+import bench_support # Puts src/ on the import path
+
+def fake_detection_result():
+    from mediapipe.tasks.python.components.containers.landmark import NormalizedLandmark
+    from mediapipe.tasks.python.vision.face_landmarker import FaceLandmarkerResult
+    import numpy as np
+    rng = np.random.default_rng(0)
+    landmarks = [NormalizedLandmark(x=float(x), y=float(y), z=float(z)) for x, y, z in rng.random((478, 3))]
+    matrix = np.eye(4)
+    return FaceLandmarkerResult(face_landmarks=[landmarks], face_blendshapes=[], facial_transformation_matrixes=[matrix])
+
+def queue_detector(input_queue, output_queue):
+    detection_result = fake_detection_result()
+    while True:
+        item = input_queue.get()
+        if item is None:
+            output_queue.put(None)
+            return
+        frame_bgr, frame_counter = item
+        output_queue.put((detection_result, frame_bgr))
+
+def ring_detector(input_queue, output_queue, frame_ring_spec):
+    from face_geometry import result_to_arrays
+    from shared_frame_ring import SharedFrameRing
+    frame_ring = SharedFrameRing.attach(frame_ring_spec)
+    detection_result = fake_detection_result()
+    while True:
+        item = input_queue.get()
+        if item is None:
+            output_queue.put(None)
+            break
+        slot, frame_counter, captured_at = item
+        frame_ring.view(slot)  # what cvtColor would read from
+        frame_ring.is_current(slot, frame_counter)
+        output_queue.put((frame_counter, slot, captured_at) + result_to_arrays(detection_result))
+    frame_ring.close()
+
+def run_variant(variant, frames, shape, queue_size):
+    import numpy as np
+    from shared_frame_ring import SharedFrameRing
+    frame = np.random.default_rng(1).integers(0, 255, shape, dtype=np.uint8)
+    input_queue = multiprocessing.Queue(maxsize=queue_size)
+    output_queue = multiprocessing.Queue(maxsize=queue_size)
+    frame_ring = None
+    if variant == "queue":
+        worker = multiprocessing.Process(target=queue_detector, args=(input_queue, output_queue))
+    else:
+        frame_ring = SharedFrameRing.create(queue_size * 2, shape)
+        worker = multiprocessing.Process(target=ring_detector, args=(input_queue, output_queue, frame_ring.spec()))
+    worker.start()
+
+    # One warm-up round trip so process start-up is not measured.
+    def send(i):
+        if frame_ring is None:
+            input_queue.put((frame, i))
+        else:
+            input_queue.put(frame_ring.write(frame) + (time.perf_counter(),))
+    send(-1)
+    output_queue.get()
+
+    # Latency: one frame in flight at a time.
+    latencies = []
+    for i in range(frames):
+        start = time.perf_counter()
+        send(i)
+        item = output_queue.get()
+        if frame_ring is not None:
+            frame_ring.read(item[1], item[0])  # the display copies the frame back out
+        latencies.append(time.perf_counter() - start)
+
+    # Throughput: keep the queues full; a collector thread plays the downstream consumer.
+    def collect():
+        for _ in range(frames):
+            output_queue.get()
+    collector = threading.Thread(target=collect)
+    start = time.perf_counter()
+    collector.start()
+    for i in range(frames):
+        send(i)
+    collector.join()
+    elapsed = time.perf_counter() - start
+
+    input_queue.put(None)
+    output_queue.get()
+    worker.join(timeout=5)
+    if frame_ring is not None:
+        frame_ring.close()
+
+    ms = np.asarray(latencies) * 1000.0
+    return {
+        "round_trip_p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "round_trip_p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "pipelined_ms_per_frame": round(elapsed * 1000.0 / frames, 3),
+        "pipelined_fps": round(frames / elapsed, 1),
+    }
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    parser = argparse.ArgumentParser(description="Compare frame IPC cost: pickled Queue vs shared-memory ring.")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--queue-size", type=int, default=4)
+    args = parser.parse_args()
+
+    shape = (args.height, args.width, 3)
+    report = {"frame_shape": list(shape), "frames": args.frames}
+    for variant in ("queue", "ring"):
+        report[variant] = run_variant(variant, args.frames, shape, args.queue_size)
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,165 @@
+# motion_gate_eval.py
+# Skip ratio of motion_gate.MotionGate on a recorded clip and what reusing
+# results does to wink detection. The clip is run once through the landmarker
+# on every frame (the reference) and once per --thresholds value with the gate
+# in front of it, the way head_wink_combined.py uses it (held while the wink
+# detector does not see both eyes open). Both per-frame EAR
+# series then go through the same wink logic as the pipeline. Per threshold:
+#
+#   skip_ratio        share of frames whose result was reused
+#   detect_ms_saved   inference time saved per frame, on average
+#   ear_mae           mean |EAR - reference EAR| over frames with a face
+#   eye_state_agree   share of frames where "eye below its wink ratio" matches
+#   winks             wink events found, and how many match a reference wink
+#                     within --tolerance frames (recall) / are extra
+#
+# The reference wink count is reported too; a clip without winks only shows
+# that the gate adds no false ones. --still-seconds prepends a hold of the
+# clip's first frame with --noise grey levels of per-frame sensor noise, to
+# see the skip ratio for a user sitting still when the clip itself keeps moving.
+#
+# Usage:
+#   python bench/motion_gate_eval.py CLIP [--thresholds 1.0,1.5,2.5,4.0] [--still-seconds 5]
+
+import argparse
+import json
+import time
+
+from bench_support import DEFAULT_MODEL_PATH
+
+# Same values as head_wink_combined.py
+WINK_L_WINK_RATIO = 0.23
+WINK_R_WINK_RATIO = 0.24
+WINK_HOLD_SECONDS = 0.03
+WINK_COOLDOWN = 0.5
+
+def load_frames(clip):
+    from frame_sources import open_frame_source
+    source = open_frame_source(clip)
+    if not source.open():
+        raise SystemExit(f"Could not open {clip}")
+    frames = []
+    while True:
+        ret, frame = source.read()
+        if not ret:
+            break
+        frames.append(frame)
+    source.release()
+    return frames, source.fps
+
+def prepend_still(frames, fps, seconds, noise, seed=0):
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    base = frames[0].astype(np.float32)
+    still = [np.clip(base + rng.normal(0.0, noise, base.shape), 0, 255).astype(np.uint8)
+             for _ in range(int(seconds * fps))]
+    return still + frames
+
+def run_landmarker(frames, fps, model_path, gate):
+    """Per-frame (left EAR, right EAR) or None, and whether each result was reused."""
+    import cv2
+    import mediapipe as mp
+    from face_geometry import result_to_arrays, eye_aspect_ratios
+    from landmarker import FaceLandmarkerRunner
+    from pipeline_stages import eyes_closing
+    from wink_detector import WinkDetector
+    runner = FaceLandmarkerRunner(model_path, "video")
+    settings = wink_settings()
+    detector = WinkDetector() # Only for the gate's hold thresholds, as in the pipeline
+    ears, reused_flags, detect_seconds = [], [], 0.0
+    landmarks = None
+    for index, frame in enumerate(frames):
+        reused = gate is not None and gate.can_reuse(frame)
+        if not reused:
+            t0 = time.perf_counter()
+            image = mp.Image(image_format=mp.ImageFormat.SRGB, data=cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            landmarks, _ = result_to_arrays(runner.detect(image, index * 1000.0 / fps))
+            detect_seconds += time.perf_counter() - t0
+        ear = tuple(eye_aspect_ratios(landmarks).tolist()) if landmarks is not None else None
+        if gate is not None and not reused:
+            gate.update(frame, landmarks, hold=eyes_closing(landmarks, settings, detector.open_thresholds(settings)))
+        if ear is None:
+            detector.reset()
+        else:
+            detector.update(ear[0], ear[1], index / fps, settings)
+        ears.append(ear)
+        reused_flags.append(reused)
+    runner.close()
+    return ears, reused_flags, detect_seconds
+
+def wink_settings():
+    from runtime_settings import PipelineSettings
+    return PipelineSettings(left_wink_ratio=WINK_L_WINK_RATIO, right_wink_ratio=WINK_R_WINK_RATIO,
+                            wink_hold_seconds=WINK_HOLD_SECONDS, wink_cooldown=WINK_COOLDOWN)
+
+def detect_winks(ears, fps):
+    """The pipeline's wink logic (wink_detector.py) on frame times; returns [(frame, 'left'|'right')]."""
+    from wink_detector import WinkDetector
+    settings = wink_settings()
+    detector = WinkDetector()
+    winks = []
+    for index, ear in enumerate(ears):
+        if ear is None:
+            detector.reset()
+            continue
+        wink = detector.update(ear[0], ear[1], index / fps, settings)
+        if wink:
+            winks.append((index, wink.side))
+    return winks
+
+def compare(reference_ears, ears, reference_winks, winks, tolerance):
+    pairs = [(r, e) for r, e in zip(reference_ears, ears) if r is not None and e is not None]
+    errors = [abs(r[i] - e[i]) for r, e in pairs for i in (0, 1)]
+    ratios = (WINK_L_WINK_RATIO, WINK_R_WINK_RATIO)
+    agree = sum(all((r[i] < ratios[i]) == (e[i] < ratios[i]) for i in (0, 1)) for r, e in pairs)
+    unmatched = list(reference_winks)
+    matched = 0
+    for frame, side in winks:
+        hit = next((w for w in unmatched if w[1] == side and abs(w[0] - frame) <= tolerance), None)
+        if hit:
+            unmatched.remove(hit)
+            matched += 1
+    return {
+        "ear_mae": round(sum(errors) / len(errors), 5) if errors else 0.0,
+        "eye_state_agree": round(agree / len(pairs), 4) if pairs else 1.0,
+        "winks": {"found": len(winks), "matched": matched, "extra": len(winks) - matched,
+                  "missed": len(unmatched)},
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Evaluate the motion gate on a recorded clip.")
+    parser.add_argument("clip", help="Video file or directory of images")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--thresholds", default="1.0,1.5,2.5,4.0", help="Comma-separated MOTION_THRESHOLD values")
+    parser.add_argument("--max-reuse", type=int, default=None, help="Override MAX_REUSE")
+    parser.add_argument("--no-roi", action="store_true", help="Compare whole frames instead of the face box")
+    parser.add_argument("--tolerance", type=int, default=3, help="Frames a wink may shift and still match")
+    parser.add_argument("--still-seconds", type=float, default=0.0, help="Prepend a noisy hold of the first frame")
+    parser.add_argument("--noise", type=float, default=2.0, help="Sensor noise (grey levels) for --still-seconds")
+    args = parser.parse_args()
+
+    from motion_gate import MAX_REUSE, MotionGate
+    frames, fps = load_frames(args.clip)
+    if args.still_seconds:
+        frames = prepend_still(frames, fps, args.still_seconds, args.noise)
+    reference_ears, _, reference_detect = run_landmarker(frames, fps, args.model, None)
+    reference_winks = detect_winks(reference_ears, fps)
+    report = {
+        "clip": args.clip, "frames": len(frames), "fps": fps, "still_seconds": args.still_seconds,
+        "max_reuse": args.max_reuse if args.max_reuse is not None else MAX_REUSE,
+        "roi": not args.no_roi,
+        "reference": {"detect_ms": round(reference_detect * 1000.0 / len(frames), 3),
+                      "winks": len(reference_winks),
+                      "min_ear": [round(min(e[i] for e in reference_ears if e), 3) for i in (0, 1)]
+                                 if any(reference_ears) else None},
+        "thresholds": {},
+    }
+    for threshold in (float(t) for t in args.thresholds.split(",")):
+        gate = MotionGate(threshold=threshold, use_roi=not args.no_roi,
+                          max_reuse=args.max_reuse if args.max_reuse is not None else MAX_REUSE)
+        ears, reused, detect_seconds = run_landmarker(frames, fps, args.model, gate)
+        result = {"skip_ratio": round(sum(reused) / len(frames), 4),
+                  "detect_ms_saved": round((reference_detect - detect_seconds) * 1000.0 / len(frames), 3)}
+        result.update(compare(reference_ears, ears, reference_winks, detect_winks(ears, fps), args.tolerance))
+        report["thresholds"][str(threshold)] = result
+    print(json.dumps(report, indent=2))
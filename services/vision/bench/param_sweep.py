@@ -0,0 +1,388 @@
+# param_sweep.py
+# Tunes the wink detector's thresholds and the joystick parameters against a
+# corpus of labelled clips instead of by hand: CLOSE_SIGMAS, CLOSE_DROP,
+# OPEN_SIGMAS and OPEN_DROP in wink_detector.py, which place the learned
+# thresholds once an eye's baseline is ready, the wink ratios that stand in for
+# them during the first BASELINE_WARMUP_SECONDS (WINK_L_WINK_RATIO,
+# WINK_R_WINK_RATIO), wink_hold_seconds, and DEAD_ZONE_DEGREES and
+# MAX_JOYSTICK_TILT_ANGLE in head_wink_combined.py.
+#
+# Corpus: a directory of clips (.avi .mp4 .mov .mkv), each next to a sidecar
+# CLIP.winks.json; clips without one are skipped:
+#
+#   {"winks": [{"t": 3.2, "side": "left"}, ...],   t = seconds into the clip the eye closes
+#    "still": [[12.0, 18.5], ...]}                  optional spans where the cursor should not move
+#
+# 1. Landmarks. Every clip not yet in --cache goes through the FaceLandmarker
+#    in a process pool, one landmarker per worker, and is stored as a landmark
+#    trace (landmark_trace.py) keyed by the clip's path, size and mtime and the
+#    model. Later sweeps over other grids start from the cache. Clips are
+#    independent, so with at least as many clips as workers this step scales
+#    with --jobs; extract_s / clips_per_s in the report show it.
+# 2. Scoring, also one clip per task in the pool. wink_events() is
+#    WinkDetector with its per-eye states and EyeBaselines held as (eye, grid)
+#    arrays, so one pass over a clip's EARs steps every grid row at once; on
+#    frames where every row has both eyes open only the baselines move. The
+#    joystick grid is scored as one (grid, frames) array of cursor speeds over
+#    the filtered yaw/pitch.
+#
+# Each row learns its own baselines, since which frames count as open (and so
+# feed the baseline) depends on the row's thresholds. The ratios only decide
+# the first seconds of each clip; leave --left / --right at the settings'
+# defaults unless the corpus has winks in that window. --exact N replays the N
+# best wink rows through the pipeline's own pose and wink stages
+# (replay_trace) as a check on the vectorized pass; the two should agree.
+#
+# Wink rows (sorted by F1):
+#   precision, recall   detected winks matching a label of the same side whose
+#                       t is within --tolerance seconds of the detected closure
+#   delay_ms            median / p90 of wink time minus label t, over matches
+# Joystick rows, per (dead_zone_degrees, max_tilt_angle), over frames with a face:
+#   moving_share        share of frames the cursor moves
+#   still_moving_share  the same inside the sidecar's "still" spans
+#   wink_moving_share   the same within WINK_WINDOW_SECONDS of a labelled wink,
+#                       i.e. head drift while winking that pulls the cursor off target
+#   mean_speed          mean cursor speed as a fraction of full speed
+#
+# Usage:
+#   python bench/param_sweep.py CORPUS [--cache DIR] [--jobs N] [--close-sigmas 3,4,5]
+#                               [--close-drop 0.15,0.2,0.25] [--open-sigmas ...] [--open-drop ...]
+#                               [--left 0.23] [--right 0.24] [--hold 0.03] [--dead-zone 3,4,5,6,8]
+#                               [--tilt 10,15,20,30] [--exact 5] [--out report.json]
+
+import argparse
+import concurrent.futures
+import hashlib
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from bench_support import DEFAULT_MODEL_PATH
+
+CLIP_EXTENSIONS = (".avi", ".mp4", ".mov", ".mkv")
+SIDECAR_SUFFIX = ".winks.json"
+CLIP_GAP_MS = 10000          # Landmarker timestamp gap between clips in one worker
+WINK_WINDOW_SECONDS = 0.4    # A labelled wink's span for wink_moving_share
+
+# --- Corpus ---
+def find_clips(corpus):
+    """[(clip path, labels)] for every clip in corpus with a sidecar."""
+    clips = []
+    for name in sorted(os.listdir(corpus)):
+        path = os.path.join(corpus, name)
+        sidecar = os.path.splitext(path)[0] + SIDECAR_SUFFIX
+        if name.lower().endswith(CLIP_EXTENSIONS) and os.path.exists(sidecar):
+            with open(sidecar) as f:
+                labels = json.load(f)
+            clips.append((path, {"winks": [(float(w["t"]), w["side"]) for w in labels.get("winks", [])],
+                                 "still": [tuple(span) for span in labels.get("still", [])]}))
+    return clips
+
+def cache_path(cache_dir, clip, model_path):
+    stat, model = os.stat(clip), os.stat(model_path)
+    key = f"{os.path.abspath(clip)}|{stat.st_size}|{stat.st_mtime_ns}|{os.path.abspath(model_path)}|{model.st_size}"
+    stem = os.path.splitext(os.path.basename(clip))[0]
+    return os.path.join(cache_dir, f"{stem}-{hashlib.sha1(key.encode()).hexdigest()[:12]}.wktrace")
+
+# --- Workers ---
+_runner = None  # One FaceLandmarker per worker process, created by its first clip
+
+def _init_worker():
+    import cv2
+    cv2.setNumThreads(1) # Parallelism comes from the pool; keep each worker on its own core
+
+def extract_clip(clip, trace_path, model_path):
+    """Run the landmarker over clip and write its trace. Returns (clip, frames, seconds)."""
+    global _runner
+    import cv2
+    import mediapipe as mp
+    from face_geometry import result_to_matrix_arrays
+    from frame_sources import open_frame_source
+    from landmark_trace import TraceRecorder
+    from landmarker import FaceLandmarkerRunner
+    started = time.perf_counter()
+    if _runner is None:
+        _runner = FaceLandmarkerRunner(model_path, "video")
+    source = open_frame_source(clip)
+    if not source.open():
+        raise RuntimeError(f"Could not open {clip}")
+    # Video mode needs increasing timestamps across clips; a gap makes MediaPipe drop the previous face
+    offset_ms = _runner.last_timestamp_ms + CLIP_GAP_MS
+    partial = trace_path + ".partial"
+    if os.path.exists(partial):
+        os.remove(partial)
+    recorder = TraceRecorder(partial)
+    index = 0
+    while True:
+        ret, frame = source.read()
+        if not ret:
+            break
+        t = index / source.fps
+        image = mp.Image(image_format=mp.ImageFormat.SRGB, data=cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        landmarks, matrix = result_to_matrix_arrays(_runner.detect(image, offset_ms + t * 1000.0))
+        recorder.record(t, t, landmarks, matrix)
+        index += 1
+    source.release()
+    recorder.close()
+    os.replace(partial, trace_path) # Only complete traces ever appear in the cache
+    return clip, index, time.perf_counter() - started
+
+def parameter_grid(**axes):
+    """Dict of equal-length arrays, one entry per combination of the axis values."""
+    mesh = np.meshgrid(*[np.asarray(values, dtype=np.float64) for values in axes.values()], indexing="ij")
+    return {name: values.reshape(-1) for name, values in zip(axes, mesh)}
+
+def wink_events(t, ears, face, grid, cooldown):
+    """WinkDetector (wink_detector.py), its EyeBaselines included, stepped
+    frame by frame over every grid row at once. ears is (frames, 2) left/right.
+    Returns [(row, closed_at, wink time, side)]."""
+    from wink_detector import BASELINE_TIME_CONSTANT, BASELINE_WARMUP_SECONDS, MAX_SAMPLE_GAP, WINK_OPEN_MARGIN
+    open_, closing, fired, blink = 0, 1, 2, 3
+    close = np.stack((grid["left_wink_ratio"], grid["right_wink_ratio"]))  # (eye, row)
+    reopen = close + WINK_OPEN_MARGIN
+    close_sigmas, close_drop = grid["close_sigmas"], grid["close_drop"]
+    open_sigmas, open_drop = grid["open_sigmas"], grid["open_drop"]
+    hold = grid["wink_hold_seconds"]
+    state = np.zeros(close.shape, dtype=np.int8)
+    closed_at = np.zeros(close.shape)
+    last_wink = np.full(close.shape, -np.inf)
+    # EyeBaseline per row; both eyes are updated together, so one clock per row
+    mean, variance = np.full(close.shape, np.nan), np.zeros(close.shape)
+    seconds, last_at = np.zeros(hold.shape), np.full(hold.shape, np.nan)
+    events, active = [], False
+    for now, (left_ear, right_ear), face_found in zip(t.tolist(), ears.tolist(), face.tolist()):
+        if not face_found:
+            state[:], active = open_, False
+            continue
+        ear = np.array(((left_ear,), (right_ear,)))
+        below, above = ear < close, ear > reopen
+
+        learn = above[0] & above[1]
+        if learn.any():
+            dt = np.where(np.isnan(last_at), 0.0, np.minimum(np.maximum(now - last_at, 0.0), MAX_SAMPLE_GAP))
+            last_at[learn] = now
+            first = learn & np.isnan(mean[0])
+            mean[:, first] = ear
+            step = learn & ~first & (dt > 0.0)
+            if step.any():
+                seconds[step] += dt[step]
+                dt, elapsed = dt[step], seconds[step]
+                alpha = np.maximum(dt / (BASELINE_TIME_CONSTANT + dt), dt / elapsed)
+                delta = ear - mean[:, step]
+                mean[:, step] += alpha * delta
+                variance[:, step] = (1.0 - alpha) * (variance[:, step] + alpha * delta * delta)
+                ready = np.flatnonzero(step)[elapsed >= BASELINE_WARMUP_SECONDS]
+                if ready.size:
+                    ready_mean, std = mean[:, ready], np.sqrt(variance[:, ready])
+                    close[:, ready] = ready_mean - np.maximum(close_sigmas[ready] * std, close_drop[ready] * ready_mean)
+                    reopen[:, ready] = ready_mean - np.maximum(open_sigmas[ready] * std, open_drop[ready] * ready_mean)
+
+        if not active and not below.any():
+            continue # Every row has both eyes open and nothing starts closing
+        state[above] = open_
+        started = below & (state == open_)
+        state[started], closed_at[started] = closing, now
+        state[:, (state[0] == closing) & (state[1] == closing)] = blink
+        for eye, side in ((0, "left"), (1, "right")):
+            fires = ((state[eye] == closing) & (state[1 - eye] == open_)
+                     & (now - closed_at[eye] >= hold) & (now - last_wink[eye] > cooldown))
+            if fires.any():
+                state[eye, fires], last_wink[eye, fires] = fired, now
+                events += [(row, closed_at[eye, row], now, side) for row in np.flatnonzero(fires).tolist()]
+        active = bool(state.any())
+    return events
+
+def match_winks(detected, labels, tolerance):
+    """detected [(closed_at, wink time, side)] in time order -> (matched, delays)."""
+    unmatched = list(labels)
+    delays = []
+    for closed_at, at, side in detected:
+        hit = next((label for label in unmatched if label[1] == side and abs(label[0] - closed_at) <= tolerance), None)
+        if hit:
+            unmatched.remove(hit)
+            delays.append(at - hit[0])
+    return len(delays), delays
+
+def score_clip(trace_path, labels, wink_grid, joystick_grid, cooldown, tolerance, pose_filter):
+    """Score one clip's trace against both grids; returns per-grid-row counts."""
+    from landmark_trace import open_trace, replay_trace
+    from pipeline_stages import PoseStage
+    from pose_filter import PoseFilter
+    from runtime_settings import PipelineSettings
+    trace = open_trace(trace_path)
+    # Settings only matter to the wink half of the replay; its angles are the filtered pose
+    output, _ = replay_trace(trace, PipelineSettings(), pose=PoseStage(PoseFilter(pose_filter, predict=False)))
+    t = output["captured_at"]
+
+    face = output["face"]
+    ears = np.stack((output["left_ear"], output["right_ear"]), axis=1)
+    rows = wink_grid["left_wink_ratio"].size
+    per_row = [[] for _ in range(rows)]
+    for row, closed_at, at, side in wink_events(t, ears, face & ~np.isnan(ears[:, 0]), wink_grid, cooldown):
+        per_row[row].append((closed_at, at, side))
+    detected = np.array([len(events) for events in per_row], dtype=np.int64)
+    matched, delays = zip(*(match_winks(events, labels["winks"], tolerance) for events in per_row))
+
+    still = np.zeros(t.size, dtype=bool)
+    for begin, end in labels["still"]:
+        still |= (t >= begin) & (t <= end)
+    winking = np.zeros(t.size, dtype=bool)
+    for at, _ in labels["winks"]:
+        winking |= (t >= at) & (t <= at + WINK_WINDOW_SECONDS)
+    dead_zone, tilt = joystick_grid["dead_zone_degrees"][:, None], joystick_grid["max_tilt_angle"][:, None]
+    speed = np.maximum(np.clip((np.abs(output["yaw"])[None, :] - dead_zone) / tilt, 0.0, 1.0),
+                       np.clip((np.abs(output["pitch"])[None, :] - dead_zone) / tilt, 0.0, 1.0))
+    moving = speed > 0.0
+    return {
+        "frames": int(t.size), "labels": len(labels["winks"]),
+        "detected": detected, "matched": np.array(matched, dtype=np.int64), "delays": delays,
+        "face_frames": int(face.sum()), "still_frames": int((still & face).sum()),
+        "wink_frames": int((winking & face).sum()),
+        "moving": (moving & face).sum(axis=1), "still_moving": (moving & still & face).sum(axis=1),
+        "wink_moving": (moving & winking & face).sum(axis=1), "speed": (speed * face).sum(axis=1),
+    }
+
+def score_clip_exact(trace_path, labels, candidates, tolerance, pose_filter):
+    """(detected, matched, delays) per (settings, BaselineLimits) through the pipeline's own stages."""
+    from landmark_trace import open_trace, replay_trace
+    from pipeline_stages import PoseStage
+    from pose_filter import PoseFilter
+    from wink_detector import WinkDetector
+    trace = open_trace(trace_path)
+    t = np.asarray(trace["captured_at"])
+    results = []
+    for settings, limits in candidates:
+        _, winks = replay_trace(trace, settings, pose=PoseStage(PoseFilter(pose_filter, predict=False)),
+                                wink=WinkDetector(limits))
+        events = [(wink.closed_at, float(t[index]), wink.side) for index, wink in winks]
+        results.append((len(events),) + match_winks(events, labels["winks"], tolerance))
+    return results
+
+# --- Report ---
+def _ratio(numerator, denominator):
+    return round(numerator / denominator, 4) if denominator else None
+
+def _wink_summary(detected, matched, labels, delays):
+    precision, recall = _ratio(matched, detected), _ratio(matched, labels)
+    f1 = round(2 * precision * recall / (precision + recall), 4) if precision and recall else 0.0
+    return {"precision": precision, "recall": recall, "f1": f1,
+            "detected": int(detected), "matched": int(matched), "labels": int(labels),
+            "delay_ms": {"median": round(float(np.median(delays)) * 1000.0, 1),
+                         "p90": round(float(np.percentile(delays, 90)) * 1000.0, 1)} if delays else None}
+
+def parse_values(text):
+    """'0.17:0.29:0.02' (inclusive range) or '3,4,5' -> list of floats."""
+    if ":" in text:
+        start, stop, step = (float(part) for part in text.split(":"))
+        return [round(start + i * step, 6) for i in range(int(math.floor((stop - start) / step + 1e-9)) + 1)]
+    return [float(value) for value in text.split(",")]
+
+def run(args):
+    from pose_filter import pose_filter_from_env
+    from runtime_settings import PipelineSettings
+    from wink_detector import BaselineLimits
+    clips = find_clips(args.corpus)
+    if not clips:
+        raise SystemExit(f"No clips with a {SIDECAR_SUFFIX} sidecar in {args.corpus}")
+    cache_dir = args.cache or os.path.join(args.corpus, ".landmark_cache")
+    os.makedirs(cache_dir, exist_ok=True)
+    traces = {clip: cache_path(cache_dir, clip, args.model) for clip, _ in clips}
+    missing = [clip for clip, _ in clips if not os.path.exists(traces[clip])]
+    pose_filter = args.pose_filter or pose_filter_from_env()
+    wink_grid = parameter_grid(close_sigmas=args.close_sigmas, close_drop=args.close_drop, open_sigmas=args.open_sigmas,
+                               open_drop=args.open_drop, left_wink_ratio=args.left, right_wink_ratio=args.right,
+                               wink_hold_seconds=args.hold)
+    joystick_grid = parameter_grid(dead_zone_degrees=args.dead_zone, max_tilt_angle=args.tilt)
+
+    # spawn: MediaPipe's graph threads do not survive a fork
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs, mp_context=multiprocessing.get_context("spawn"),
+                                                initializer=_init_worker) as pool:
+        started = time.perf_counter()
+        extracted = list(pool.map(extract_clip, missing, [traces[clip] for clip in missing],
+                                  itertools.repeat(args.model)))
+        extract_s = time.perf_counter() - started
+
+        started = time.perf_counter()
+        scores = list(pool.map(score_clip, [traces[clip] for clip, _ in clips], [labels for _, labels in clips],
+                               itertools.repeat(wink_grid), itertools.repeat(joystick_grid),
+                               itertools.repeat(args.cooldown), itertools.repeat(args.tolerance),
+                               itertools.repeat(pose_filter)))
+        score_s = time.perf_counter() - started
+
+        total = {key: sum(score[key] for score in scores)
+                 for key in ("frames", "labels", "detected", "matched", "face_frames", "still_frames", "wink_frames",
+                             "moving", "still_moving", "wink_moving", "speed")}
+        wink_rows = []
+        for row in range(wink_grid["left_wink_ratio"].size):
+            delays = [delay for score in scores for delay in score["delays"][row]]
+            wink_rows.append({**{name: round(float(values[row]), 6) for name, values in wink_grid.items()},
+                              **_wink_summary(total["detected"][row], total["matched"][row], total["labels"], delays)})
+        wink_rows.sort(key=lambda r: (-r["f1"], r["delay_ms"]["median"] if r["delay_ms"] else math.inf))
+
+        if args.exact:
+            candidates = [(PipelineSettings(left_wink_ratio=r["left_wink_ratio"], right_wink_ratio=r["right_wink_ratio"],
+                                            wink_hold_seconds=r["wink_hold_seconds"], wink_cooldown=args.cooldown),
+                           BaselineLimits(r["close_sigmas"], r["close_drop"], r["open_sigmas"], r["open_drop"]))
+                          for r in wink_rows[:args.exact]]
+            exact = list(pool.map(score_clip_exact, [traces[clip] for clip, _ in clips], [labels for _, labels in clips],
+                                  itertools.repeat(candidates), itertools.repeat(args.tolerance),
+                                  itertools.repeat(pose_filter)))
+            for index, row in enumerate(wink_rows[:args.exact]):
+                row["exact"] = _wink_summary(sum(clip[index][0] for clip in exact), sum(clip[index][1] for clip in exact),
+                                             total["labels"], [delay for clip in exact for delay in clip[index][2]])
+
+    joystick_rows = [{**{name: round(float(values[row]), 6) for name, values in joystick_grid.items()},
+                      "moving_share": _ratio(int(total["moving"][row]), total["face_frames"]),
+                      "still_moving_share": _ratio(int(total["still_moving"][row]), total["still_frames"]),
+                      "wink_moving_share": _ratio(int(total["wink_moving"][row]), total["wink_frames"]),
+                      "mean_speed": _ratio(float(total["speed"][row]), total["face_frames"])}
+                     for row in range(joystick_grid["dead_zone_degrees"].size)]
+    extracted_frames = sum(frames for _, frames, _ in extracted)
+    return {
+        "corpus": args.corpus, "clips": len(clips), "frames": total["frames"], "labelled_winks": total["labels"],
+        "jobs": args.jobs, "pose_filter": pose_filter, "cooldown": args.cooldown, "tolerance": args.tolerance,
+        "extract": {"clips": len(extracted), "cached": len(clips) - len(extracted), "extract_s": round(extract_s, 3),
+                    "clips_per_s": round(len(extracted) / extract_s, 3) if extracted else None,
+                    "frames_per_s": round(extracted_frames / extract_s, 1) if extracted else None},
+        "score": {"grid_rows": len(wink_rows) + len(joystick_rows), "score_s": round(score_s, 3)},
+        "wink": wink_rows,
+        "joystick": joystick_rows,
+    }
+
+if __name__ == '__main__':
+    from pose_filter import POSE_FILTERS
+    from runtime_settings import PipelineSettings
+    defaults = PipelineSettings()
+    parser = argparse.ArgumentParser(description="Sweep wink and joystick parameters over a labelled clip corpus.")
+    parser.add_argument("corpus", help=f"Directory of clips with {SIDECAR_SUFFIX} sidecars")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--cache", help="Landmark trace cache (default CORPUS/.landmark_cache)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--close-sigmas", type=parse_values, default=parse_values("3,4,5"), help="CLOSE_SIGMAS values")
+    parser.add_argument("--close-drop", type=parse_values, default=parse_values("0.15,0.2,0.25"), help="CLOSE_DROP values")
+    parser.add_argument("--open-sigmas", type=parse_values, default=parse_values("1.5,2,2.5"), help="OPEN_SIGMAS values")
+    parser.add_argument("--open-drop", type=parse_values, default=parse_values("0.05,0.1,0.15"), help="OPEN_DROP values")
+    parser.add_argument("--left", type=parse_values, default=[defaults.left_wink_ratio],
+                        help="left_wink_ratio values (warm-up only)")
+    parser.add_argument("--right", type=parse_values, default=[defaults.right_wink_ratio],
+                        help="right_wink_ratio values (warm-up only)")
+    parser.add_argument("--hold", type=parse_values, default=[0.03], help="wink_hold_seconds values")
+    parser.add_argument("--dead-zone", type=parse_values, default=parse_values("3:8:1"), help="dead_zone_degrees values")
+    parser.add_argument("--tilt", type=parse_values, default=parse_values("10,15,20,25,30"), help="max_tilt_angle values")
+    parser.add_argument("--cooldown", type=float, default=0.5, help="wink_cooldown, as in head_wink_combined.py")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Seconds a closure may be from its label")
+    parser.add_argument("--pose-filter", choices=POSE_FILTERS, default=None)
+    parser.add_argument("--exact", type=int, default=0, help="Replay the N best wink rows through the pipeline's stages")
+    parser.add_argument("--out", help="Write the JSON report to this file as well as stdout")
+    args = parser.parse_args()
+
+    text = json.dumps(run(args), indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(text + "\n")
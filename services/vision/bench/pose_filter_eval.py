@@ -0,0 +1,174 @@
+# pose_filter_eval.py
+# Offline evaluation of the pose filters in pose_filter.py on a recorded or
+# synthetic yaw/pitch trace. Every filter sees each pose at its capture time
+# and its output is scored at the time it would be used, --latency-ms later,
+# so the "none" filter shows the full pipeline delay as lag.
+#
+# Metrics per filter and axis:
+#   rmse_deg        error against the reference at the time of use
+#   jitter_deg      RMS frame-to-frame wobble while the head is still (reference
+#                   slower than 5 deg/s): output minus its 5-frame centred mean
+#   lag_ms          delay that best aligns output with the reference (cross-correlation)
+#   zone_crossings  times the output crosses the dead-zone boundary; each one is
+#                   a cursor start/stop, so extra crossings show up as twitching
+#
+# The reference is the true pose for --synthetic traces, and a centred
+# (non-causal) smoothing of the raw trace otherwise.
+#
+# Usage:
+#   python bench/pose_filter_eval.py --synthetic [--seconds 60]
+#   python bench/pose_filter_eval.py CLIP_OR_TRACE.csv [--latency-ms 20]
+#   python bench/pose_filter_eval.py TRACE.wktrace
+#
+# A trace CSV has a header and columns t,yaw,pitch (seconds, degrees). A
+# .wktrace is a landmark trace recorded with WINKS_TRACE (landmark_trace.py).
+
+import argparse
+import csv
+import json
+import os
+
+import numpy as np
+
+from bench_support import DEFAULT_MODEL_PATH
+
+STILL_SPEED = 5.0   # deg/s
+DEAD_ZONE = 5.0     # deg, matches DEAD_ZONE_DEGREES in head_wink_combined.py
+
+def synthetic_trace(seconds, fps, seed):
+    """Head movement with holds near the dead zone, slow sweeps and quick turns, plus landmark noise."""
+    rng = np.random.default_rng(seed)
+    t = np.cumsum(rng.normal(1.0 / fps, 0.1 / fps, int(seconds * fps)))  # camera timing jitter
+    truth = np.zeros((t.size, 2))
+    for axis, phase in enumerate((0.0, 1.3)):
+        sweep = 12.0 * np.sin(2 * np.pi * 0.15 * t + phase)
+        turns = np.zeros_like(t)
+        for start in rng.uniform(0, seconds, int(seconds / 6)):
+            # A turn out and back: two logistic edges 1.2 s apart
+            turns += rng.choice([-15.0, 15.0]) * 0.5 * (np.tanh((t - start) / 0.12) - np.tanh((t - start - 1.2) / 0.12))
+        hold = (np.sin(2 * np.pi * 0.05 * t + phase) > 0.3)  # stretches of holding still just inside the dead zone
+        truth[:, axis] = np.where(hold, DEAD_ZONE - 0.8, sweep + turns)
+    # Ease in and out of the holds instead of jumping
+    kernel = np.hanning(9) / np.hanning(9).sum()
+    truth = np.stack([np.convolve(np.pad(truth[:, a], 4, mode='edge'), kernel, mode='valid') for a in range(2)], axis=1)
+    noise = rng.normal(0.0, [0.4, 0.6], truth.shape)
+    return t, truth + noise, truth
+
+def clip_trace(clip, model_path):
+    import cv2
+    import mediapipe as mp
+    from face_geometry import result_to_arrays, yaw_pitch_degrees
+    from frame_sources import open_frame_source
+    from landmarker import FaceLandmarkerRunner
+    source = open_frame_source(clip)
+    if not source.open():
+        raise SystemExit(f"Could not open {clip}")
+    runner = FaceLandmarkerRunner(model_path, "video")
+    times, poses, index = [], [], 0
+    while True:
+        ret, frame = source.read()
+        if not ret:
+            break
+        timestamp = index / source.fps
+        index += 1
+        detection_result = runner.detect(mp.Image(image_format=mp.ImageFormat.SRGB, data=cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)), timestamp * 1000)
+        _, rotation = result_to_arrays(detection_result)
+        if rotation is not None:
+            times.append(timestamp)
+            poses.append(yaw_pitch_degrees(rotation))
+    runner.close()
+    source.release()
+    return np.asarray(times), np.asarray(poses)
+
+def csv_trace(path):
+    with open(path, newline="") as f:
+        rows = [(float(r["t"]), float(r["yaw"]), float(r["pitch"])) for r in csv.DictReader(f)]
+    data = np.asarray(rows)
+    return data[:, 0], data[:, 1:]
+
+def landmark_trace_poses(path):
+    from face_geometry import yaw_pitch_degrees
+    from landmark_trace import open_trace
+    trace = open_trace(path)
+    found = trace[np.asarray(trace["has_matrix"])]
+    return np.asarray(found["captured_at"]), yaw_pitch_degrees(found["matrix"][:, :3, :3])
+
+def centred_smooth(values, width):
+    kernel = np.hanning(width + 2)[1:-1]
+    kernel /= kernel.sum()
+    pad = width // 2
+    return np.convolve(np.pad(values, pad, mode='edge'), kernel, mode='valid')
+
+def best_lag_ms(t_use, output, t_ref, reference):
+    """Shift (ms) of output that best matches reference, searched on a 1 ms grid."""
+    grid = np.arange(t_ref[0] + 0.3, t_ref[-1] - 0.3, 0.001)
+    ref = np.interp(grid, t_ref, reference)
+    ref = ref - ref.mean()
+    best, best_score = 0, -np.inf
+    for lag in range(-100, 201):
+        out = np.interp(grid + lag / 1000.0, t_use, output)
+        score = np.dot(ref, out - out.mean())
+        if score > best_score:
+            best, best_score = lag, score
+    return best
+
+def evaluate(kind, t, measured, reference_at, latency, predict):
+    from pose_filter import PoseFilter
+    pose_filter = PoseFilter(kind, predict=predict)
+    output = np.array([pose_filter.update(yaw, pitch, ti, now=ti + latency) for ti, (yaw, pitch) in zip(t, measured)])
+    t_use = t + latency
+    reference = reference_at(t_use)
+    speed = np.abs(np.gradient(reference, t_use, axis=0))
+    report = {}
+    for axis, name in enumerate(("yaw", "pitch")):
+        still = speed[:, axis] < STILL_SPEED
+        wobble = output[:, axis] - centred_smooth(output[:, axis], 5)
+        outside = np.abs(output[:, axis]) > DEAD_ZONE
+        report[name] = {
+            "rmse_deg": round(float(np.sqrt(np.mean((output[:, axis] - reference[:, axis]) ** 2))), 3),
+            "jitter_deg": round(float(np.sqrt(np.mean(wobble[still] ** 2))) if still.any() else 0.0, 3),
+            "lag_ms": best_lag_ms(t_use, output[:, axis], t_use, reference[:, axis]),
+            "zone_crossings": int(np.count_nonzero(outside[1:] != outside[:-1])),
+        }
+    return report
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Score pose filters on a yaw/pitch trace.")
+    parser.add_argument("source", nargs="?", help="Clip (video file / image directory), trace CSV or .wktrace")
+    parser.add_argument("--synthetic", action="store_true", help="Use a generated trace with known ground truth")
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Capture-to-use delay to compensate")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        t, measured, truth = synthetic_trace(args.seconds, args.fps, args.seed)
+        reference_at = lambda tq: np.stack([np.interp(tq, t, truth[:, a]) for a in range(2)], axis=1)
+        source = "synthetic"
+    elif args.source:
+        if args.source.lower().endswith(".csv"):
+            t, measured = csv_trace(args.source)
+        elif args.source.lower().endswith(".wktrace"):
+            t, measured = landmark_trace_poses(args.source)
+        else:
+            t, measured = clip_trace(args.source, args.model)
+        smoothed = np.stack([centred_smooth(measured[:, a], 7) for a in range(2)], axis=1)
+        reference_at = lambda tq: np.stack([np.interp(tq, t, smoothed[:, a]) for a in range(2)], axis=1)
+        source = os.path.basename(args.source)
+    else:
+        parser.error("give a clip or trace, or --synthetic")
+
+    latency = args.latency_ms / 1000.0
+    reference = reference_at(t)
+    outside = np.abs(reference) > DEAD_ZONE
+    report = {"source": source, "poses": int(t.size), "latency_ms": args.latency_ms,
+              "reference_zone_crossings": {name: int(np.count_nonzero(outside[1:, a] != outside[:-1, a]))
+                                           for a, name in enumerate(("yaw", "pitch"))},
+              "filters": {}}
+    for kind in ("none", "one_euro", "kalman"):
+        report["filters"][kind] = evaluate(kind, t, measured, reference_at, latency, predict=True)
+        if kind != "none":
+            report["filters"][kind + "_no_prediction"] = evaluate(kind, t, measured, reference_at, latency, predict=False)
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,157 @@
+# replay_benchmark.py
+# Headless replay benchmark: pushes a recorded clip (video file or image
+# directory) through the same pipeline and executor that head_wink_combined.py
+# runs live, with cursor output going to the recording input backend, and
+# prints a JSON report that can be diffed between releases. --executor picks
+# the thread or process layout (see pipeline_executors.py), so both can be
+# compared on the same machine. WINKS_MAX_CORES, WINKS_CV_THREADS and
+# WINKS_PRIORITY apply as they do live (see cpu_budget.py), and so does the
+# latency target when WINKS_LATENCY_TARGET_MS turns it on (quality_controller.py)
+# at --pace realtime. At --pace max every frame waits for the detector, so the
+# latency says nothing about the machine and the controller is off.
+#
+# Usage:
+#   python bench/replay_benchmark.py CLIP [--model PATH] [--pace realtime|max]
+#                                         [--executor thread|process] [--out report.json]
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import threading
+import time
+
+from bench_support import DEFAULT_MODEL_PATH, use_null_input_backend
+
+@contextlib.contextmanager
+def stdout_to_stderr():
+    """contextlib.redirect_stdout(sys.stderr), but for file descriptor 1 as
+    well, so a detector process started meanwhile writes to stderr too."""
+    sys.stdout.flush()
+    saved_fd = os.dup(1)
+    os.dup2(2, 1)
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            yield
+    finally:
+        os.dup2(saved_fd, 1)
+        os.close(saved_fd)
+
+class PausedSource:
+    """Holds back the first frame until resume(), so the clip starts only
+    once the detector is ready, whichever executor opened it."""
+
+    def __init__(self, source):
+        self.source = source
+        self._resumed = threading.Event()
+
+    def resume(self):
+        self._resumed.set()
+
+    def read(self):
+        self._resumed.wait()
+        return self.source.read()
+
+    def __getattr__(self, name):
+        return getattr(self.source, name)
+
+def run_replay(clip, model_path, pace, executor_name="thread"):
+    use_null_input_backend()
+    import cv2
+    import mediapipe as mp
+    import head_wink_combined as pipeline
+    from cpu_budget import cpu_budget_from_env
+    from detector_supervisor import DetectorSupervisor
+    from frame_sources import open_frame_source
+    from pipeline_executors import create_executor
+    from runtime_settings import SettingsStore
+    from stage_stats import StageStats
+
+    cpu_budget = cpu_budget_from_env().apply()
+    source = PausedSource(open_frame_source(clip, realtime=(pace == "realtime")))
+    stats = StageStats()
+    settings_store = SettingsStore(pipeline.STARTING_SETTINGS)
+    outputs = pipeline.open_outputs(settings_store)
+    replay_pipeline = pipeline.build_pipeline(model_path, settings_store, outputs)
+    if pace == "max":
+        replay_pipeline.quality = None
+    executor = create_executor(executor_name, replay_pipeline, source, pipeline.stop_event, stats,
+                               drop_stale_frames=(pace == "realtime"))
+    cursor_thread = threading.Thread(
+        target=outputs.cursor_actuator.run, args=(pipeline.stop_event, stats), daemon=True)
+
+    executor.start()
+    cursor_thread.start()
+    # Keep model load out of the measured window.
+    executor.ready_event.wait()
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    source.resume()
+    # A detector failure ends the run instead of being restarted into the measurement
+    supervisor = DetectorSupervisor(executor, max_restarts=0)
+    while executor.is_alive() and supervisor.check():
+        # Nobody displays results during a replay; drain them in case WINKS_PREVIEW is set.
+        try:
+            pipeline.result_queue.get(timeout=0.1)
+        except pipeline.queue.Empty:
+            pass
+    elapsed = time.perf_counter() - started
+    cpu_seconds = time.process_time() - cpu_started
+    pipeline.stop_event.set()
+    executor.join(timeout=2)
+    cursor_thread.join(timeout=2)
+
+    counters = stats.counter_values()
+    processed = counters.get("frames_processed", 0)
+    return {
+        "source": source.describe(),
+        "pace": pace,
+        "executor": executor_name,
+        "source_fps": source.fps,
+        "wall_time_s": round(elapsed, 3),
+        "process_cpu_s": round(cpu_seconds, 3),
+        "fps": round(processed / elapsed, 2) if elapsed > 0 else 0.0,
+        "frames_captured": counters.get("frames_captured", 0),
+        "frames_processed": processed,
+        "frames_dropped": counters.get("frames_dropped", 0),
+        "results_dropped": counters.get("results_dropped", 0),
+        "frames_with_face": counters.get("frames_with_face", 0),
+        "frames_idle_skipped": counters.get("frames_idle_skipped", 0),
+        "idle_cpu_saved_s": round(counters.get("idle_cpu_saved_us", 0) / 1e6, 3),
+        "frames_quality_skipped": counters.get("frames_quality_skipped", 0),
+        "quality_changes": counters.get("quality_changes", 0),
+        "quality_level": replay_pipeline.quality.level if replay_pipeline.quality else None,
+        "input_calls": dict(outputs.cursor_actuator.backend.calls),
+        "stages": stats.summary(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "opencv": cv2.__version__,
+            "mediapipe": mp.__version__,
+            "cpu_budget": cpu_budget.describe(),
+        },
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay a recorded clip through the Winks vision pipeline.")
+    parser.add_argument("clip", help="Video file or directory of images to replay")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH,
+                        help="Path to face_landmarker.task")
+    parser.add_argument("--pace", choices=("realtime", "max"), default="realtime",
+                        help="realtime: deliver frames at the clip FPS and drop stale ones like a camera; "
+                             "max: push frames as fast as the detector accepts them")
+    parser.add_argument("--executor", choices=("thread", "process"), default="thread",
+                        help="thread: detection on a worker thread; process: detection in its own process")
+    parser.add_argument("--out", help="Write the JSON report to this file as well as stdout")
+    args = parser.parse_args()
+
+    # Pipeline progress messages go to stderr so stdout stays valid JSON.
+    with stdout_to_stderr():
+        report = run_replay(args.clip, os.path.abspath(args.model), args.pace, args.executor)
+    text = json.dumps(report, indent=2, sort_keys=True)
+    print(text)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(text + "\n")
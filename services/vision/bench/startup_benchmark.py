@@ -0,0 +1,77 @@
+# startup_benchmark.py
+# Cold-start timing of head_wink_combined.py, run as Electron runs it: a fresh
+# interpreter per run, with the cursor going to the recording input backend.
+# Each run is timed from spawning the process to the "first_cursor_move"
+# event, and the "ready" event breaks that time down:
+#
+#   interpreter_s       spawn -> first line of head_wink_combined.py
+#   camera_open         source opened               (from that first line)
+#   first_frame         first frame read
+#   mediapipe_imported  mediapipe loaded on the detector thread
+#   model_loaded        FaceLandmarker created
+#   first_detection     first frame through the pipeline ("ready")
+#   first_cursor_move   the cursor thread moved the cursor
+#
+# Without a clip the default camera is used. With one (WINKS_FRAME_SOURCE),
+# the clip has to turn the head past the dead zone, or no move ever happens.
+#
+# Usage:
+#   python bench/startup_benchmark.py [--clip CLIP] [--runs 5] [--timeout 30]
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from bench_support import DEFAULT_MODEL_PATH, SRC_DIR
+
+MARKS = ("camera_open", "first_frame", "mediapipe_imported", "model_loaded", "first_detection", "first_cursor_move")
+
+def run_once(model_path, clip, timeout):
+    env = dict(os.environ, WINKS_INPUT_BACKEND="null", WINKS_PREVIEW="off")
+    if clip:
+        env["WINKS_FRAME_SOURCE"] = clip
+    spawned_at = time.perf_counter() # perf_counter is system-wide, so it compares with the child's stamps
+    process = subprocess.Popen([sys.executable, os.path.join(SRC_DIR, "head_wink_combined.py"), model_path],
+                               stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                               text=True, env=env)
+    result = {}
+    deadline = spawned_at + timeout
+    try:
+        for line in process.stdout:
+            if time.perf_counter() > deadline:
+                break
+            if not line.startswith("{"):
+                continue
+            event = json.loads(line)
+            if event.get("type") in ("ready", "first_cursor_move"):
+                result = {"interpreter_s": round(event["started_at"] - spawned_at, 3), **event["startup_s"]}
+                if event["type"] == "first_cursor_move":
+                    break
+    finally:
+        try:
+            process.stdin.write(json.dumps({"type": "stop"}) + "\n")
+            process.stdin.flush()
+            process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+    if "interpreter_s" in result:
+        result["total_s"] = round(result["interpreter_s"] + result.get("first_cursor_move", float("nan")), 3)
+    return result
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure time from launch to the first cursor move.")
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH)
+    parser.add_argument("--clip", help="Replay this video file or image directory instead of the camera")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds to wait for the first move per run")
+    args = parser.parse_args()
+
+    runs = [run_once(os.path.abspath(args.model), args.clip, args.timeout) for _ in range(args.runs)]
+    keys = ("interpreter_s",) + MARKS + ("total_s",)
+    median = {key: round(statistics.median(r[key] for r in runs), 3)
+              for key in keys if runs and all(key in r for r in runs)}
+    print(json.dumps({"clip": args.clip or "camera:0", "runs": runs, "median_s": median}, indent=2))
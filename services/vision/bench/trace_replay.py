@@ -0,0 +1,87 @@
+# trace_replay.py
+# Replays a landmark trace (landmark_trace.py) through the pose mapping and
+# wink logic, with no camera and no MediaPipe, and prints a JSON report that
+# can be diffed after a logic change:
+#
+#   frames, trace_s     recorded frames and the capture time they span
+#   replay_ms, speedup  median time of one replay, and trace_s / that time
+#   winks               [frame, side, hold_ms] for every wink found
+#   cursor              frames that moved the cursor and the summed dx, dy
+#   pose                mean and max |yaw| / |pitch| after filtering
+#
+# Record a trace live with WINKS_TRACE=path.wktrace, or from a clip with
+#   WINKS_TRACE=clip.wktrace python bench/replay_benchmark.py CLIP
+#
+# Usage:
+#   python bench/trace_replay.py TRACE [--repeat 20] [--pose-filter one_euro]
+#                                      [--set wink_hold_seconds=0.08 ...] [--out report.json]
+
+import argparse
+import dataclasses
+import json
+import statistics
+import time
+
+import numpy as np
+
+import bench_support # Puts src/ on the import path
+
+def parse_setting(text):
+    from runtime_settings import PipelineSettings
+    name, _, value = text.partition("=")
+    fields = {field.name: field.type for field in dataclasses.fields(PipelineSettings)}
+    if name not in fields:
+        raise argparse.ArgumentTypeError(f"unknown setting '{name}'")
+    kind = {"float": float, "int": int, "bool": lambda v: v.lower() in ("1", "true", "yes")}[fields[name]]
+    return name, kind(value)
+
+def run(trace_path, settings, pose_filter, repeat):
+    from landmark_trace import open_trace, replay_trace
+    from pipeline_stages import PoseStage
+    from pose_filter import PoseFilter
+    trace = open_trace(trace_path)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output, winks = replay_trace(trace, settings, pose=PoseStage(PoseFilter(pose_filter)))
+        timings.append(time.perf_counter() - started)
+    replay_s = statistics.median(timings)
+    trace_s = float(trace["captured_at"][-1] - trace["captured_at"][0]) if len(trace) > 1 else 0.0
+    face = output["face"]
+    moving = (output["dx"] != 0.0) | (output["dy"] != 0.0)
+    return {
+        "trace": trace_path,
+        "frames": len(trace),
+        "frames_with_face": int(face.sum()),
+        "trace_s": round(trace_s, 3),
+        "replay_ms": round(replay_s * 1000.0, 3),
+        "speedup": round(trace_s / replay_s) if replay_s > 0 else None,
+        "pose_filter": pose_filter,
+        "settings": {key: value for key, value in dataclasses.asdict(settings).items() if key not in ("version", "updated_at")},
+        "winks": [[index, wink.side, round((float(trace["captured_at"][index]) - wink.closed_at) * 1000.0, 1)]
+                  for index, wink in winks],
+        "cursor": {"frames_moving": int(moving.sum()),
+                   "sum_dx": round(float(output["dx"].sum()), 2), "sum_dy": round(float(output["dy"].sum()), 2)},
+        "pose": {axis: {"mean_abs_deg": round(float(np.abs(output[axis][face]).mean()), 3) if face.any() else 0.0,
+                        "max_abs_deg": round(float(np.abs(output[axis][face]).max()), 3) if face.any() else 0.0}
+                 for axis in ("yaw", "pitch")},
+    }
+
+if __name__ == '__main__':
+    from pose_filter import POSE_FILTERS, pose_filter_from_env
+    from runtime_settings import PipelineSettings
+    parser = argparse.ArgumentParser(description="Replay a landmark trace through the pose and wink logic.")
+    parser.add_argument("trace", help="A .wktrace file recorded with WINKS_TRACE")
+    parser.add_argument("--repeat", type=int, default=20, help="Replays to time (the median is reported)")
+    parser.add_argument("--pose-filter", choices=POSE_FILTERS, default=pose_filter_from_env())
+    parser.add_argument("--set", dest="settings", type=parse_setting, action="append", default=[],
+                        metavar="FIELD=VALUE", help="Override a PipelineSettings field, e.g. wink_hold_seconds=0.08")
+    parser.add_argument("--out", help="Write the JSON report to this file as well as stdout")
+    args = parser.parse_args()
+
+    report = run(args.trace, PipelineSettings(**dict(args.settings)), args.pose_filter, max(1, args.repeat))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(text + "\n")
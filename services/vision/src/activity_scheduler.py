@@ -0,0 +1,80 @@
+# activity_scheduler.py
+# Idle mode: run the landmarker less often while nobody is using the cursor.
+#
+#   active   - every frame is processed
+#   no_face  - no face for idle_after_no_face seconds; probe at NO_FACE_PROBE_HZ
+#   still    - a face, but the head has stayed inside the dead zone without
+#              moving more than STILL_MOTION_DEGREES and no eye has closed for
+#              idle_after_still seconds (e.g. reading); probe at STILL_PROBE_HZ
+#
+# Frames between probes are dropped before inference. As soon as a probe sees
+# a face again, a pose outside the dead zone, head movement, or an eye below
+# its wink ratio, the scheduler is back to active and the very next frame is
+# processed, so a wink that starts during a probe is confirmed at full rate.
+#
+# The idle periods come from PipelineSettings (idle_after_no_face,
+# idle_after_still; 0 never idles) and can be changed from Electron. Idle mode
+# can be turned off entirely with WINKS_IDLE_MODE=0.
+
+import os
+
+NO_FACE_PROBE_HZ = 2.0
+STILL_PROBE_HZ = 5.0
+STILL_MOTION_DEGREES = 1.5  # Pose change (either axis) that counts as moving
+
+def idle_mode_enabled_from_env():
+    return os.environ.get("WINKS_IDLE_MODE", "1").strip().lower() not in ("0", "false", "off", "no")
+
+class ActivityScheduler:
+    """Decides per frame whether to run inference. Call should_process() before
+    detection and observe() with what a processed frame found."""
+
+    def __init__(self, no_face_probe_hz=NO_FACE_PROBE_HZ, still_probe_hz=STILL_PROBE_HZ,
+                 motion_degrees=STILL_MOTION_DEGREES):
+        self.probe_intervals = {"no_face": 1.0 / no_face_probe_hz, "still": 1.0 / still_probe_hz}
+        self.motion_degrees = motion_degrees
+        self.state = "active"
+        self._last_face_at = None
+        self._last_motion_at = None
+        self._anchor_pose = None
+        self._next_probe_at = 0.0
+
+    def should_process(self, captured_at):
+        return self.state == "active" or captured_at >= self._next_probe_at
+
+    def observe(self, captured_at, settings, pose=None, eye_closing=False):
+        """Update the state from a processed frame. pose is (yaw, pitch) in degrees,
+        or None without a face. Returns the new state if it changed, else None."""
+        if self._last_face_at is None:
+            self._last_face_at = self._last_motion_at = captured_at
+        if pose is not None:
+            self._last_face_at = captured_at
+            yaw, pitch = pose
+            outside_dead_zone = abs(yaw) > settings.dead_zone_degrees or abs(pitch) > settings.dead_zone_degrees
+            moved = (self._anchor_pose is None or abs(yaw - self._anchor_pose[0]) > self.motion_degrees
+                     or abs(pitch - self._anchor_pose[1]) > self.motion_degrees)
+            if moved:
+                self._anchor_pose = (yaw, pitch)
+            if outside_dead_zone or moved or eye_closing:
+                self._last_motion_at = captured_at
+        else:
+            self._anchor_pose = None
+
+        if settings.idle_after_no_face and captured_at - self._last_face_at >= settings.idle_after_no_face:
+            state = "no_face"
+        elif pose is None:
+            state = "active"  # Face only just lost; keep looking at full rate for now
+        elif settings.idle_after_still and captured_at - self._last_motion_at >= settings.idle_after_still:
+            state = "still"
+        else:
+            state = "active"
+        if state != "active":
+            interval = self.probe_intervals[state]
+            if state == self.state and captured_at - self._next_probe_at < interval:
+                self._next_probe_at += interval  # Keep the probe rate even though frames arrive late
+            else:
+                self._next_probe_at = captured_at + interval
+        if state == self.state:
+            return None
+        self.state = state
+        return state
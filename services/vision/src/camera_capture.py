@@ -0,0 +1,240 @@
+# camera_capture.py
+# Camera mode negotiation for CameraSource.
+#
+# Left alone, drivers deliver whatever mode they default to (often 720p or
+# larger, far more than the landmarker needs) and queue several frames, so the
+# frame we read can already be 100 ms old. On open, CameraSource now:
+#
+#   1. opens the device with the platform's native API (DirectShow on Windows,
+#      V4L2 on Linux, AVFoundation on macOS)
+#   2. picks a mode with choose_camera_mode(): the smallest resolution that is
+#      at least the target, at the highest frame rate up to MAX_CAMERA_FPS,
+#      preferring uncompressed YUYV over MJPG when both qualify (no decode).
+#      On Linux the device's modes are listed with V4L2 ioctls; elsewhere OpenCV
+#      cannot list them, so the target is requested directly (MJPG first)
+#   3. sets CAP_PROP_BUFFERSIZE to 1 so at most one frame waits in the driver
+#   4. reads with grab()/retrieve(): a grab that returns within
+#      STALE_GRAB_SECONDS handed back a frame that was already queued, so it is
+#      dropped without decoding and the next one grabbed instead (at most
+#      MAX_STALE_GRABS times), for drivers that ignore the buffer size
+#
+# The target is WINKS_CAMERA_MODE ("640x480@30", optionally ":MJPG" or ":YUYV"
+# to force a format; "default" leaves the driver's mode alone).
+#
+# Probe a camera with:
+#   python camera_capture.py [--camera 0] [--seconds 3]
+# which lists its modes, the one that would be chosen, what the driver
+# actually delivers once it is applied, and the measured frame rate.
+
+import dataclasses
+import os
+import sys
+import time
+import cv2
+
+DEFAULT_CAMERA_MODE = "640x480@30"
+MAX_CAMERA_FPS = 60.0
+FOURCC_PREFERENCE = ("YUYV", "MJPG")  # Listed modes: least decode work first
+REQUEST_FOURCCS = ("MJPG", "YUYV")    # Unlisted (non-V4L2): MJPG is the format most cameras offer at speed
+STALE_GRAB_SECONDS = 0.002
+MAX_STALE_GRABS = 4
+
+@dataclasses.dataclass(frozen=True)
+class CameraMode:
+    width: int
+    height: int
+    fps: float
+    fourcc: str = ""
+
+    def describe(self):
+        return f"{self.width}x{self.height}@{self.fps:g}" + (f":{self.fourcc}" if self.fourcc else "")
+
+def parse_camera_mode(text):
+    """'640x480@30' or '640x480@30:MJPG' -> CameraMode; raises ValueError."""
+    text, _, fourcc = text.strip().partition(":")
+    size, _, fps = text.partition("@")
+    width, _, height = size.lower().partition("x")
+    mode = CameraMode(int(width), int(height), float(fps or 30), fourcc.strip().upper())
+    if mode.width <= 0 or mode.height <= 0 or mode.fps <= 0 or len(mode.fourcc) not in (0, 4):
+        raise ValueError(f"invalid camera mode '{text}'")
+    return mode
+
+def camera_mode_from_env():
+    """The requested mode, or None for 'default' (do not touch the driver)."""
+    text = os.environ.get("WINKS_CAMERA_MODE", DEFAULT_CAMERA_MODE).strip()
+    if text.lower() == "default":
+        return None
+    try:
+        return parse_camera_mode(text)
+    except ValueError:
+        print(f"WARNING: Invalid WINKS_CAMERA_MODE '{text}', using '{DEFAULT_CAMERA_MODE}'.")
+        return parse_camera_mode(DEFAULT_CAMERA_MODE)
+
+def camera_api_preference():
+    if os.name == 'nt': # Windows
+        return cv2.CAP_DSHOW
+    if sys.platform.startswith("linux"):
+        return cv2.CAP_V4L2
+    if sys.platform == "darwin":
+        return cv2.CAP_AVFOUNDATION
+    return cv2.CAP_ANY
+
+def choose_camera_mode(modes, target):
+    """Lowest-latency listed mode that meets target's size and frame rate, or
+    the closest one if none does. Returns None for an empty list."""
+    if not modes:
+        return None
+    if target.fourcc:
+        modes = [m for m in modes if m.fourcc == target.fourcc] or modes
+
+    def fourcc_rank(mode):
+        return FOURCC_PREFERENCE.index(mode.fourcc) if mode.fourcc in FOURCC_PREFERENCE else len(FOURCC_PREFERENCE)
+
+    capped = [m for m in modes if m.fps <= MAX_CAMERA_FPS] or modes
+    meeting = [m for m in capped if m.width >= target.width and m.height >= target.height and m.fps >= target.fps]
+    if meeting:
+        return min(meeting, key=lambda m: (m.width * m.height, -m.fps, fourcc_rank(m)))
+    target_area = target.width * target.height
+    return min(capped, key=lambda m: (-min(m.fps, target.fps), abs(m.width * m.height - target_area), fourcc_rank(m)))
+
+# --- V4L2 mode listing (Linux) ---
+# From linux/videodev2.h
+_VIDIOC_ENUM_FMT = 0xC0405602            # _IOWR('V', 2, struct v4l2_fmtdesc), 64 bytes
+_VIDIOC_ENUM_FRAMESIZES = 0xC02C564A     # _IOWR('V', 74, struct v4l2_frmsizeenum), 44 bytes
+_VIDIOC_ENUM_FRAMEINTERVALS = 0xC034564B # _IOWR('V', 75, struct v4l2_frmivalenum), 52 bytes
+_V4L2_BUF_TYPE_VIDEO_CAPTURE = 1
+_V4L2_DISCRETE = 1
+
+def _v4l2_enumerate(fd, request, fmt, fields, size):
+    import fcntl
+    import struct
+    index = 0
+    while True:
+        buffer = bytearray(size)
+        struct.pack_into(fmt, buffer, 0, index, *fields)
+        try:
+            fcntl.ioctl(fd, request, buffer)
+        except OSError:
+            return
+        yield buffer
+        index += 1
+
+def list_v4l2_modes(camera_index):
+    """Every discrete (format, size, frame rate) of /dev/video<camera_index>,
+    or [] when the device cannot be queried."""
+    import struct
+    modes = []
+    try:
+        fd = os.open(f"/dev/video{camera_index}", os.O_RDWR | os.O_NONBLOCK)
+    except OSError:
+        return modes
+    try:
+        for desc in _v4l2_enumerate(fd, _VIDIOC_ENUM_FMT, "II", (_V4L2_BUF_TYPE_VIDEO_CAPTURE,), 64):
+            pixel_format = struct.unpack_from("I", desc, 44)[0]
+            fourcc = pixel_format.to_bytes(4, "little").decode("ascii", "replace")
+            for frame_size in _v4l2_enumerate(fd, _VIDIOC_ENUM_FRAMESIZES, "II", (pixel_format,), 44):
+                size_type, width, height = struct.unpack_from("III", frame_size, 8)
+                if size_type != _V4L2_DISCRETE:
+                    continue
+                for interval in _v4l2_enumerate(fd, _VIDIOC_ENUM_FRAMEINTERVALS, "IIII",
+                                                (pixel_format, width, height), 52):
+                    interval_type, numerator, denominator = struct.unpack_from("III", interval, 16)
+                    if interval_type == _V4L2_DISCRETE and numerator:
+                        modes.append(CameraMode(width, height, round(denominator / numerator, 2), fourcc))
+    finally:
+        os.close(fd)
+    return modes
+
+def list_camera_modes(camera_index):
+    return list_v4l2_modes(camera_index) if sys.platform.startswith("linux") else []
+
+# --- Applying a mode ---
+def read_camera_mode(cap):
+    code = int(cap.get(cv2.CAP_PROP_FOURCC))
+    fourcc = code.to_bytes(4, "little").decode("ascii", "replace").strip("\x00") if code > 0 else ""
+    return CameraMode(int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                      round(cap.get(cv2.CAP_PROP_FPS), 2), fourcc)
+
+def apply_camera_mode(cap, mode):
+    # The format has to be set before the size for the V4L2 and DirectShow backends to honour both
+    if mode.fourcc:
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*mode.fourcc))
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, mode.width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, mode.height)
+    cap.set(cv2.CAP_PROP_FPS, mode.fps)
+
+def configure_camera(cap, camera_index, target):
+    """Apply the best mode for target (None: leave the mode alone) and a one-frame
+    driver buffer. Returns (requested mode or None, mode the driver reports)."""
+    requested = None
+    if target is not None:
+        requested = choose_camera_mode(list_camera_modes(camera_index), target)
+        if requested is None:
+            requested = dataclasses.replace(target, fourcc=target.fourcc or REQUEST_FOURCCS[0])
+        apply_camera_mode(cap, requested)
+        if requested.fourcc and read_camera_mode(cap).fourcc != requested.fourcc and not target.fourcc:
+            # The driver refused the format; let it use its own rather than keep fighting it
+            apply_camera_mode(cap, dataclasses.replace(requested, fourcc=""))
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return requested, read_camera_mode(cap)
+
+def grab_freshest(cap):
+    """grab() until a frame that was not already queued arrives. Returns
+    (ok, stale frames dropped)."""
+    dropped = 0
+    started = time.perf_counter()
+    ok = cap.grab()
+    while ok and dropped < MAX_STALE_GRABS and time.perf_counter() - started < STALE_GRAB_SECONDS:
+        dropped += 1
+        started = time.perf_counter()
+        ok = cap.grab()
+    return ok, dropped
+
+# --- Probe ---
+def probe_camera(camera_index, target, seconds):
+    cap = cv2.VideoCapture(camera_index, camera_api_preference())
+    if not cap.isOpened():
+        return {"camera": camera_index, "opened": False}
+    report = {"camera": camera_index, "opened": True, "backend": cap.getBackendName(),
+              "driver_default": read_camera_mode(cap).describe()}
+    modes = list_camera_modes(camera_index)
+    report["modes"] = [m.describe() for m in modes] if modes else "not listed on this platform"
+    requested, actual = configure_camera(cap, camera_index, target)
+    report["requested"] = requested.describe() if requested else None
+    report["actual"] = actual.describe()
+    report["buffer_size"] = cap.get(cv2.CAP_PROP_BUFFERSIZE)
+
+    frames, stale, grab_seconds, retrieve_seconds = 0, 0, [], []
+    deadline = time.perf_counter() + seconds
+    started = time.perf_counter()
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        ok, dropped = grab_freshest(cap)
+        t1 = time.perf_counter()
+        if not ok or not cap.retrieve()[0]:
+            break
+        grab_seconds.append(t1 - t0)
+        retrieve_seconds.append(time.perf_counter() - t1)
+        stale += dropped
+        frames += 1
+    cap.release()
+    elapsed = time.perf_counter() - started
+    report["measured"] = {
+        "frames": frames,
+        "fps": round(frames / elapsed, 2) if elapsed > 0 else 0.0,
+        "stale_frames_dropped": stale,
+        "mean_grab_ms": round(1000.0 * sum(grab_seconds) / len(grab_seconds), 3) if grab_seconds else None,
+        "mean_retrieve_ms": round(1000.0 * sum(retrieve_seconds) / len(retrieve_seconds), 3) if retrieve_seconds else None,
+    }
+    return report
+
+if __name__ == '__main__':
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description="List a camera's modes and measure the one Winks would use.")
+    parser.add_argument("--camera", type=int, default=0)
+    parser.add_argument("--mode", default=None, help="Target mode, e.g. 640x480@30 (default: WINKS_CAMERA_MODE)")
+    parser.add_argument("--seconds", type=float, default=3.0, help="How long to measure the delivered frame rate")
+    args = parser.parse_args()
+    target = parse_camera_mode(args.mode) if args.mode else camera_mode_from_env()
+    print(json.dumps(probe_camera(args.camera, target, args.seconds), indent=2))
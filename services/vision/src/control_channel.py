@@ -0,0 +1,199 @@
+# control_channel.py
+# Framed, two-way channel between Electron and the vision service.
+#
+# stdin/stdout stay as they are (newline JSON commands in, log text and JSON
+# events out), but they carry no acknowledgements and everything on stdout
+# shares one pipe with print() logging. ControlChannel listens on 127.0.0.1 at
+# a free port and announces it with a {"type": "control_channel", "port": ...}
+# event; Electron connects once and from then on uses the socket. A client
+# first sends the launch's session token (session_token.py); one that does not
+# is closed before any frame is handled or sent, and the next one is accepted.
+#
+# Every message is HEADER (kind, payload length) followed by the payload:
+#
+#   KIND_COMMAND  Electron -> Python  JSON {"id": 7, "type": "update_calibration", ...}
+#   KIND_ACK      Python -> Electron  JSON {"id": 7, "ok": true} or {"id": 7, "ok": false, "error": "..."}
+#   KIND_EVENT    Python -> Electron  JSON event, the same objects emit_event() writes
+#                                     (latency_stats, settings_applied, idle_state, wink, ...)
+#   KIND_POSE     Python -> Electron  POSE: captured_at, yaw, pitch, detector fps, face found
+#
+# While a client is connected, emit_event() goes to the channel instead of
+# stdout. Nothing a producer calls ever blocks on the socket. Events join a
+# bounded queue (the oldest is dropped when it is full), and pose samples
+# are coalesced: publish_pose() only replaces the latest sample. A writer
+# thread sends the queued events and then whatever sample is newest.
+
+import collections
+import json
+import socket
+import struct
+import threading
+import telemetry
+from session_token import authenticate
+
+HEADER = struct.Struct("<BI")    # kind, payload bytes
+POSE = struct.Struct("<dfff?")   # captured_at (perf_counter), yaw, pitch, fps, face found
+KIND_COMMAND = 1
+KIND_ACK = 2
+KIND_EVENT = 3
+KIND_POSE = 4
+MAX_PAYLOAD_BYTES = 1 << 20
+EVENT_QUEUE_SIZE = 256
+FPS_SMOOTHING = 0.1
+
+def encode_message(kind, payload):
+    if not isinstance(payload, (bytes, bytearray)):
+        payload = json.dumps(payload).encode()
+    return HEADER.pack(kind, len(payload)) + payload
+
+def decode_pose(payload):
+    captured_at, yaw, pitch, fps, face = POSE.unpack(payload)
+    return {"captured_at": captured_at, "yaw": yaw, "pitch": pitch, "fps": fps, "face": face}
+
+def read_message(sock):
+    """Next (kind, payload) from a blocking socket; None once it is closed.
+    JSON payloads are decoded, POSE payloads unpacked. Raises ValueError on
+    a malformed message."""
+    header = _recv_exactly(sock, HEADER.size)
+    if header is None:
+        return None
+    kind, length = HEADER.unpack(header)
+    if length > MAX_PAYLOAD_BYTES:
+        raise ValueError(f"message of {length} bytes is too large")
+    payload = _recv_exactly(sock, length)
+    if payload is None:
+        return None
+    if kind == KIND_POSE:
+        return kind, decode_pose(payload)
+    return kind, json.loads(payload)
+
+def _recv_exactly(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return bytes(data)
+
+class ControlChannel:
+    """Serves one client at a time, once it has sent token. on_command(command)
+    returns None on success or raises ValueError; the outcome goes back as the ack."""
+
+    def __init__(self, on_command, token, host="127.0.0.1"):
+        self.on_command = on_command
+        self.token = token
+        self.clients_rejected = 0
+        self.events_dropped = 0
+        self.poses_coalesced = 0
+        self._server = socket.create_server((host, 0))
+        self._server.settimeout(0.5)
+        self.port = self._server.getsockname()[1]
+        self._client = None
+        self._events = collections.deque(maxlen=EVENT_QUEUE_SIZE)
+        self._acks = []
+        self._pose = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._fps = 0.0
+        self._last_pose_at = None
+
+    def start(self, stop_event):
+        threading.Thread(target=self._accept_loop, args=(stop_event,), daemon=True).start()
+        telemetry.emit_event("control_channel", port=self.port)
+
+    # --- Producers (any thread, never block) ---
+    def publish_event(self, event_type, **fields):
+        with self._lock:
+            if len(self._events) == self._events.maxlen:
+                self.events_dropped += 1
+            self._events.append({"type": event_type, **fields})
+        self._wake.set()
+
+    def publish_pose(self, captured_at, yaw, pitch, face):
+        if self._last_pose_at is not None and captured_at > self._last_pose_at:
+            fps = 1.0 / (captured_at - self._last_pose_at)
+            self._fps = fps if not self._fps else self._fps + FPS_SMOOTHING * (fps - self._fps)
+        self._last_pose_at = captured_at
+        if self._client is None:
+            return
+        with self._lock:
+            if self._pose is not None:
+                self.poses_coalesced += 1
+            self._pose = (captured_at, yaw, pitch, self._fps, face)
+        self._wake.set()
+
+    # --- Socket side ---
+    def _accept_loop(self, stop_event):
+        while not stop_event.is_set():
+            try:
+                client, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            if not authenticate(client, self.token):
+                self.clients_rejected += 1
+                print("Control Channel: Rejected a client without the session token.")
+                client.close()
+                continue
+            client.settimeout(None)
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            print("Control Channel: Client connected.")
+            with self._lock:
+                self._events.clear()
+                self._acks.clear()
+                self._pose = None
+            self._client = client
+            telemetry.set_event_sink(self.publish_event)
+            writer = threading.Thread(target=self._write_loop, args=(client, stop_event), daemon=True)
+            writer.start()
+            self._read_loop(client, stop_event)
+            telemetry.set_event_sink(None)
+            self._client = None
+            self._wake.set()
+            writer.join(timeout=1)
+            client.close()
+            print("Control Channel: Client disconnected.")
+        self._server.close()
+
+    def _read_loop(self, client, stop_event):
+        while not stop_event.is_set():
+            try:
+                message = read_message(client)
+            except (OSError, ValueError) as e:
+                print(f"Control Channel: Dropping client: {e}")
+                return
+            if message is None:
+                return
+            kind, command = message
+            if kind != KIND_COMMAND or not isinstance(command, dict):
+                continue
+            ack = {"id": command.get("id"), "ok": True}
+            try:
+                self.on_command(command)
+            except ValueError as e:
+                ack.update(ok=False, error=str(e))
+            with self._lock:
+                self._acks.append(ack) # Never dropped, and sent ahead of queued events
+            self._wake.set()
+
+    def _write_loop(self, client, stop_event):
+        while self._client is client and not stop_event.is_set():
+            if not self._wake.wait(0.5):
+                continue
+            with self._lock:
+                self._wake.clear()
+                acks, self._acks = self._acks, []
+                events = list(self._events)
+                self._events.clear()
+                pose, self._pose = self._pose, None
+            messages = [encode_message(KIND_ACK, ack) for ack in acks]
+            messages += [encode_message(KIND_EVENT, event) for event in events]
+            if pose is not None:
+                messages.append(encode_message(KIND_POSE, POSE.pack(*pose)))
+            try:
+                client.sendall(b"".join(messages))
+            except OSError:
+                client.close() # Unblocks the reader, which tidies up
+                return
@@ -0,0 +1,137 @@
+# cpu_budget.py
+# How much of the machine the vision service may take. It shares the CPU with
+# whatever the user is actually doing, and left alone OpenCV's thread pool,
+# MediaPipe's XNNPACK threads and our own threads all compete for every core.
+# Three knobs, all read once at startup:
+#
+#   WINKS_MAX_CORES=N       use at most N cores (default: all of them). On Linux
+#                           the process is confined to the first N cores it is
+#                           allowed on, and each thread is pinned by role (below)
+#   WINKS_CV_THREADS=N      cv2.setNumThreads(N). Defaults to 1 when WINKS_MAX_CORES
+#                           is set: our OpenCV calls work on one small frame and a
+#                           pool only adds threads to the contention
+#   WINKS_PRIORITY=low|normal|high
+#                           nice +10 / -5 on Linux and macOS, the below / above
+#                           normal priority class on Windows. Raising it needs
+#                           privileges on Linux; without them a warning is printed
+#
+# Roles, when pinned (Linux, WINKS_MAX_CORES set), with cores c0..cN-1:
+#
+#   capture, logic, cursor   c0         short bursts, kept off the detector's cores
+#   detect                   c1..cN-1   (all of them with a single core)
+#
+# Affinity and nice values are per thread on Linux and new threads inherit them
+# from the thread that creates them. So apply() runs on the main thread before
+# any other thread starts, every thread calls pin_current_thread(role) first
+# thing, and the XNNPACK threads MediaPipe creates on the detect thread stay on
+# the detect cores. The detector process applies the same budget from the
+# environment. Elsewhere there is no affinity API we can use without extra
+# packages, so only the OpenCV and priority settings take effect.
+
+import os
+import sys
+
+CPU_PRIORITIES = ("low", "normal", "high")
+DEFAULT_PRIORITY = "normal"
+THREAD_ROLES = ("capture", "detect", "logic", "cursor")
+PRIORITY_NICE = {"low": 10, "high": -5}
+PRIORITY_CLASS = {"low": 0x00004000, "high": 0x00008000} # BELOW_/ABOVE_NORMAL_PRIORITY_CLASS
+
+_active = None # The budget apply() was last called on, for pin_current_thread()
+
+def _int_from_env(name, minimum):
+    """None when name is unset, else an int >= minimum; None with a warning otherwise."""
+    value = os.environ.get(name, "").strip()
+    if not value:
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        number = minimum - 1
+    if number < minimum:
+        print(f"WARNING: Invalid {name}, ignoring it.")
+        return None
+    return number
+
+def cpu_priority_from_env():
+    priority = os.environ.get("WINKS_PRIORITY", DEFAULT_PRIORITY).strip().lower()
+    if priority not in CPU_PRIORITIES:
+        print(f"WARNING: Unknown WINKS_PRIORITY '{priority}', using '{DEFAULT_PRIORITY}'.")
+        return DEFAULT_PRIORITY
+    return priority
+
+def cpu_budget_from_env():
+    return CpuBudget(_int_from_env("WINKS_MAX_CORES", 1), _int_from_env("WINKS_CV_THREADS", 0),
+                     cpu_priority_from_env())
+
+def available_cores():
+    """The cores this process may run on, lowest first."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+class CpuBudget:
+    """max_cores None means no limit and no pinning; cv_threads None leaves
+    OpenCV's default; priority is one of CPU_PRIORITIES."""
+
+    def __init__(self, max_cores=None, cv_threads=None, priority=DEFAULT_PRIORITY, cores=None):
+        cores = available_cores() if cores is None else list(cores)
+        if max_cores and max_cores > len(cores):
+            print(f"WARNING: WINKS_MAX_CORES={max_cores} but only {len(cores)} cores are available.")
+        self.max_cores = max_cores
+        self.cores = cores[:max_cores] if max_cores else cores
+        self.cv_threads = 1 if cv_threads is None and max_cores else cv_threads
+        self.priority = priority
+
+    @property
+    def pins_threads(self):
+        return bool(self.max_cores) and hasattr(os, "sched_setaffinity")
+
+    def plan(self):
+        """{role: cores} for every thread role, or {} when threads are not pinned."""
+        if not self.pins_threads:
+            return {}
+        if len(self.cores) == 1:
+            return {role: set(self.cores) for role in THREAD_ROLES}
+        light, heavy = {self.cores[0]}, set(self.cores[1:])
+        return {"capture": light, "logic": light, "cursor": light, "detect": heavy}
+
+    def describe(self):
+        cores = ",".join(str(core) for core in self.cores) if self.max_cores else "all"
+        cv_threads = "default" if self.cv_threads is None else self.cv_threads
+        return f"cores {cores}, OpenCV threads {cv_threads}, priority {self.priority}"
+
+    def apply(self):
+        """Process-wide settings. Call on the main thread before starting any other thread."""
+        global _active
+        _active = self
+        if self.cv_threads is not None:
+            import cv2
+            cv2.setNumThreads(self.cv_threads)
+        if self.priority != DEFAULT_PRIORITY:
+            _set_priority(self.priority)
+        if self.pins_threads:
+            os.sched_setaffinity(0, self.cores)
+        return self
+
+    def pin_current_thread(self, role):
+        cores = self.plan().get(role)
+        if cores:
+            os.sched_setaffinity(0, cores) # 0 is the calling thread on Linux
+
+def pin_current_thread(role):
+    """Pin the calling thread to the cores of role under the applied budget; a no-op without one."""
+    if _active:
+        _active.pin_current_thread(role)
+
+def _set_priority(priority):
+    if sys.platform == "win32":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        if not kernel32.SetPriorityClass(kernel32.GetCurrentProcess(), PRIORITY_CLASS[priority]):
+            print(f"WARNING: Could not set the {priority} priority class.")
+        return
+    try:
+        os.setpriority(os.PRIO_PROCESS, 0, PRIORITY_NICE[priority])
+    except PermissionError:
+        print(f"WARNING: Not allowed to set WINKS_PRIORITY={priority}, keeping the current priority.")
@@ -0,0 +1,118 @@
+# cursor_actuator.py
+# Cursor output on its own thread, decoupled from detection cadence.
+#
+# The detection loop calls set_velocity() once per frame and request_click()
+# when a wink fires; neither call blocks. The actuator thread integrates the
+# latest velocity at CURSOR_RATE_HZ, carrying the sub-pixel remainder between
+# ticks, so the cursor glides at 120+ Hz instead of jumping once per camera
+# frame, and a slow OS input call only delays the cursor, never inference.
+#
+# Velocities are given in pixels per detection frame at CURSOR_REFERENCE_FPS,
+# which keeps the existing sensitivity values meaning what they did when every
+# detection moved the cursor once at ~30 FPS. If no velocity arrives for
+# VELOCITY_TIMEOUT (detector stalled or stopped), the cursor stops.
+
+import os
+import queue
+import time
+from cpu_budget import pin_current_thread
+
+CURSOR_RATE_HZ = 120.0
+CURSOR_REFERENCE_FPS = 30.0
+VELOCITY_TIMEOUT = 0.25
+
+def cursor_rate_from_env():
+    try:
+        rate = float(os.environ.get("WINKS_CURSOR_RATE_HZ", CURSOR_RATE_HZ))
+    except ValueError:
+        rate = 0.0
+    if not 10.0 <= rate <= 1000.0:
+        print(f"WARNING: Invalid WINKS_CURSOR_RATE_HZ, using {CURSOR_RATE_HZ:g}.")
+        return CURSOR_RATE_HZ
+    return rate
+
+class CursorActuator:
+    """Moves and clicks through backend (anything with move(dx, dy), click() and
+    rightClick(); see input_backends.py) from a dedicated thread: run run()
+    on a thread and feed it with set_velocity() / request_click()."""
+
+    def __init__(self, backend, rate_hz=CURSOR_RATE_HZ):
+        self.backend = backend
+        self.rate_hz = rate_hz
+        self._clicks = queue.Queue()
+        # (vx, vy in px/s, perf_counter when set, captured_at of the frame it came from).
+        # Replaced as a whole so the actuator never sees half an update.
+        self._velocity = (0.0, 0.0, 0.0, None)
+        self.first_move_at = None # perf_counter of the first cursor move, for startup timing
+
+    def set_velocity(self, dx_per_frame, dy_per_frame, captured_at=None):
+        self._velocity = (dx_per_frame * CURSOR_REFERENCE_FPS, dy_per_frame * CURSOR_REFERENCE_FPS,
+                          time.perf_counter(), captured_at)
+
+    def stop_cursor(self):
+        self.set_velocity(0.0, 0.0)
+
+    def request_click(self, is_right_click=False, captured_at=None, closed_at=None):
+        """closed_at is when the wink began (perf_counter); the click then also
+        records left/right_wink_to_click, eye closing to OS click."""
+        self._clicks.put_nowait((is_right_click, captured_at, closed_at))
+
+    def run(self, stop_event, stats=None):
+        pin_current_thread("cursor")
+        print(f"Cursor Thread: Starting ({self.rate_hz:g} Hz).")
+        interval = 1.0 / self.rate_hz
+        remainder_x, remainder_y = 0.0, 0.0
+        last_tick = time.perf_counter()
+        next_tick = last_tick + interval
+        timed_velocity = None # Velocity whose glass-to-cursor latency has already been recorded
+
+        while not stop_event.is_set():
+            # Waiting on the click queue doubles as the tick sleep, so clicks go out immediately.
+            try:
+                is_right_click, captured_at, closed_at = self._clicks.get(timeout=max(0.0, next_tick - time.perf_counter()))
+                self._dispatch(self.backend.rightClick if is_right_click else self.backend.click, (), captured_at, stats)
+                if stats and closed_at is not None:
+                    stats.record("right_wink_to_click" if is_right_click else "left_wink_to_click",
+                                 time.perf_counter() - closed_at)
+                continue
+            except queue.Empty:
+                pass
+
+            now = time.perf_counter()
+            dt, last_tick = now - last_tick, now
+            next_tick = max(next_tick + interval, now) # Skip ticks rather than bursting after a stall
+
+            velocity = self._velocity
+            vx, vy, set_at, captured_at = velocity
+            if now - set_at > VELOCITY_TIMEOUT:
+                vx, vy = 0.0, 0.0
+            if vx == 0.0 and vy == 0.0:
+                remainder_x, remainder_y = 0.0, 0.0
+                continue
+
+            remainder_x += vx * dt
+            remainder_y += vy * dt
+            step_x, step_y = int(remainder_x), int(remainder_y) # Truncate toward zero; keep the fraction
+            remainder_x -= step_x
+            remainder_y -= step_y
+            if step_x or step_y:
+                first_move = velocity is not timed_velocity
+                timed_velocity = velocity
+                self._dispatch(self.backend.move, (step_x, step_y), captured_at if first_move else None, stats)
+                if self.first_move_at is None:
+                    self.first_move_at = time.perf_counter()
+
+        print("Cursor Thread: Finished.")
+
+    def _dispatch(self, call, args, captured_at, stats):
+        t_dispatch = time.perf_counter()
+        try:
+            call(*args)
+        except Exception as e:
+            print(f"Cursor Thread: Input call failed: {e}")
+            return
+        if stats:
+            dispatched_at = time.perf_counter()
+            stats.record("input_dispatch", dispatched_at - t_dispatch)
+            if captured_at is not None:
+                stats.record("glass_to_cursor", dispatched_at - captured_at)
@@ -0,0 +1,88 @@
+# detector_supervisor.py
+# Keeps detection running when the detector fails, instead of stopping the app
+# and leaving the user without a cursor until Electron relaunches it.
+#
+# The executor's detector (the worker thread, or the detector process) beats a
+# heartbeat on every loop turn, at least every HEARTBEAT_INTERVAL seconds even
+# with no frames coming. check() runs from the main loop and restarts the
+# detector when it has
+#
+#   died     the thread or process is gone (an exception in detect, a crash)
+#   stalled  no heartbeat for STALL_SECONDS, e.g. stuck inside MediaPipe, or
+#            not ready LOAD_SECONDS after it was started
+#
+# executor.restart_detector() builds a fresh DetectStage (and FaceLandmarker);
+# capture, the cursor and the logic stages with their filter and wink state
+# keep running. The outage is timed from the last heartbeat to the first frame
+# handled after the restart and reported as a "detector_recovered" event and
+# the detector_recovery stage. More than MAX_RESTARTS restarts within
+# RESTART_WINDOW_SECONDS means it is not going to work (a missing model, say),
+# and check() returns False so the app stops as it did before.
+
+import collections
+import time
+from telemetry import emit_event
+
+HEARTBEAT_INTERVAL = 0.5
+STALL_SECONDS = 5.0          # Detection takes tens of milliseconds; this is a hang
+LOAD_SECONDS = 30.0          # Importing mediapipe and loading the model, on a slow machine
+MAX_RESTARTS = 5
+RESTART_WINDOW_SECONDS = 60.0
+
+class DetectorSupervisor:
+    def __init__(self, executor, stats=None, stall_seconds=STALL_SECONDS, load_seconds=LOAD_SECONDS,
+                 max_restarts=MAX_RESTARTS, restart_window=RESTART_WINDOW_SECONDS):
+        self.executor = executor
+        self.stats = stats
+        self.stall_seconds = stall_seconds
+        self.load_seconds = load_seconds
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+        self.restarts = 0
+        self.recoveries = []          # Seconds without detection, per recovered outage
+        self._recent = collections.deque()
+        self._outage_since = None     # Last heartbeat before the current outage
+        self._restarted_at = None
+
+    def failure(self, now):
+        """'died', 'stalled' or None for the detector as of now."""
+        executor = self.executor
+        if not executor.detector_alive():
+            return "died"
+        if executor.detector_ready():
+            return "stalled" if now - executor.heartbeat() > self.stall_seconds else None
+        return "stalled" if now - executor.detector_started_at > self.load_seconds else None
+
+    def check(self, now=None):
+        """Call regularly. Restarts a failed detector; False once it cannot be kept running."""
+        now = time.perf_counter() if now is None else now
+        executor = self.executor
+        if self._outage_since is not None and executor.last_detection_at > self._restarted_at:
+            recovery = executor.last_detection_at - self._outage_since
+            self.recoveries.append(recovery)
+            self._outage_since = None
+            print(f"Supervisor: Detector recovered, {recovery:.2f} s without detection.")
+            emit_event("detector_recovered", recovery_s=round(recovery, 3), restarts=self.restarts)
+            if self.stats: self.stats.record("detector_recovery", recovery)
+        if executor.finished:
+            return True
+        reason = self.failure(now)
+        if reason is None:
+            return True
+
+        while self._recent and now - self._recent[0] > self.restart_window:
+            self._recent.popleft()
+        if len(self._recent) >= self.max_restarts:
+            print(f"Supervisor: CRITICAL ERROR - Detector {reason} after {len(self._recent)} restarts "
+                  f"in {self.restart_window:.0f} s. Giving up.")
+            return False
+        self._recent.append(now)
+        self.restarts += 1
+        if self._outage_since is None:
+            self._outage_since = min(executor.heartbeat(), now)
+        print(f"Supervisor: Detector {reason}, restarting it (restart {self.restarts}).")
+        emit_event("detector_restarted", reason=reason, restarts=self.restarts)
+        if self.stats: self.stats.increment("detector_restarts")
+        executor.restart_detector()
+        self._restarted_at = time.perf_counter()
+        return True
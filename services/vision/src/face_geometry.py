@@ -0,0 +1,80 @@
+# face_geometry.py
+# Array form of a FaceLandmarkerResult and the per-frame maths done on it.
+#
+# result_to_arrays() converts the first face of a result once into a float32
+# (478, 3) landmark array and a float32 3x3 rotation. The kernels below work on
+# those arrays and broadcast over leading batch dimensions, so the same code
+# scores one live frame or a whole recorded clip:
+#
+#   eye_aspect_ratios(landmarks)  (..., N, 3) -> (..., 2)  [left EAR, right EAR]
+#   yaw_pitch_degrees(rotation)   (..., 3, 3) -> (..., 2)  [yaw, pitch]
+#
+# Both reproduce the per-landmark helpers they replaced exactly, including the
+# 999.0 "no EAR" value. Those helpers are kept as baseline_calculate_ear /
+# baseline_rotation_angles in bench/geometry_benchmark.py, which reports the
+# largest difference between the two.
+
+import math
+import numpy as np
+
+LEFT_EYE_LANDMARKS = (362, 385, 387, 263, 373, 380)
+RIGHT_EYE_LANDMARKS = (33, 160, 158, 133, 153, 144)
+NO_EAR = 999.0
+
+_EYE_INDEX = np.array([LEFT_EYE_LANDMARKS, RIGHT_EYE_LANDMARKS], dtype=np.intp)  # (eye, point)
+# EAR as two dot products over each eye's six points:
+# vertical = mean(p2.y, p3.y) - mean(p5.y, p6.y), horizontal = p4.x - p1.x
+_VERTICAL_WEIGHTS = np.array([0.0, 0.5, 0.5, 0.0, -0.5, -0.5], dtype=np.float32)
+_HORIZONTAL_WEIGHTS = np.array([-1.0, 0.0, 0.0, 1.0, 0.0, 0.0], dtype=np.float32)
+
+def landmarks_to_array(face_landmarks):
+    """List of NormalizedLandmark -> float32 (N, 3) array of x, y, z."""
+    count = len(face_landmarks)
+    coords = np.fromiter((c for lm in face_landmarks for c in (lm.x, lm.y, lm.z)), dtype=np.float32, count=count * 3)
+    return coords.reshape(count, 3)
+
+def result_to_arrays(detection_result):
+    """FaceLandmarkerResult -> (landmarks (N,3), rotation (3,3)) for the first face, None for whichever is missing."""
+    landmarks, matrix = result_to_matrix_arrays(detection_result)
+    return landmarks, matrix[:3, :3] if matrix is not None else None
+
+def result_to_matrix_arrays(detection_result):
+    """Like result_to_arrays(), with the whole 4x4 transformation matrix instead of its rotation."""
+    landmarks, matrix = None, None
+    if detection_result and detection_result.face_landmarks:
+        landmarks = landmarks_to_array(detection_result.face_landmarks[0])
+    if detection_result and detection_result.facial_transformation_matrixes:
+        matrix = np.asarray(detection_result.facial_transformation_matrixes[0], dtype=np.float32).reshape(4, 4)
+    return landmarks, matrix
+
+def eye_aspect_ratios(landmarks):
+    """Left and right eye aspect ratio for (..., N, 3) landmarks, as (..., 2)."""
+    landmarks = np.asarray(landmarks, dtype=np.float32)
+    if landmarks.ndim < 2 or landmarks.shape[-2] <= _EYE_INDEX.max():
+        return np.full(landmarks.shape[:-2] + (2,), NO_EAR, dtype=np.float32)
+    eyes = landmarks[..., _EYE_INDEX, :2]  # (..., eye, point, xy)
+    vertical = np.abs(eyes[..., 1] @ _VERTICAL_WEIGHTS)
+    horizontal = np.abs(eyes[..., 0] @ _HORIZONTAL_WEIGHTS)
+    return np.divide(vertical, horizontal, out=np.full_like(horizontal, NO_EAR), where=horizontal != 0)
+
+def yaw_pitch_degrees(rotation):
+    """Physical yaw and pitch in degrees for (..., 3, 3) rotation matrices, as (..., 2)."""
+    rotation = np.asarray(rotation, dtype=np.float64)
+    if rotation.ndim == 2:
+        # A single matrix is cheaper through math than through a dozen tiny NumPy calls
+        return np.array(_yaw_pitch_scalar(rotation.tolist()))
+    sy = np.hypot(rotation[..., 0, 0], rotation[..., 1, 0])
+    yaw = np.arctan2(-rotation[..., 2, 0], sy)
+    pitch = np.where(sy < 1e-6,
+                     np.arctan2(-rotation[..., 1, 2], rotation[..., 1, 1]),
+                     np.arctan2(rotation[..., 2, 1], rotation[..., 2, 2]))
+    return np.degrees(np.stack((yaw, pitch), axis=-1))
+
+def _yaw_pitch_scalar(r):
+    sy = math.hypot(r[0][0], r[1][0])
+    yaw = math.atan2(-r[2][0], sy)
+    if sy < 1e-6:
+        pitch = math.atan2(-r[1][2], r[1][1])
+    else:
+        pitch = math.atan2(r[2][1], r[2][2])
+    return math.degrees(yaw), math.degrees(pitch)
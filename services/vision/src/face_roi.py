@@ -0,0 +1,117 @@
+# face_roi.py
+# Face region-of-interest tracking for cheaper per-frame inference.
+#
+# Once a face has been found, the next frame is cropped to a padded square
+# around the previous frame's landmarks (and downscaled if the crop is large)
+# before colour conversion and inference. Landmarks coming back are mapped
+# from crop coordinates to full-frame normalized coordinates, so everything
+# downstream (pose, EAR, drawing) works exactly as with full-frame inference.
+# When the face is lost the tracker falls back to a downscaled full-frame pass
+# to reacquire it.
+#
+# Off by default; set WINKS_FACE_ROI=1 to enable. MediaPipe already crops to
+# the face internally, so the saving is limited to colour conversion and
+# preprocessing (a few percent at 640x480, more on HD cameras), and because the
+# face geometry is estimated against the crop's field of view, yaw/pitch come
+# out 1-3 degrees different from full-frame inference. Check
+# bench/face_roi_benchmark.py on your own clips before turning it on.
+
+import os
+import time
+import cv2
+import mediapipe as mp
+
+ROI_PADDING = 0.35       # Fraction of the landmark box added on every side
+ROI_INPUT_SIZE = 256     # Crops larger than this (in pixels) are downscaled to it
+REACQUIRE_WIDTH = 320    # Width of the full-frame pass used while no face is tracked
+MAX_ROI_FRACTION = 0.8   # An ROI covering more of the frame than this is not worth cropping
+
+def face_roi_enabled_from_env():
+    return os.environ.get("WINKS_FACE_ROI", "0").strip().lower() in ("1", "true", "on")
+
+class FaceRoiTracker:
+    def __init__(self, padding=ROI_PADDING, input_size=ROI_INPUT_SIZE, reacquire_width=REACQUIRE_WIDTH):
+        self.padding = padding
+        self.input_size = input_size
+        self.reacquire_width = reacquire_width
+        self.roi = None  # (x0, y0, x1, y1) in full-frame pixels, or None when reacquiring
+        self.reacquisitions = 0
+        self.retries = 0
+        self.last_prepare_seconds = 0.0
+
+    def detect(self, landmarker, frame_bgr, timestamp_ms):
+        """prepare() + detect_prepared() for one BGR frame."""
+        prepare_start = time.perf_counter()
+        frame_rgb, mapping = self.prepare(frame_bgr)
+        self.last_prepare_seconds = time.perf_counter() - prepare_start
+        return self.detect_prepared(landmarker, frame_rgb, mapping, timestamp_ms)
+
+    def detect_prepared(self, landmarker, frame_rgb, mapping, timestamp_ms):
+        """Run the landmarker on a prepare()d frame and update() from the result.
+        If the face is not found in the ROI the same crop is tried once more:
+        in video mode MediaPipe's own tracker loses the face whenever the input
+        geometry jumps (full frame -> crop), and a second call on the same crop
+        makes it run face detection again instead of dropping the frame."""
+        mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame_rgb)
+        detection_result = landmarker.detect(mp_image, timestamp_ms)
+        if self.roi is not None and not (detection_result and detection_result.face_landmarks):
+            self.retries += 1
+            detection_result = landmarker.detect(mp_image, timestamp_ms)
+        return self.update(detection_result, mapping)
+
+    def prepare(self, frame_bgr):
+        """Return (frame_rgb, mapping) to hand to the landmarker for this frame.
+        mapping is passed back to update() with the matching result."""
+        frame_h, frame_w = frame_bgr.shape[:2]
+        if self.roi is None:
+            region = frame_bgr
+            if frame_w > self.reacquire_width:
+                scale = self.reacquire_width / frame_w
+                region = cv2.resize(frame_bgr, (self.reacquire_width, round(frame_h * scale)), interpolation=cv2.INTER_AREA)
+            mapping = (0, 0, frame_w, frame_h, frame_w, frame_h)
+        else:
+            x0, y0, x1, y1 = self.roi
+            region = frame_bgr[y0:y1, x0:x1]
+            side = max(x1 - x0, y1 - y0)
+            if side > self.input_size:
+                scale = self.input_size / side
+                region = cv2.resize(region, (round((x1 - x0) * scale), round((y1 - y0) * scale)), interpolation=cv2.INTER_AREA)
+            mapping = (x0, y0, x1 - x0, y1 - y0, frame_w, frame_h)
+        return cv2.cvtColor(region, cv2.COLOR_BGR2RGB), mapping
+
+    def update(self, detection_result, mapping):
+        """Map detection_result's landmarks (in place) to full-frame normalized
+        coordinates and pick the ROI for the next frame."""
+        if not (detection_result and detection_result.face_landmarks):
+            if self.roi is not None:
+                self.reacquisitions += 1
+            self.roi = None
+            return detection_result
+
+        x0, y0, crop_w, crop_h, frame_w, frame_h = mapping
+        if (x0, y0, crop_w, crop_h) != (0, 0, frame_w, frame_h):
+            scale_x, scale_y = crop_w / frame_w, crop_h / frame_h
+            offset_x, offset_y = x0 / frame_w, y0 / frame_h
+            for face in detection_result.face_landmarks:
+                for lm in face:
+                    lm.x = offset_x + lm.x * scale_x
+                    lm.y = offset_y + lm.y * scale_y
+                    lm.z = lm.z * scale_x # z shares the x scale in MediaPipe's normalized space
+
+        face = detection_result.face_landmarks[0]
+        xs = [lm.x for lm in face]
+        ys = [lm.y for lm in face]
+        self.roi = self._padded_square(min(xs) * frame_w, min(ys) * frame_h,
+                                       max(xs) * frame_w, max(ys) * frame_h, frame_w, frame_h)
+        return detection_result
+
+    def _padded_square(self, left, top, right, bottom, frame_w, frame_h):
+        side = max(right - left, bottom - top) * (1.0 + 2.0 * self.padding)
+        if side >= MAX_ROI_FRACTION * min(frame_w, frame_h):
+            return None
+        center_x, center_y = (left + right) / 2.0, (top + bottom) / 2.0
+        # Slide the square back inside the frame rather than shrinking it at the edges
+        x0 = int(round(min(max(center_x - side / 2.0, 0), frame_w - side)))
+        y0 = int(round(min(max(center_y - side / 2.0, 0), frame_h - side)))
+        side = int(round(side))
+        return (x0, y0, x0 + side, y0 + side)
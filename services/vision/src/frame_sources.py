@@ -0,0 +1,142 @@
+# frame_sources.py
+# Pluggable frame sources for the vision pipeline: a live camera, a recorded
+# video file, or a directory of still images. Every source exposes the same
+# open() / read() / release() trio so the capture thread does not care where
+# frames come from.
+
+import os
+import time
+import cv2
+from camera_capture import camera_api_preference, camera_mode_from_env, configure_camera, grab_freshest
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+DEFAULT_REPLAY_FPS = 30.0
+
+# --- Live Camera ---
+class CameraSource:
+    """A live camera, opened with the mode and buffering from camera_capture.py."""
+    is_live = True
+
+    def __init__(self, camera_index=0, mode=None):
+        self.camera_index = camera_index
+        self.mode = mode if mode is not None else camera_mode_from_env()  # None from the env: driver default
+        self.exhausted = False  # A camera never runs out of frames
+        self.fps = None
+        self.cap = None
+        self.stale_frames_dropped = 0
+
+    def describe(self):
+        return f"camera:{self.camera_index}"
+
+    def open(self):
+        self.cap = cv2.VideoCapture(self.camera_index, camera_api_preference())
+        if not self.cap.isOpened():
+            return False
+        requested, actual = configure_camera(self.cap, self.camera_index, self.mode)
+        self.fps = actual.fps or None
+        print(f"Camera {self.camera_index}: {self.cap.getBackendName()} "
+              f"{actual.describe()} (requested {requested.describe() if requested else 'driver default'}).")
+        return True
+
+    def read(self):
+        # Frames that were already queued in the driver are dropped before decoding
+        ok, dropped = grab_freshest(self.cap)
+        self.stale_frames_dropped += dropped
+        if not ok:
+            return False, None
+        return self.cap.retrieve()
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+
+# --- Recorded Sources ---
+class _ReplaySource:
+    """Base for recorded sources. With realtime=True, read() sleeps so frames
+    come out at the recorded FPS, like a camera would deliver them."""
+    is_live = False
+
+    def __init__(self, realtime=False):
+        self.realtime = realtime
+        self.exhausted = False
+        self.fps = DEFAULT_REPLAY_FPS
+        self._next_frame_time = None
+
+    def _pace(self):
+        if not self.realtime:
+            return
+        now = time.perf_counter()
+        if self._next_frame_time is None:
+            self._next_frame_time = now
+        elif now < self._next_frame_time:
+            time.sleep(self._next_frame_time - now)
+        self._next_frame_time += 1.0 / self.fps
+
+class VideoFileSource(_ReplaySource):
+    def __init__(self, path, realtime=False):
+        super().__init__(realtime)
+        self.path = path
+        self.cap = None
+
+    def describe(self):
+        return f"video:{os.path.basename(self.path)}"
+
+    def open(self):
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            return False
+        recorded_fps = self.cap.get(cv2.CAP_PROP_FPS)
+        if recorded_fps and recorded_fps > 0:
+            self.fps = recorded_fps
+        return True
+
+    def read(self):
+        self._pace()
+        ret, frame = self.cap.read()
+        if not ret:
+            self.exhausted = True
+        return ret, frame
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+
+class ImageDirectorySource(_ReplaySource):
+    def __init__(self, directory, fps=DEFAULT_REPLAY_FPS, realtime=False):
+        super().__init__(realtime)
+        self.directory = directory
+        self.fps = fps
+        self.paths = []
+        self.index = 0
+
+    def describe(self):
+        return f"images:{os.path.basename(os.path.normpath(self.directory))}"
+
+    def open(self):
+        if not os.path.isdir(self.directory):
+            return False
+        self.paths = sorted(
+            os.path.join(self.directory, name) for name in os.listdir(self.directory)
+            if name.lower().endswith(IMAGE_EXTENSIONS))
+        return len(self.paths) > 0
+
+    def read(self):
+        if self.index >= len(self.paths):
+            self.exhausted = True
+            return False, None
+        self._pace()
+        frame = cv2.imread(self.paths[self.index])
+        self.index += 1
+        return frame is not None, frame
+
+    def release(self):
+        self.paths = []
+
+def open_frame_source(spec, realtime=False):
+    """Build a source from a CLI-style spec: a camera index ("0"), a directory
+    of images, or a video file path."""
+    if isinstance(spec, int) or str(spec).isdigit():
+        return CameraSource(int(spec))
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec, realtime=realtime)
+    return VideoFileSource(spec, realtime=realtime)
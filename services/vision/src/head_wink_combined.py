@@ -1,19 +1,29 @@
+import time
+STARTED_AT = time.perf_counter() # Startup timings count from here; see StartupTimeline in telemetry.py
 import cv2
-import mediapipe as mp
-from mediapipe.tasks import python
-from mediapipe.tasks.python import vision
-import pyautogui
-import numpy as np
-import math
-from mediapipe.framework.formats import landmark_pb2
 import queue # Use the thread-safe queue
-import time
 import sys
 import os
 import signal
-from collections import deque
 import threading
 import json
+import collections
+from frame_sources import CameraSource, open_frame_source
+from stage_stats import StageStats
+from telemetry import LatencyReporter, StartupTimeline, TELEMETRY_WINDOW_SAMPLES, emit_event, use_line_writer
+from runtime_settings import PipelineSettings, SettingsStore, apply_settings_command
+from cursor_actuator import CursorActuator, cursor_rate_from_env
+from input_backends import open_input_backend, input_backend_from_env
+from activity_scheduler import ActivityScheduler, idle_mode_enabled_from_env
+from preview import PreviewPublisher, PreviewRenderer, PreviewThrottle, PREVIEW_WINDOW_NAME, preview_fps_from_env, preview_mode_from_env
+from control_channel import ControlChannel
+from session_token import session_token_from_env
+from pipeline_stages import ActuateStage, Pipeline, PoseStage, PublishStage, WinkStage
+from pipeline_executors import create_executor, executor_from_env
+from detector_supervisor import DetectorSupervisor
+from landmark_trace import TraceRecorder, trace_path_from_env
+from cpu_budget import cpu_budget_from_env
+from quality_controller import QualityController, latency_target_from_env
 
 # --- Configuration ---
 SENSITIVITY_PHYSICAL_YAW = 45.0
@@ -23,180 +33,75 @@ MAX_JOYSTICK_TILT_ANGLE = 20.0
 INVERT_HORIZONTAL_MOUSE = False
 INVERT_VERTICAL_MOUSE = False
 CAMERA_INDEX = 0
-FRAME_READ_RETRY_DELAY = 0.05
 
 # --- Wink Detection Configuration ---
-WINK_LEFT_EYE_LANDMARKS = [362, 385, 387, 263, 373, 380]
-WINK_RIGHT_EYE_LANDMARKS = [33, 160, 158, 133, 153, 144]
-WINK_EAR_SMOOTH_WINDOW = 3
 WINK_L_WINK_RATIO = 0.23
 WINK_R_WINK_RATIO = 0.24
-WINK_SUCC_FRAME = 2
+WINK_HOLD_SECONDS = 0.03
 WINK_COOLDOWN = 0.5
 
+# The constants above are only the starting values; Electron can change them at runtime over stdin
+STARTING_SETTINGS = PipelineSettings(
+    sensitivity_yaw=SENSITIVITY_PHYSICAL_YAW, sensitivity_pitch=SENSITIVITY_PHYSICAL_PITCH,
+    dead_zone_degrees=DEAD_ZONE_DEGREES, max_tilt_angle=MAX_JOYSTICK_TILT_ANGLE,
+    invert_horizontal=INVERT_HORIZONTAL_MOUSE, invert_vertical=INVERT_VERTICAL_MOUSE,
+    left_wink_ratio=WINK_L_WINK_RATIO, right_wink_ratio=WINK_R_WINK_RATIO,
+    wink_hold_seconds=WINK_HOLD_SECONDS, wink_cooldown=WINK_COOLDOWN)
+
 # --- Shared Data Structures for Threads---
-frame_queue = queue.Queue(maxsize=2)
-result_queue = queue.Queue(maxsize=2)
+result_queue = queue.Queue(maxsize=2) # Preview frames for the main thread (WINKS_PREVIEW=window)
 stop_event = threading.Event()
-
-# --- Helper Functions ---
-def rotation_matrix_to_identified_physical_angles(rotation_matrix):
-    sy = math.sqrt(rotation_matrix[0,0] * rotation_matrix[0,0] + rotation_matrix[1,0] * rotation_matrix[1,0])
-    singular = sy < 1e-6
-    if not singular:
-        phys_yaw_val = math.atan2(-rotation_matrix[2,0], sy)
-        phys_pitch_val = math.atan2(rotation_matrix[2,1] , rotation_matrix[2,2])
-    else:
-        phys_yaw_val = math.atan2(-rotation_matrix[2,0], sy)
-        phys_pitch_val = math.atan2(-rotation_matrix[1,2], rotation_matrix[1,1])
-    return math.degrees(phys_yaw_val), math.degrees(phys_pitch_val)
-
-def calculate_ear(landmarks, eye_points):
-    if not landmarks or max(eye_points) >= len(landmarks): return 999.0
-    points = [landmarks[i] for i in eye_points]
-    if any(lm is None for lm in points): return 999.0
-    top_y = (points[1].y + points[2].y) / 2
-    bottom_y = (points[4].y + points[5].y) / 2
-    horizontal_dist = abs(points[3].x - points[0].x)
-    if horizontal_dist == 0: return 999.0
-    return abs(top_y - bottom_y) / horizontal_dist
-
-# --- Thread 1: Camera Capture (CORRECTED) ---
-def camera_thread_func(camera_index, frame_read_delay):
-    print("Camera Thread: Starting.")
-    
-    # Cross-Platform Camera Backend Logic
-    if os.name == 'nt': # Windows
-        camera_backend = cv2.CAP_DSHOW
-    else: # macOS, Linux, etc.
-        camera_backend = cv2.CAP_ANY
-        
-    cap = cv2.VideoCapture(camera_index, camera_backend) # Use the argument here
-    
-    if not cap.isOpened():
-        print(f"Camera Thread: CRITICAL ERROR - Could not open video device {camera_index}.")
-        stop_event.set()
-        return
-
-    while not stop_event.is_set():
-        ret, frame = cap.read()
-        if not ret:
-            print("Camera Thread: WARNING - Failed to grab frame.")
-            time.sleep(frame_read_delay) # Use the argument here
-            continue
-        
-        try:
-            # Drop the old frame and put the new one to keep data fresh
-            frame_queue.get_nowait()
-        except queue.Empty:
-            pass
-        frame_queue.put(frame)
-    
-    cap.release()
-    print("Camera Thread: Finished.")
-
-# --- Thread 2: Detection and Logic ---
-def detection_and_logic_thread_func(model_path):
-    print("Detector/Logic Thread: Starting.")
-    
-    pyautogui.MINIMUM_DURATION = 0.0
-    pyautogui.MINIMUM_SLEEP = 0.0
-    pyautogui.PAUSE = 0.0
-    pyautogui.FAILSAFE = False
-    
-    left_ear_queue, right_ear_queue = deque(maxlen=WINK_EAR_SMOOTH_WINDOW), deque(maxlen=WINK_EAR_SMOOTH_WINDOW)
-    wink_text_display, wink_text_timer = "", 0
-    left_frame, right_frame = 0, 0
-    last_left_wink, last_right_wink = 0, 0
-    left_wink_in_progress, right_wink_in_progress = False, False
-
-    def trigger_click(is_right_click=False):
-        if is_right_click: pyautogui.rightClick()
-        else: pyautogui.click()
-
-    try:
-        base_options = python.BaseOptions(model_asset_path=model_path)
-        options = vision.FaceLandmarkerOptions(
-            base_options=base_options, output_face_blendshapes=False,
-            output_facial_transformation_matrixes=True, num_faces=1)
-        landmarker = vision.FaceLandmarker.create_from_options(options)
-        print("Detector/Logic Thread: FaceLandmarker initialized successfully.")
-    except Exception as e:
-        print(f"Detector/Logic Thread: CRITICAL ERROR - Failed to initialize FaceLandmarker: {e}")
+startup = StartupTimeline(STARTED_AT)
+
+Outputs = collections.namedtuple("Outputs", "cursor_actuator preview_mode preview_throttle preview_publisher control_channel")
+
+def open_outputs(settings_store):
+    """Everything that leaves the process. Opening them claims the input backend
+    and binds the preview and control sockets, so main() (or a benchmark) does
+    it, never the import."""
+    # Cursor output runs on its own thread at WINKS_CURSOR_RATE_HZ (default 120 Hz); see cursor_actuator.py.
+    # WINKS_INPUT_BACKEND picks how events reach the OS; see input_backends.py
+    cursor_actuator = CursorActuator(open_input_backend(input_backend_from_env()), cursor_rate_from_env())
+    # The preview is off unless WINKS_PREVIEW asks for it: "window" hands frames to the main thread,
+    # "stream" to a PreviewPublisher that Electron reads from; see preview.py
+    # Only a client holding this launch's WINKS_SESSION_TOKEN gets into either socket (session_token.py)
+    token = session_token_from_env()
+    preview_mode = preview_mode_from_env()
+    preview_throttle = PreviewThrottle(preview_fps_from_env()) if preview_mode == "window" else None
+    preview_publisher = PreviewPublisher(token, preview_fps_from_env()) if preview_mode == "stream" else None
+    # Framed commands with acks, events and coalesced pose samples for Electron; see control_channel.py
+    control_channel = ControlChannel(lambda command: handle_command(command, settings_store, "Control Channel"), token)
+    return Outputs(cursor_actuator, preview_mode, preview_throttle, preview_publisher, control_channel)
+
+def build_pipeline(model_path, settings_store, outputs):
+    """The stages after detect, wired to the outputs from open_outputs().
+    Which executor runs them (and detection) is chosen by WINKS_EXECUTOR; see pipeline_executors.py"""
+    latency_target = latency_target_from_env()
+    return Pipeline(
+        model_path, settings_store,
+        pose=PoseStage(), wink=WinkStage(), actuate=ActuateStage(outputs.cursor_actuator),
+        publish=PublishStage(outputs.control_channel, outputs.preview_publisher, outputs.preview_throttle,
+                             result_queue if outputs.preview_throttle else None),
+        idle_scheduler=ActivityScheduler() if idle_mode_enabled_from_env() else None,
+        startup=startup,
+        recorder=TraceRecorder(trace_path_from_env()) if trace_path_from_env() else None,
+        quality=QualityController(latency_target) if latency_target else None)
+
+
+# --- Commands from Electron (stdin or the control channel) ---
+def handle_command(command, settings_store, source):
+    """Apply one command dict. Raises ValueError if it is unknown or invalid."""
+    if command.get("type") == "stop":
+        print(f"{source}: Received stop command. Signaling stop.")
         stop_event.set()
         return
-
-    while not stop_event.is_set():
-        try:
-            frame_bgr = frame_queue.get(timeout=1)
-            
-            frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
-            mp_image = mp.Image(image_format=mp.ImageFormat.SRGB, data=frame_rgb)
-            detection_result = landmarker.detect(mp_image)
-
-            current_physical_yaw, current_physical_pitch = 0.0, 0.0
-            
-            if wink_text_display and (time.time() - wink_text_timer > 1):
-                wink_text_display = ""
-
-            if detection_result and detection_result.facial_transformation_matrixes:
-                matrix = np.array(detection_result.facial_transformation_matrixes[0]).reshape(4,4)[:3,:3]
-                current_physical_yaw, current_physical_pitch = rotation_matrix_to_identified_physical_angles(matrix)
-                
-                mouse_dx, mouse_dy = 0, 0
-                if abs(current_physical_yaw) > DEAD_ZONE_DEGREES:
-                    eff_yaw = current_physical_yaw - (DEAD_ZONE_DEGREES * np.sign(current_physical_yaw))
-                    spd_yaw = max(-1.0, min(1.0, eff_yaw / MAX_JOYSTICK_TILT_ANGLE))
-                    mouse_dx = -(spd_yaw * SENSITIVITY_PHYSICAL_YAW)
-                
-                if abs(current_physical_pitch) > DEAD_ZONE_DEGREES:
-                    eff_pitch = current_physical_pitch - (DEAD_ZONE_DEGREES * np.sign(current_physical_pitch))
-                    spd_pitch = max(-1.0, min(1.0, eff_pitch / MAX_JOYSTICK_TILT_ANGLE))
-                    mouse_dy = spd_pitch * SENSITIVITY_PHYSICAL_PITCH
-                
-                if mouse_dx != 0 or mouse_dy != 0:
-                    pyautogui.move(int(mouse_dx), int(mouse_dy), duration=0)
-
-            if detection_result and detection_result.face_landmarks:
-                landmarks = detection_result.face_landmarks[0]
-                left_ear_queue.append(calculate_ear(landmarks, WINK_LEFT_EYE_LANDMARKS))
-                right_ear_queue.append(calculate_ear(landmarks, WINK_RIGHT_EYE_LANDMARKS))
-
-                if len(left_ear_queue) == WINK_EAR_SMOOTH_WINDOW:
-                    left_ear = sum(left_ear_queue) / len(left_ear_queue)
-                    right_ear = sum(right_ear_queue) / len(right_ear_queue)
-                    current_time = time.time()
-
-                    if left_ear < WINK_L_WINK_RATIO and right_ear > WINK_R_WINK_RATIO + 0.02:
-                        left_frame += 1
-                        if left_frame >= WINK_SUCC_FRAME and not left_wink_in_progress and (current_time - last_left_wink) > WINK_COOLDOWN:
-                            left_wink_in_progress, last_left_wink, wink_text_timer = True, current_time, current_time
-                            trigger_click(is_right_click=False)
-                            wink_text_display = "Left Wink!"
-                    else:
-                        left_frame, left_wink_in_progress = 0, False
-                    
-                    if right_ear < WINK_R_WINK_RATIO and left_ear > WINK_L_WINK_RATIO + 0.02:
-                        right_frame +=1
-                        if right_frame >= WINK_SUCC_FRAME and not right_wink_in_progress and (current_time - last_right_wink) > WINK_COOLDOWN:
-                            right_wink_in_progress, last_right_wink, wink_text_timer = True, current_time, current_time
-                            trigger_click(is_right_click=True)
-                            wink_text_display = "Right Wink!"
-                    else:
-                        right_frame, right_wink_in_progress = 0, False
-            try:
-                result_queue.put_nowait((frame_bgr, detection_result, current_physical_yaw, current_physical_pitch, wink_text_display, wink_text_timer))
-            except queue.Full:
-                pass
-        
-        except queue.Empty:
-            continue
-
-    landmarker.close()
-    print("Detector/Logic Thread: Finished.")
+    settings = apply_settings_command(settings_store, command)
+    if settings is None:
+        raise ValueError(f"unknown command type {command.get('type')!r}")
+    print(f"{source}: Applied {command.get('type')} (settings version {settings.version}).")
 
 # --- Stdin Listener Thread ---
-def stdin_listener_thread_func():
+def stdin_listener_thread_func(settings_store):
     print("Stdin Listener: Thread starting.")
     while not stop_event.is_set():
         try:
@@ -206,16 +111,37 @@ def stdin_listener_thread_func():
                 stop_event.set()
                 break
             command = json.loads(line.strip())
-            if isinstance(command, dict) and command.get("type") == "stop":
-                print("Stdin Listener: Received stop command. Signaling stop.")
-                stop_event.set()
-                break
+            if not isinstance(command, dict):
+                continue
+            try:
+                handle_command(command, settings_store, "Stdin Listener")
+            except ValueError as e:
+                print(f"Stdin Listener: Ignoring {command.get('type')}: {e}")
         except (json.JSONDecodeError, AttributeError, TypeError):
             continue
     print("Stdin Listener: Finished.")
 
+def report_first_cursor_move(cursor_actuator):
+    """Emit first_cursor_move once the cursor thread has moved the cursor; call it regularly."""
+    if cursor_actuator.first_move_at is not None and "first_cursor_move" not in startup.marks:
+        startup.mark("first_cursor_move", cursor_actuator.first_move_at)
+        emit_event("first_cursor_move", started_at=startup.started_at, startup_s=startup.seconds())
+
+def watch_pipeline(executor, supervisor):
+    """Stop once the frame stream has ended or the detector cannot be restarted; call it regularly."""
+    if stop_event.is_set():
+        return
+    if executor.finished:
+        print("Main Thread: Pipeline finished.")
+        stop_event.set()
+    elif not supervisor.check():
+        stop_event.set()
+
 # --- Main Thread: Display and Orchestration ---
-if __name__ == '__main__':
+def main(initial_settings=STARTING_SETTINGS):
+    """Run the app until stopped, starting from initial_settings
+    (head_tracking.py starts with winks disabled)."""
+    use_line_writer() # Log lines and events from every thread stay whole on stdout (see telemetry.py)
     print("Main Thread: Application starting.")
     
     if len(sys.argv) > 1:
@@ -226,60 +152,73 @@ if __name__ == '__main__':
         print(f"WARNING: No model path provided. Using default: {model_path_to_use}")
 
     signal.signal(signal.SIGINT, lambda s, f: (print("\nSIGINT received, stopping."), stop_event.set()))
-
-    cam_thread = threading.Thread(target=camera_thread_func, args=(CAMERA_INDEX, FRAME_READ_RETRY_DELAY), daemon=True)
-    detector_thread = threading.Thread(target=detection_and_logic_thread_func, args=(model_path_to_use,), daemon=True)
-    stdin_thread = threading.Thread(target=stdin_listener_thread_func, daemon=True)
+    # WINKS_MAX_CORES, WINKS_CV_THREADS and WINKS_PRIORITY; applied before any thread starts (see cpu_budget.py)
+    cpu_budget = cpu_budget_from_env().apply()
+    print(f"Main Thread: CPU budget: {cpu_budget.describe()}.")
+
+    # WINKS_FRAME_SOURCE replays a video file or image directory instead of the camera (see frame_sources.py)
+    frame_source_spec = os.environ.get("WINKS_FRAME_SOURCE")
+    frame_source = open_frame_source(frame_source_spec, realtime=True) if frame_source_spec else CameraSource(CAMERA_INDEX)
+    settings_store = SettingsStore(initial_settings)
+    outputs = open_outputs(settings_store)
+    cursor_actuator = outputs.cursor_actuator
+    pipeline = build_pipeline(model_path_to_use, settings_store, outputs)
+
+    # Rolling per-stage timings and the quality level, reported to Electron as latency_stats events
+    stats = StageStats(max_samples=TELEMETRY_WINDOW_SAMPLES)
+    latency_reporter = LatencyReporter(
+        stats, source="head_wink_combined",
+        extra_fields=(lambda: {"quality_level": pipeline.quality.level}) if pipeline.quality else None)
+
+    executor = create_executor(executor_from_env(), pipeline, frame_source, stop_event, stats)
+    print(f"Main Thread: Running the pipeline on the '{executor.name}' executor.")
+    if pipeline.quality:
+        print(f"Main Thread: Latency target {pipeline.quality.target_s * 1000:g} ms, starting at {pipeline.quality.describe()}.")
+    # Restarts a dead or stalled detector while capture and the cursor keep running
+    supervisor = DetectorSupervisor(executor, stats)
+    stdin_thread = threading.Thread(target=stdin_listener_thread_func, args=(settings_store,), daemon=True)
+    cursor_thread = threading.Thread(target=cursor_actuator.run, args=(stop_event, stats), daemon=True)
 
     print("Main Thread: Starting all background threads...")
-    cam_thread.start()
-    detector_thread.start()
+    outputs.control_channel.start(stop_event)
+    # Opening the camera and importing mediapipe for the detector overlap
+    executor.start()
     stdin_thread.start()
-    
-    mp_drawing = mp.solutions.drawing_utils
-    mp_face_mesh_module = mp.solutions.face_mesh
-
-    while not stop_event.is_set():
-        try:
-            display_package = result_queue.get(timeout=1)
-            
-            (frame_bgr, detection_result, 
-             current_physical_yaw, current_physical_pitch, 
-             wink_text_display, wink_text_timer) = display_package
-
-            if detection_result and detection_result.face_landmarks:
-                for single_face_landmarks in detection_result.face_landmarks:
-                    landmark_list_pb2 = landmark_pb2.NormalizedLandmarkList()
-                    landmark_list_pb2.landmark.extend([
-                        landmark_pb2.NormalizedLandmark(x=lm.x, y=lm.y, z=lm.z) for lm in single_face_landmarks
-                    ])
-                    mp_drawing.draw_landmarks(
-                        image=frame_bgr, landmark_list=landmark_list_pb2,
-                        connections=mp_face_mesh_module.FACEMESH_CONTOURS,
-                        landmark_drawing_spec=mp_drawing.DrawingSpec(color=(255, 0, 0), thickness=1, circle_radius=1),
-                        connection_drawing_spec=mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=1))
-
-            yaw_status = "Moving" if abs(current_physical_yaw) > DEAD_ZONE_DEGREES else "Dead Zone"
-            pitch_status = "Moving" if abs(current_physical_pitch) > DEAD_ZONE_DEGREES else "Dead Zone"
-            cv2.putText(frame_bgr, f"Yaw: {current_physical_yaw:.1f} ({yaw_status})", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0,0,255), 2)
-            cv2.putText(frame_bgr, f"Pitch: {current_physical_pitch:.1f} ({pitch_status})", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0,0,255), 2)
-            
-            if wink_text_display and (time.time() - wink_text_timer < 1):
-                cv2.putText(frame_bgr, wink_text_display, (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-
-            '''cv2.imshow("Winks Head Tracking", frame_bgr)
+    cursor_thread.start()
+    if outputs.preview_publisher:
+        outputs.preview_publisher.start(stop_event)
+
+    if outputs.preview_mode != "window":
+        # Headless: nothing to do per frame, just report and watch the detector
+        while not stop_event.wait(0.5):
+            latency_reporter.maybe_emit()
+            report_first_cursor_move(cursor_actuator)
+            watch_pipeline(executor, supervisor)
+    else:
+        preview_renderer = PreviewRenderer()
+        while not stop_event.is_set():
+            latency_reporter.maybe_emit()
+            report_first_cursor_move(cursor_actuator)
+            watch_pipeline(executor, supervisor)
+            try:
+                (frame_bgr, landmarks, current_physical_yaw, current_physical_pitch,
+                 dead_zone_degrees, wink_text) = result_queue.get(timeout=1)
+            except queue.Empty:
+                continue
+
+            preview_renderer.render(frame_bgr, landmarks, current_physical_yaw, current_physical_pitch,
+                                    dead_zone_degrees, wink_text)
+            cv2.imshow(PREVIEW_WINDOW_NAME, frame_bgr)
             if cv2.waitKey(1) & 0xFF == ord('q'):
                 print("Main Thread: 'q' pressed by user. Signaling stop.")
                 stop_event.set()
-                break'''
-        except queue.Empty:
-            if not detector_thread.is_alive() and not stop_event.is_set():
-                print("Main Thread: Detector thread died unexpectedly.")
-                stop_event.set()
-            continue
 
     print("Main Thread: Cleaning up...")
     cv2.destroyAllWindows()
-    cam_thread.join(timeout=2)
-    detector_thread.join(timeout=2)
-    print("Main Thread: Application finished.")
\ No newline at end of file
+    executor.join(timeout=2)
+    cursor_thread.join(timeout=2)
+    cursor_actuator.backend.close()
+    print("Main Thread: Application finished.")
+
+if __name__ == '__main__':
+    main()
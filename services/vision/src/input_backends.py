@@ -0,0 +1,213 @@
+# input_backends.py
+# OS input injection for the cursor thread. Every backend exposes the same
+# move(dx, dy) / click() / rightClick() / close() calls, so CursorActuator and
+# the pipeline do not care how events reach the OS:
+#
+#   pyautogui - the portable default on Windows and macOS. Each relative move
+#               validates its arguments and reads the cursor position first,
+#               which on X11 is an extra server round trip per call
+#   xtest     - X11 XTest fake input through python-xlib: relative motion and
+#               button events are queued and flushed, with no reply to wait for
+#   uinput    - a virtual mouse on /dev/uinput (Linux, also works under
+#               Wayland); one write() per move. Needs write access to
+#               /dev/uinput (e.g. a udev rule for the input group)
+#   null      - RecordingBackend: counts and records calls, touches nothing;
+#               used by tests and benchmarks
+#
+# The backend is chosen at startup with the WINKS_INPUT_BACKEND environment
+# variable. "auto" (the default) picks uinput on Wayland, xtest on X11 and
+# pyautogui everywhere else, and falls back to pyautogui if the direct backend
+# cannot be opened. bench/input_backend_benchmark.py measures per-call cost and
+# the highest event rate each backend sustains.
+
+import os
+import struct
+import sys
+import time
+from collections import deque
+
+INPUT_BACKENDS = ("auto", "pyautogui", "xtest", "uinput", "null")
+DEFAULT_INPUT_BACKEND = "auto"
+
+def input_backend_from_env():
+    kind = os.environ.get("WINKS_INPUT_BACKEND", DEFAULT_INPUT_BACKEND).strip().lower()
+    if kind not in INPUT_BACKENDS:
+        print(f"WARNING: Unknown WINKS_INPUT_BACKEND '{kind}', using '{DEFAULT_INPUT_BACKEND}'.")
+        return DEFAULT_INPUT_BACKEND
+    return kind
+
+# --- pyautogui ---
+class PyAutoGuiBackend:
+    name = "pyautogui"
+
+    def __init__(self):
+        import pyautogui
+        pyautogui.MINIMUM_DURATION = 0.0
+        pyautogui.MINIMUM_SLEEP = 0.0
+        pyautogui.PAUSE = 0.0
+        pyautogui.FAILSAFE = False
+        self._pyautogui = pyautogui
+
+    def move(self, dx, dy):
+        self._pyautogui.move(dx, dy, duration=0)
+
+    def click(self):
+        self._pyautogui.click()
+
+    def rightClick(self):
+        self._pyautogui.rightClick()
+
+    def close(self):
+        pass
+
+# --- X11 XTest ---
+class XTestBackend:
+    name = "xtest"
+
+    def __init__(self, display_name=None):
+        from Xlib import X, display
+        from Xlib.ext import xtest
+        self._display = display.Display(display_name)
+        if not self._display.has_extension("XTEST"):
+            self._display.close()
+            raise RuntimeError("X server has no XTEST extension")
+        self._fake_input = xtest.fake_input
+        self._motion, self._press, self._release = X.MotionNotify, X.ButtonPress, X.ButtonRelease
+
+    def move(self, dx, dy):
+        # detail=True makes the motion relative to the current pointer position
+        self._fake_input(self._display, self._motion, detail=True, x=dx, y=dy)
+        self._display.flush()
+
+    def _button(self, button):
+        self._fake_input(self._display, self._press, button)
+        self._fake_input(self._display, self._release, button)
+        self._display.flush()
+
+    def click(self):
+        self._button(1)
+
+    def rightClick(self):
+        self._button(3)
+
+    def sync(self):
+        """Wait until the X server has processed every event sent so far."""
+        self._display.sync()
+
+    def close(self):
+        self._display.close()
+
+# --- Linux uinput ---
+# From linux/uinput.h and linux/input-event-codes.h
+_UI_SET_EVBIT, _UI_SET_KEYBIT, _UI_SET_RELBIT = 0x40045564, 0x40045565, 0x40045566
+_UI_DEV_CREATE, _UI_DEV_DESTROY = 0x5501, 0x5502
+_EV_SYN, _EV_KEY, _EV_REL = 0x00, 0x01, 0x02
+_SYN_REPORT, _REL_X, _REL_Y = 0x00, 0x00, 0x01
+_BTN_LEFT, _BTN_RIGHT = 0x110, 0x111
+_BUS_VIRTUAL = 0x06
+_INPUT_EVENT = struct.Struct("llHHi")  # struct input_event: timeval, type, code, value
+_USER_DEV = struct.Struct("80sHHHHi" + "64i" * 4)  # struct uinput_user_dev
+
+class UinputBackend:
+    name = "uinput"
+
+    def __init__(self, path="/dev/uinput"):
+        import fcntl
+        self._fd = os.open(path, os.O_WRONLY | os.O_NONBLOCK)
+        try:
+            fcntl.ioctl(self._fd, _UI_SET_EVBIT, _EV_KEY)
+            fcntl.ioctl(self._fd, _UI_SET_EVBIT, _EV_REL)
+            for button in (_BTN_LEFT, _BTN_RIGHT):
+                fcntl.ioctl(self._fd, _UI_SET_KEYBIT, button)
+            for axis in (_REL_X, _REL_Y):
+                fcntl.ioctl(self._fd, _UI_SET_RELBIT, axis)
+            os.write(self._fd, _USER_DEV.pack(b"Winks virtual mouse", _BUS_VIRTUAL, 0x1, 0x1, 1, 0, *([0] * 256)))
+            fcntl.ioctl(self._fd, _UI_DEV_CREATE)
+        except OSError:
+            os.close(self._fd)
+            raise
+        self._ioctl = fcntl.ioctl
+        self._syn = _INPUT_EVENT.pack(0, 0, _EV_SYN, _SYN_REPORT, 0)
+
+    def move(self, dx, dy):
+        # Axes and the SYN_REPORT that closes them go out in a single write
+        events = []
+        if dx:
+            events.append(_INPUT_EVENT.pack(0, 0, _EV_REL, _REL_X, dx))
+        if dy:
+            events.append(_INPUT_EVENT.pack(0, 0, _EV_REL, _REL_Y, dy))
+        if events:
+            events.append(self._syn)
+            os.write(self._fd, b"".join(events))
+
+    def _button(self, button):
+        os.write(self._fd, b"".join((
+            _INPUT_EVENT.pack(0, 0, _EV_KEY, button, 1), self._syn,
+            _INPUT_EVENT.pack(0, 0, _EV_KEY, button, 0), self._syn)))
+
+    def click(self):
+        self._button(_BTN_LEFT)
+
+    def rightClick(self):
+        self._button(_BTN_RIGHT)
+
+    def close(self):
+        try:
+            self._ioctl(self._fd, _UI_DEV_DESTROY)
+        finally:
+            os.close(self._fd)
+
+# --- Recording (no OS input) ---
+class RecordingBackend:
+    """Counts every call in calls and keeps the latest (perf_counter, name, args)
+    in events. Never touches the real cursor."""
+    name = "null"
+
+    def __init__(self, max_events=10000):
+        self.calls = {"move": 0, "click": 0, "rightClick": 0}
+        self.events = deque(maxlen=max_events)
+
+    def _record(self, name, args):
+        self.calls[name] += 1
+        self.events.append((time.perf_counter(), name, args))
+
+    def move(self, dx, dy):
+        self._record("move", (dx, dy))
+
+    def click(self):
+        self._record("click", ())
+
+    def rightClick(self):
+        self._record("rightClick", ())
+
+    def close(self):
+        pass
+
+INPUT_BACKEND_CLASSES = {"pyautogui": PyAutoGuiBackend, "xtest": XTestBackend, "uinput": UinputBackend, "null": RecordingBackend}
+
+def _auto_candidates():
+    if not sys.platform.startswith("linux"):
+        return ("pyautogui",)
+    if os.environ.get("WAYLAND_DISPLAY"):
+        return ("uinput", "xtest", "pyautogui")  # XTest through XWayland only reaches X clients
+    if os.environ.get("DISPLAY"):
+        return ("xtest", "uinput", "pyautogui")
+    return ("uinput", "pyautogui")
+
+def open_input_backend(kind=DEFAULT_INPUT_BACKEND):
+    """Open the requested backend, or for "auto" the first one that works on this
+    machine. A direct backend that fails to open falls back to pyautogui."""
+    candidates = _auto_candidates() if kind == "auto" else (kind,)
+    if candidates[-1] != "pyautogui" and kind != "null":
+        candidates += ("pyautogui",)
+    for candidate in candidates:
+        try:
+            backend = INPUT_BACKEND_CLASSES[candidate]()
+        except Exception as e:
+            if candidate == "pyautogui":
+                raise
+            if kind != "auto":
+                print(f"WARNING: Could not open the {candidate} input backend ({e}), using pyautogui.")
+            continue
+        print(f"Input: using the {backend.name} backend.")
+        return backend
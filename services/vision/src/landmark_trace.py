@@ -0,0 +1,132 @@
+# landmark_trace.py
+# Record what the detector saw, then replay it through the pose and wink logic
+# without a camera or MediaPipe.
+#
+# WINKS_TRACE=path makes the pipeline append one TRACE_DTYPE record per frame
+# that reaches the logic stages: capture time, the time the frame was handled
+# (so pose prediction replays with the same lead), the 4x4 facial
+# transformation matrix and the (N,3) landmarks. Records are fixed-size and
+# aligned behind a TRACE_HEADER, so the file is append-only (a crash costs at
+# most the last, partial record) and open_trace() maps it straight into a
+# NumPy structured array. At 478 landmarks a record is ~5.8 KB, ~170 KB per
+# second of tracking.
+#
+# replay_trace() runs the recorded frames through PoseStage and WinkDetector
+# with the given settings. The geometry kernels run once over the whole trace
+# (face_geometry.py broadcasts over leading dimensions), so only the filter
+# and state machine run per frame; a minute of tracking replays in
+# milliseconds. bench/trace_replay.py wraps it for regression runs.
+
+import os
+import struct
+import numpy as np
+from face_geometry import eye_aspect_ratios, yaw_pitch_degrees
+
+TRACE_HEADER = struct.Struct("<4sIII")   # magic, version, landmark count, record bytes
+TRACE_MAGIC = b"WKTR"
+TRACE_VERSION = 1
+TRACE_LANDMARKS = 478
+TRACE_SUFFIX = ".wktrace"
+
+def trace_dtype(landmark_count=TRACE_LANDMARKS):
+    return np.dtype([
+        ("captured_at", "<f8"),
+        ("processed_at", "<f8"),
+        ("matrix", "<f4", (4, 4)),
+        ("landmarks", "<f4", (landmark_count, 3)),
+        ("has_matrix", "?"),
+        ("has_landmarks", "?"),
+    ], align=True)
+
+TRACE_DTYPE = trace_dtype()
+
+def trace_path_from_env():
+    path = os.environ.get("WINKS_TRACE", "").strip()
+    return path or None
+
+class TraceRecorder:
+    """Appends one record per frame to path, creating it with a header if needed."""
+
+    def __init__(self, path, landmark_count=TRACE_LANDMARKS):
+        self.path = path
+        self.dtype = trace_dtype(landmark_count)
+        self.frames = 0
+        self._record = np.zeros(1, dtype=self.dtype)
+        exists = os.path.exists(path) and os.path.getsize(path) >= TRACE_HEADER.size
+        if exists:
+            _read_header(path, landmark_count)
+            # Drop a partial record left by a crash, or every record after it would be misaligned
+            records = (os.path.getsize(path) - TRACE_HEADER.size) // self.dtype.itemsize
+            os.truncate(path, TRACE_HEADER.size + records * self.dtype.itemsize)
+        self._file = open(path, "ab")
+        if not exists:
+            self._file.write(TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, landmark_count, self.dtype.itemsize))
+
+    def record(self, captured_at, processed_at, landmarks, matrix):
+        record = self._record
+        has_landmarks = landmarks is not None and len(landmarks) == self.dtype["landmarks"].shape[0]
+        record["captured_at"] = captured_at
+        record["processed_at"] = processed_at
+        record["has_matrix"] = matrix is not None
+        record["has_landmarks"] = has_landmarks
+        record["matrix"] = matrix if matrix is not None else 0.0
+        record["landmarks"] = landmarks if has_landmarks else 0.0
+        self._file.write(record.tobytes())
+        self.frames += 1
+
+    def close(self):
+        self._file.close()
+
+def _read_header(path, landmark_count=None):
+    with open(path, "rb") as f:
+        magic, version, count, record_bytes = TRACE_HEADER.unpack(f.read(TRACE_HEADER.size))
+    if magic != TRACE_MAGIC or version != TRACE_VERSION:
+        raise ValueError(f"{path} is not a version {TRACE_VERSION} landmark trace")
+    if trace_dtype(count).itemsize != record_bytes or (landmark_count is not None and count != landmark_count):
+        raise ValueError(f"{path} has {count} landmarks per record, expected {landmark_count}")
+    return count
+
+def open_trace(path):
+    """Memory-map a trace as a read-only structured array (TRACE_DTYPE fields)."""
+    dtype = trace_dtype(_read_header(path))
+    frames = (os.path.getsize(path) - TRACE_HEADER.size) // dtype.itemsize
+    if frames == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=TRACE_HEADER.size, shape=(frames,))
+
+def replay_trace(trace, settings, pose=None, wink=None):
+    """Run a trace through the logic stages. Returns per-frame arrays
+    (captured_at, yaw, pitch, dx, dy, left_ear, right_ear) and the winks
+    as [(frame index, Wink)]. pose / wink default to fresh PoseStage() /
+    WinkDetector() with the filter picked by WINKS_POSE_FILTER."""
+    from pipeline_stages import PoseStage
+    from wink_detector import WinkDetector
+    pose = pose or PoseStage()
+    wink = wink or WinkDetector()
+    count = len(trace)
+    captured_at = np.asarray(trace["captured_at"])
+    processed_at = np.asarray(trace["processed_at"]).tolist()
+    has_matrix = np.asarray(trace["has_matrix"])
+    has_landmarks = np.asarray(trace["has_landmarks"])
+    raw_pose = yaw_pitch_degrees(trace["matrix"][:, :3, :3]).tolist()
+    ears = eye_aspect_ratios(trace["landmarks"]).tolist()
+    no_face = (0.0, 0.0, 0.0, 0.0)
+    output, winks = [], []
+    pose_map, wink_update = pose.map, wink.update
+    frames = zip(captured_at.tolist(), processed_at, has_matrix.tolist(), has_landmarks.tolist(), raw_pose, ears)
+    for index, (t, now, matrix_found, landmarks_found, (raw_yaw, raw_pitch), (left_ear, right_ear)) in enumerate(frames):
+        output.append(pose_map(raw_yaw, raw_pitch, t, settings, now) if matrix_found else no_face)
+        if landmarks_found:
+            event = wink_update(left_ear, right_ear, t, settings)
+            if event:
+                winks.append((index, event))
+        else:
+            wink.reset()
+    output = np.asarray(output, dtype=np.float64).reshape(count, 4)
+    ears = np.asarray(ears, dtype=np.float64).reshape(count, 2)
+    return {
+        "captured_at": captured_at,
+        "yaw": output[:, 0], "pitch": output[:, 1], "dx": output[:, 2], "dy": output[:, 3],
+        "left_ear": np.where(has_landmarks, ears[:, 0], np.nan), "right_ear": np.where(has_landmarks, ears[:, 1], np.nan),
+        "face": has_matrix,
+    }, winks
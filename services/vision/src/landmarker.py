@@ -0,0 +1,99 @@
+# landmarker.py
+# FaceLandmarker construction shared by every entry point, with a selectable
+# MediaPipe running mode:
+#
+#   image       - landmarker.detect() per frame; full face detection every time
+#   video       - detect_for_video() with capture timestamps; MediaPipe tracks the
+#                 face across frames and skips the detector while tracking holds
+#   live_stream - detect_async(); inference runs on MediaPipe's own thread and
+#                 detect() returns the newest finished result without waiting.
+#                 Only one frame is in flight at a time: frames that arrive while
+#                 the graph is busy are skipped, because feeding detect_async
+#                 faster than it drains blocks it while it holds the GIL, and the
+#                 result callback can then never run.
+#
+# The mode is chosen at startup with the WINKS_DETECTOR_MODE environment variable.
+#
+# mediapipe is imported by FaceLandmarkerRunner, not by this module: importing
+# it takes most of a second (its package __init__ pulls in the solutions API
+# and matplotlib), and DetectStage.open() in pipeline_stages.py does that
+# where detection runs, while the camera is opening instead of before anything
+# starts.
+
+import os
+import threading
+
+DETECTOR_MODES = ("image", "video", "live_stream")
+DEFAULT_DETECTOR_MODE = "video"
+
+_RUNNING_MODES = {"image": "IMAGE", "video": "VIDEO", "live_stream": "LIVE_STREAM"}
+
+def detector_mode_from_env():
+    mode = os.environ.get("WINKS_DETECTOR_MODE", DEFAULT_DETECTOR_MODE).strip().lower()
+    if mode not in DETECTOR_MODES:
+        print(f"WARNING: Unknown WINKS_DETECTOR_MODE '{mode}', using '{DEFAULT_DETECTOR_MODE}'.")
+        return DEFAULT_DETECTOR_MODE
+    return mode
+
+class FaceLandmarkerRunner:
+    """One detect(mp_image, timestamp_ms) call for all three running modes."""
+
+    def __init__(self, model_path, mode=DEFAULT_DETECTOR_MODE, num_faces=1):
+        if mode not in DETECTOR_MODES:
+            raise ValueError(f"Unknown detector mode '{mode}', expected one of {DETECTOR_MODES}")
+        from mediapipe.tasks import python
+        from mediapipe.tasks.python import vision
+        self.mode = mode
+        self.last_timestamp_ms = -1
+        self._latest_result = None
+        self._latest_timestamp_ms = -1
+        self._result_lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+        self.skipped_frames = 0
+
+        options = vision.FaceLandmarkerOptions(
+            base_options=python.BaseOptions(model_asset_path=model_path),
+            running_mode=getattr(vision.RunningMode, _RUNNING_MODES[mode]),
+            output_face_blendshapes=False,
+            output_facial_transformation_matrixes=True,
+            num_faces=num_faces,
+            result_callback=self._on_result if mode == "live_stream" else None)
+        self.landmarker = vision.FaceLandmarker.create_from_options(options)
+
+    def _on_result(self, detection_result, output_image, timestamp_ms):
+        with self._result_lock:
+            self._latest_result = detection_result
+            self._latest_timestamp_ms = timestamp_ms
+        self._idle.set()
+
+    def detect(self, mp_image, timestamp_ms):
+        """Run the landmarker on one frame. timestamp_ms is the capture time in
+        milliseconds; it is bumped if needed so MediaPipe always sees it increase.
+        In live_stream mode the returned result may belong to an earlier frame
+        (see latest_timestamp_ms) or be None before the first one finishes."""
+        if self.mode == "image":
+            return self.landmarker.detect(mp_image)
+
+        timestamp_ms = max(int(timestamp_ms), self.last_timestamp_ms + 1)
+        self.last_timestamp_ms = timestamp_ms
+        if self.mode == "video":
+            return self.landmarker.detect_for_video(mp_image, timestamp_ms)
+
+        if self._idle.is_set():
+            self._idle.clear()
+            self.landmarker.detect_async(mp_image, timestamp_ms)
+        else:
+            self.skipped_frames += 1
+        with self._result_lock:
+            return self._latest_result
+
+    @property
+    def latest_timestamp_ms(self):
+        with self._result_lock:
+            return self._latest_timestamp_ms
+
+    def close(self):
+        if self.mode == "live_stream":
+            self._idle.wait(timeout=1.0) # Let the in-flight frame finish before tearing the graph down
+        self.landmarker.close()
@@ -0,0 +1,112 @@
+# latest_value.py
+# A fan-out, latest-value channel between processes.
+#
+# A multiprocessing.Queue gives each item to exactly one reader and keeps every
+# item until somebody reads it. Neither suits pipeline results: the cursor must
+# not miss a detection because another reader took it first, and nobody wants
+# the detection from twenty frames ago. LatestValueChannel holds a single value
+# in shared memory instead:
+#
+#   publish(value)       overwrites the value and wakes every subscriber
+#   get(subscriber)      the newest value this subscriber has not taken yet
+#   dropped(subscriber)  values overwritten before this subscriber took them
+#   wait_taken()         waits until every subscriber (or one) has taken the current value
+#
+# Subscribers are fixed indices 0..subscribers-1, chosen when the channel is
+# built. Each one sees every value as long as it keeps up, and one that falls
+# behind skips straight to the newest; the drop counters live in shared memory
+# so any process can read them. A publisher that must not lose values (replay
+# at --pace max) calls wait_taken() before publishing.
+#
+# Values are pickled into a buffer of `capacity` bytes. None is an ordinary
+# value; the pipeline publishes it last to end the stream.
+
+import pickle
+import queue
+import time
+
+DEFAULT_CAPACITY = 64 * 1024
+
+class LatestValueChannel:
+    # A lock and plain semaphores rather than a multiprocessing.Condition:
+    # Condition.notify() waits for every sleeping reader to wake, so a reader
+    # killed while waiting would block the publisher forever. The semaphores
+    # are used as flags that never count past 1 (_signal()): otherwise they
+    # would grow by one per value (past SEM_VALUE_MAX, 32767 on macOS, in
+    # about 18 minutes at 30 FPS), and a reader would spin through the stale
+    # wakeups after every pause.
+
+    def __init__(self, context, subscribers=1, capacity=DEFAULT_CAPACITY):
+        """context is a multiprocessing context (or the multiprocessing module).
+        Build the channel before starting the processes that use it."""
+        self.subscribers = subscribers
+        self.capacity = capacity
+        self._lock = context.Lock()
+        self._wakeups = [context.Semaphore(0) for _ in range(subscribers)]  # Released by publish()
+        self._taken_signal = context.Semaphore(0)                            # Released by get()
+        self._buffer = context.RawArray("c", capacity)
+        self._size = context.RawValue("q", 0)
+        self._seq = context.RawValue("q", 0)       # Values published so far; 0 = none yet
+        self._taken = context.RawArray("q", subscribers)   # Last seq each subscriber took
+        self._dropped = context.RawArray("q", subscribers)
+
+    @property
+    def published(self):
+        return self._seq.value
+
+    def publish(self, value):
+        """Replace the current value. Returns how many subscribers never got the one it replaced."""
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(data) > self.capacity:
+            raise ValueError(f"Value of {len(data)} bytes does not fit a {self.capacity}-byte channel")
+        with self._lock:
+            seq = self._seq.value
+            missed = 0
+            for subscriber in range(self.subscribers):
+                if self._taken[subscriber] < seq:
+                    self._dropped[subscriber] += 1
+                    missed += 1
+            memoryview(self._buffer).cast("B")[:len(data)] = data
+            self._size.value = len(data)
+            self._seq.value = seq + 1
+            for wakeup in self._wakeups:
+                _signal(wakeup)
+        return missed
+
+    def get(self, subscriber, timeout=None):
+        """The newest value subscriber has not taken; raises queue.Empty after timeout seconds."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if self._seq.value > self._taken[subscriber]:
+                    self._taken[subscriber] = self._seq.value
+                    data = bytes(memoryview(self._buffer).cast("B")[:self._size.value])
+                    _signal(self._taken_signal)
+                    break
+            # A wakeup left over from a value already taken only costs another turn of this loop
+            if not self._wakeups[subscriber].acquire(timeout=_remaining(deadline)):
+                raise queue.Empty
+        return pickle.loads(data)
+
+    def wait_taken(self, timeout=None, subscriber=None):
+        """True once every subscriber (or just this one) has taken the current
+        value, False after timeout seconds. Meant for the one publisher."""
+        subscribers = range(self.subscribers) if subscriber is None else (subscriber,)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if all(self._taken[index] >= self._seq.value for index in subscribers):
+                    return True
+            if not self._taken_signal.acquire(timeout=_remaining(deadline)):
+                return False
+
+    def dropped(self, subscriber):
+        return self._dropped[subscriber]
+
+def _signal(semaphore):
+    """Set semaphore to 1 whatever it was; call with the channel's lock held."""
+    semaphore.acquire(False)
+    semaphore.release()
+
+def _remaining(deadline):
+    return None if deadline is None else max(deadline - time.monotonic(), 0.0)
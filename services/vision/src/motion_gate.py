@@ -0,0 +1,80 @@
+# motion_gate.py
+# Skip landmark inference on frames that have not changed.
+#
+# Before colour conversion and detection, the frame (or, once a face is known,
+# a padded box around it) is shrunk to a THUMBNAIL_SIZE grayscale thumbnail
+# and compared with the thumbnail of the last frame that was actually run
+# through the landmarker. If the mean absolute difference is below
+# MOTION_THRESHOLD grey levels, the previous landmark result is reused.
+#
+# Comparing against the last processed frame rather than the previous frame
+# means slow drift still adds up to a refresh. Inference is forced anyway
+# after MAX_REUSE reused frames in a row, and on every frame while an eye is
+# below its wink ratio, so a blink or wink is never confirmed from stale
+# landmarks and never missed for more than MAX_REUSE frames.
+#
+# Off by default; set WINKS_MOTION_GATE=1 to enable. Check
+# bench/motion_gate_eval.py on your own clips for the skip ratio and its
+# effect on wink detection before turning it on.
+
+import os
+import cv2
+import numpy as np
+
+THUMBNAIL_SIZE = (32, 24)  # (width, height)
+MOTION_THRESHOLD = 1.5     # Mean absolute grey-level difference that counts as a change
+MAX_REUSE = 2              # Reused frames in a row before inference is forced
+ROI_PADDING = 0.25         # Fraction of the landmark box added on every side
+
+def motion_gate_enabled_from_env():
+    return os.environ.get("WINKS_MOTION_GATE", "0").strip().lower() in ("1", "true", "on")
+
+class MotionGate:
+    """Call can_reuse(frame) before inference; after running inference call
+    update(frame, landmarks, hold) so the next frame is compared to this one."""
+
+    def __init__(self, threshold=MOTION_THRESHOLD, max_reuse=MAX_REUSE, use_roi=True, size=THUMBNAIL_SIZE):
+        self.threshold = threshold
+        self.max_reuse = max_reuse
+        self.use_roi = use_roi
+        self.size = size
+        self.box = None          # (x0, y0, x1, y1) in pixels, or None for the whole frame
+        self._reference = None
+        self._reused = 0
+        self._hold = True
+        self.last_difference = None
+
+    def _thumbnail(self, frame_bgr):
+        if self.box is not None:
+            x0, y0, x1, y1 = self.box
+            frame_bgr = frame_bgr[y0:y1, x0:x1]
+        small = cv2.resize(frame_bgr, self.size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.int16)
+
+    def can_reuse(self, frame_bgr):
+        """True if frame_bgr is close enough to the last processed frame to reuse its result."""
+        if self._hold or self._reference is None or self._reused >= self.max_reuse:
+            self.last_difference = None
+            return False
+        self.last_difference = float(np.abs(self._thumbnail(frame_bgr) - self._reference).mean())
+        if self.last_difference >= self.threshold:
+            return False
+        self._reused += 1
+        return True
+
+    def update(self, frame_bgr, landmarks=None, hold=False):
+        """Make frame_bgr the reference. landmarks ((N,3) normalized, or None)
+        moves the compared region to the face; hold=True forces inference on the
+        next frame (e.g. an eye is closing)."""
+        self.box = None
+        if self.use_roi and landmarks is not None:
+            height, width = frame_bgr.shape[:2]
+            (x0, y0), (x1, y1) = landmarks[:, :2].min(axis=0), landmarks[:, :2].max(axis=0)
+            pad_x, pad_y = (x1 - x0) * ROI_PADDING, (y1 - y0) * ROI_PADDING
+            box = (int(max(0.0, x0 - pad_x) * width), int(max(0.0, y0 - pad_y) * height),
+                   int(min(1.0, x1 + pad_x) * width), int(min(1.0, y1 + pad_y) * height))
+            if box[2] - box[0] >= self.size[0] and box[3] - box[1] >= self.size[1]:
+                self.box = box
+        self._reference = self._thumbnail(frame_bgr)
+        self._reused = 0
+        self._hold = hold
@@ -0,0 +1,419 @@
+# pipeline_executors.py
+# Where the stages in pipeline_stages.py run. WINKS_EXECUTOR picks one at
+# startup, so both layouts can be measured on the same machine
+# (bench/replay_benchmark.py --executor thread|process):
+#
+#   thread   - a capture thread, and one worker thread that runs detect and
+#              everything after it. Frames are handed over by reference.
+#   process  - capture in this process writes frames into a SharedFrameRing;
+#              a spawned detector process runs DetectStage on (slot, seq)
+#              messages and returns Detection tuples, and a consumer thread
+#              here runs pose -> publish. Detection gets a GIL of its own, at
+#              the cost of a process start and a few KB of IPC per frame.
+#              Both directions are LatestValueChannels (latest_value.py), so
+#              a message is overwritten rather than queued behind a newer one.
+#
+# Both feed one frame at a time with drop-oldest hand-off (or blocking hand-off
+# for replay at --pace max), skip frames the idle scheduler or the quality
+# level does not want on the capture thread, before they are handed over, and
+# end the stream with None.
+#
+# The detector side beats a heartbeat and can be restarted on its own with
+# restart_detector(), while capture and the logic stages keep running; see
+# detector_supervisor.py for when that happens.
+#
+# Each thread pins itself to the cores of its role (capture, detect, logic)
+# under the CPU budget, and the detector process applies the same budget; see
+# cpu_budget.py.
+
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+from cpu_budget import cpu_budget_from_env, pin_current_thread
+from detector_supervisor import HEARTBEAT_INTERVAL
+from latest_value import LatestValueChannel
+from pipeline_stages import DetectStage
+from shared_frame_ring import SharedFrameRing
+from stage_stats import StageStats
+from telemetry import LatencyReporter, StartupTimeline, TELEMETRY_WINDOW_SAMPLES, use_line_writer
+
+EXECUTORS = ("thread", "process")
+DEFAULT_EXECUTOR = "thread"
+FRAME_READ_RETRY_DELAY = 0.05
+FRAME_RING_SLOTS = 8
+REQUEST_CHANNEL_BYTES = 16 * 1024   # Ring spec, slot, seq and the settings snapshot
+RESULT_CHANNEL_BYTES = 64 * 1024    # A Detection with 478 landmarks pickles to ~7 KB
+DETECTOR, LOGIC = 0, 0              # Subscriber index of the request / result channel's only reader
+
+def executor_from_env():
+    name = os.environ.get("WINKS_EXECUTOR", DEFAULT_EXECUTOR).strip().lower()
+    if name not in EXECUTORS:
+        print(f"WARNING: Unknown WINKS_EXECUTOR '{name}', using '{DEFAULT_EXECUTOR}'.")
+        return DEFAULT_EXECUTOR
+    return name
+
+def create_executor(name, pipeline, frame_source, stop_event, stats=None, drop_stale_frames=True):
+    executor_class = ProcessExecutor if name == "process" else ThreadedExecutor
+    return executor_class(pipeline, frame_source, stop_event, stats, drop_stale_frames)
+
+class _Executor:
+    """Shared capture loop. Subclasses provide _deliver(), _end_of_stream()
+    and the detection side; start() runs everything in the background."""
+
+    name = None
+
+    def __init__(self, pipeline, frame_source, stop_event, stats=None, drop_stale_frames=True):
+        self.pipeline = pipeline
+        self.frame_source = frame_source
+        self.stop_event = stop_event
+        self.stats = stats
+        self.drop_stale_frames = drop_stale_frames
+        self.finished = False             # The stream ended or the pipeline was stopped; nothing to restart
+        self.last_detection_at = 0.0      # When the logic stages last handled a detection
+        self.detector_started_at = 0.0
+        self._threads = []
+
+    def _start_thread(self, target, *args):
+        thread = threading.Thread(target=target, args=args, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        return thread
+
+    def _hand_off(self, frame_queue, item):
+        if self.drop_stale_frames:
+            try:
+                # Drop the old frame and put the new one to keep data fresh
+                frame_queue.get_nowait()
+                if self.stats: self.stats.increment("frames_dropped")
+            except queue.Empty:
+                pass
+            frame_queue.put(item)
+            return
+        # Replay benchmarks measure throughput, so wait for the detector instead
+        while not self.stop_event.is_set():
+            try:
+                frame_queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _capture_loop(self):
+        pin_current_thread("capture")
+        frame_source, stats, startup = self.frame_source, self.stats, self.pipeline.startup
+        print(f"Camera Thread: Starting ({frame_source.describe()}).")
+        if not frame_source.open():
+            print(f"Camera Thread: CRITICAL ERROR - Could not open frame source {frame_source.describe()}.")
+            self.stop_event.set()
+            return
+        if startup: startup.mark("camera_open")
+
+        frame_seq = 0
+        stale_frames_dropped = 0
+        while not self.stop_event.is_set():
+            capture_start = time.perf_counter()
+            ret, frame = frame_source.read()
+            captured_at = time.perf_counter() # See telemetry.py for why perf_counter
+            if stats and getattr(frame_source, "stale_frames_dropped", 0) != stale_frames_dropped:
+                # Frames the camera had already queued, dropped before decoding (see camera_capture.py)
+                stats.increment("frames_stale_dropped", frame_source.stale_frames_dropped - stale_frames_dropped)
+                stale_frames_dropped = frame_source.stale_frames_dropped
+            if not ret:
+                if frame_source.exhausted:
+                    print("Camera Thread: Frame source exhausted.")
+                    self._end_of_stream()
+                    break
+                print("Camera Thread: WARNING - Failed to grab frame.")
+                time.sleep(FRAME_READ_RETRY_DELAY)
+                continue
+            frame_seq += 1
+            if startup: startup.mark("first_frame", captured_at)
+            if stats:
+                stats.record("capture", captured_at - capture_start)
+                stats.increment("frames_captured")
+            self._deliver(frame, frame_seq, captured_at)
+
+        frame_source.release()
+        print("Camera Thread: Finished.")
+
+# --- Threads only ---
+class ThreadedExecutor(_Executor):
+    name = "thread"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.frame_queue = queue.Queue(maxsize=2)
+        self.ready_event = threading.Event()
+        self._worker = None
+        self._generation = 0 # Bumped by every restart; a superseded worker stops at its next frame
+        self._heartbeat = 0.0
+
+    def start(self):
+        # Worker first: importing mediapipe there overlaps with opening the camera
+        self._start_worker()
+        self._start_thread(self._capture_loop)
+
+    def _start_worker(self):
+        self._generation += 1
+        self.detector_started_at = self._heartbeat = time.perf_counter()
+        self._worker = self._start_thread(self._worker_loop, self._generation)
+
+    def is_alive(self):
+        return self._worker is not None and self._worker.is_alive()
+
+    def detector_alive(self):
+        return self.is_alive()
+
+    def detector_ready(self):
+        return self.ready_event.is_set()
+
+    def heartbeat(self):
+        return self._heartbeat
+
+    def restart_detector(self):
+        # A worker stuck in MediaPipe cannot be killed; it is left behind and drops whatever it returns with
+        self.ready_event.clear()
+        self._start_worker()
+
+    def join(self, timeout=None):
+        for thread in self._threads:
+            thread.join(timeout)
+        if not self.finished and not self.is_alive():
+            # The detector died and was not restarted, so its worker never wrapped up the pipeline
+            self.finished = True
+            self.pipeline.finish()
+
+    def _deliver(self, frame, frame_seq, captured_at):
+        if not self.pipeline.should_process(captured_at, self.stats):
+            return # Skipped here, so an idle frame never takes the place of one that is wanted
+        self._hand_off(self.frame_queue, (frame, frame_seq, captured_at))
+
+    def _end_of_stream(self):
+        self.frame_queue.put(None) # Tell the detector there is nothing more to come
+
+    def _worker_loop(self, generation):
+        pin_current_thread("detect") # Logic runs here too, but detection is most of the work
+        print("Detector/Logic Thread: Starting.")
+        pipeline, stats = self.pipeline, self.stats
+        try:
+            detect = DetectStage(pipeline.model_path, pipeline.detector_mode).open(pipeline.startup)
+            print(f"Detector/Logic Thread: FaceLandmarker initialized successfully ({detect.landmarker.mode} mode).")
+        except Exception as e:
+            print(f"Detector/Logic Thread: CRITICAL ERROR - Failed to initialize FaceLandmarker: {e}")
+            self.ready_event.set() # Dead rather than loading; the supervisor decides whether to retry
+            return
+        self.ready_event.set()
+
+        while not self.stop_event.is_set() and generation == self._generation:
+            self._heartbeat = time.perf_counter()
+            try:
+                frame_package = self.frame_queue.get(timeout=HEARTBEAT_INTERVAL)
+            except queue.Empty:
+                continue
+            if frame_package is None:
+                print("Detector/Logic Thread: End of frame stream.")
+                break
+            frame_bgr, frame_seq, captured_at = frame_package
+            settings = pipeline.settings_store.snapshot()
+            try:
+                detection = detect.process(frame_bgr, captured_at, settings, stats,
+                                           pipeline.inference_width, pipeline.open_thresholds(settings))
+            except Exception as e:
+                print(f"Detector/Logic Thread: CRITICAL ERROR - Detection failed: {e}")
+                detect.close()
+                return
+            if generation != self._generation:
+                break # Replaced while stuck in detection; this result is too old to use
+            pipeline.handle(frame_bgr, captured_at, detection, stats)
+            self.last_detection_at = time.perf_counter()
+
+        detect.close()
+        if generation != self._generation:
+            print("Detector/Logic Thread: Replaced by a restarted detector.")
+            return
+        self.finished = True
+        pipeline.finish()
+        print("Detector/Logic Thread: Finished.")
+
+# --- Detector in its own process ---
+def detector_process_main(model_path, detector_mode, requests, results, stop_event, ready_event, heartbeat,
+                          lossless=False):
+    """Runs in the spawned detector process. Requests are (ring spec, slot,
+    seq, captured_at, settings, inference_width, open_thresholds); the spec
+    rides along because any single request may be overwritten before it is
+    read. Results are ("startup", marks) once, then (slot, seq, captured_at,
+    Detection). None ends the stream both ways. lossless waits for the
+    consumer to take each result instead of overwriting it. heartbeat is a
+    shared double set to perf_counter() on every loop turn."""
+    use_line_writer() # Our stdout is the parent's pipe; keep our lines whole in it
+    print(f"Process 2 (PID: {os.getpid()}): Face Detector starting.")
+    signal.signal(signal.SIGINT, signal.SIG_IGN) # The parent handles Ctrl+C and stops us through the queue
+    cpu_budget_from_env().apply() # Before MediaPipe starts its threads
+    pin_current_thread("detect")
+    stats = StageStats(max_samples=TELEMETRY_WINDOW_SAMPLES)
+    latency_reporter = LatencyReporter(stats, source="head_wink_combined.detector", histogram_stages=())
+    frame_ring = None
+    startup = StartupTimeline() # perf_counter is system-wide, so the parent can merge these marks
+    try:
+        detect = DetectStage(model_path, detector_mode).open(startup)
+        print(f"Process 2: FaceLandmarker initialized successfully ({detect.landmarker.mode} mode).")
+    except Exception as e:
+        print(f"Process 2: CRITICAL ERROR - Failed to initialize FaceLandmarker: {e}")
+        ready_event.set()
+        raise SystemExit(1) # A failure, unlike the clean exit at the end; the parent's supervisor decides whether to retry
+    results.publish(("startup", startup.marks))
+    results.wait_taken(timeout=1.0) # The first detection must not overwrite the marks
+    ready_event.set()
+
+    def publish(result):
+        while lossless and not results.wait_taken(timeout=0.1) and not stop_event.is_set():
+            pass
+        results.publish(result)
+
+    while not stop_event.is_set():
+        heartbeat.value = time.perf_counter()
+        latency_reporter.maybe_emit()
+        try:
+            request = requests.get(DETECTOR, timeout=0.1)
+        except queue.Empty:
+            continue
+        if request is None:
+            print("Process 2: End of frame stream.")
+            break
+        ring_spec, slot, frame_seq, captured_at, settings, inference_width, open_thresholds = request
+        if frame_ring is None:
+            frame_ring = SharedFrameRing.attach(ring_spec)
+        # Detect straight out of shared memory; the result only counts if the slot was not rewritten meanwhile
+        detection = detect.process(frame_ring.view(slot), captured_at, settings, stats, inference_width, open_thresholds)
+        if not frame_ring.is_current(slot, frame_seq):
+            stats.increment("frames_overwritten")
+            continue
+        stats.increment("frames_processed")
+        publish((slot, frame_seq, captured_at, detection))
+
+    publish(None)
+    detect.close()
+    if frame_ring:
+        frame_ring.close()
+    print("Process 2: Face Detector finished.")
+
+class ProcessExecutor(_Executor):
+    name = "process"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # spawn on every platform: forking a process that already runs threads is unsafe
+        self._context = multiprocessing.get_context("spawn")
+        self.ready_event = self._context.Event()
+        self._child_stop = self._context.Event()
+        self._heartbeat = self._context.RawValue("d", 0.0)
+        self._new_process()
+        self.frame_ring = None
+        self._consumer = None
+
+    def _new_process(self):
+        # Fresh channels too: a killed child may have died holding a channel's lock.
+        # Only (slot, seq, ...) travels on them; the pixels stay in the ring.
+        self.requests = LatestValueChannel(self._context, capacity=REQUEST_CHANNEL_BYTES)
+        self.results = LatestValueChannel(self._context, capacity=RESULT_CHANNEL_BYTES)
+        self._process = self._context.Process(
+            target=detector_process_main,
+            args=(self.pipeline.model_path, self.pipeline.detector_mode, self.requests, self.results,
+                  self._child_stop, self.ready_event, self._heartbeat, not self.drop_stale_frames),
+            daemon=True)
+
+    def _start_process(self):
+        self.detector_started_at = self._heartbeat.value = time.perf_counter()
+        self._process.start()
+
+    def start(self):
+        # The child imports mediapipe and loads the model while the camera opens
+        self._start_process()
+        self._consumer = self._start_thread(self._consumer_loop)
+        self._start_thread(self._capture_loop)
+
+    def is_alive(self):
+        return self._consumer is not None and self._consumer.is_alive()
+
+    def detector_alive(self):
+        # Exit code 0 is the child's clean exit at the end of the stream, not a death
+        return self._process.is_alive() or self._process.exitcode == 0
+
+    def detector_ready(self):
+        return self.ready_event.is_set()
+
+    def heartbeat(self):
+        return self._heartbeat.value
+
+    def restart_detector(self):
+        if self._process.is_alive():
+            self._process.kill() # Stalled: whatever it is stuck in, it is not coming back
+        self._process.join(timeout=1)
+        self.ready_event.clear()
+        self._new_process()
+        self._start_process()
+
+    def join(self, timeout=None):
+        for thread in self._threads:
+            thread.join(timeout)
+        self._child_stop.set()
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+        if self.frame_ring:
+            self.frame_ring.close()
+            self.frame_ring = None
+
+    def _deliver(self, frame, frame_seq, captured_at):
+        if self.frame_ring is None:
+            self.frame_ring = SharedFrameRing.create(FRAME_RING_SLOTS, frame.shape)
+        if not self.pipeline.should_process(captured_at, self.stats):
+            return # Skipped here, so an idle frame never costs a copy or a message
+        slot, ring_seq = self.frame_ring.write(frame)
+        settings = self.pipeline.settings_store.snapshot()
+        self._publish_request((self.frame_ring.spec(), slot, ring_seq, captured_at, settings,
+                               self.pipeline.inference_width, self.pipeline.open_thresholds(settings)))
+
+    def _end_of_stream(self):
+        self._publish_request(None)
+
+    def _publish_request(self, request):
+        # Replay benchmarks measure throughput, so wait for the detector instead of overwriting
+        while not self.drop_stale_frames and not self.requests.wait_taken(timeout=0.1):
+            if self.stop_event.is_set():
+                return
+        if self.requests.publish(request) and self.stats:
+            self.stats.increment("frames_dropped")
+
+    def _consumer_loop(self):
+        pin_current_thread("logic")
+        pipeline, stats = self.pipeline, self.stats
+        results_dropped = 0
+        while not self.stop_event.is_set():
+            results = self.results # Replaced when the detector restarts
+            try:
+                result = results.get(LOGIC, timeout=HEARTBEAT_INTERVAL)
+            except queue.Empty:
+                continue
+            if stats and results.dropped(LOGIC) != results_dropped:
+                # Detections overwritten before this thread got to them
+                stats.increment("results_dropped", max(results.dropped(LOGIC) - results_dropped, 0))
+                results_dropped = results.dropped(LOGIC)
+            if result is None:
+                print("Detector/Logic Thread: End of frame stream.")
+                break
+            if result[0] == "startup":
+                for name, at in result[1].items():
+                    if pipeline.startup: pipeline.startup.mark(name, at)
+                continue
+            slot, ring_seq, captured_at, detection = result
+            # Only the preview looks at pixels, and a frame the camera has since overwritten is just not shown
+            frame_bgr = self.frame_ring.read(slot, ring_seq) if pipeline.publish.wants_frame(captured_at) else None
+            pipeline.handle(frame_bgr, captured_at, detection, stats)
+            self.last_detection_at = time.perf_counter()
+        self.finished = True
+        pipeline.finish()
+        self._child_stop.set()
+        self.requests.publish(None)
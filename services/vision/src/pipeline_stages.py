@@ -0,0 +1,339 @@
+# pipeline_stages.py
+# The vision pipeline as explicit stages:
+#
+#   source   frame_sources.py; read by the executor's capture loop
+#   detect   DetectStage: FaceLandmarker (+ optional face ROI and motion gate)
+#            -> Detection(landmarks, rotation, reused, cpu_s, matrix, detect_s)
+#   pose     PoseStage: filtered yaw/pitch and the cursor velocity they ask for
+#   wink     WinkStage: EAR -> Wink(side, closed_at) events; see wink_detector.py
+#   actuate  ActuateStage: velocity and clicks to the cursor thread
+#   publish  PublishStage: pose samples and wink events for Electron, and the preview
+#
+# Stages keep their own state and know nothing about threads or processes.
+# Pipeline runs everything after detect for one frame; pipeline_executors.py
+# decides where detection runs (a thread, or a process of its own) and feeds
+# the results back to Pipeline.handle(). Only Detection and plain arrays cross
+# a process boundary, so it pickles small.
+
+import collections
+import math
+import queue
+import time
+import cv2
+from face_geometry import eye_aspect_ratios, result_to_matrix_arrays, yaw_pitch_degrees
+from landmarker import FaceLandmarkerRunner, detector_mode_from_env
+from motion_gate import MotionGate, motion_gate_enabled_from_env
+from pose_filter import PoseFilter, pose_filter_from_env
+from telemetry import emit_event
+from wink_detector import WINK_OPEN_MARGIN, WinkDetector
+
+WINK_TEXT_SECONDS = 1.0     # How long the preview shows "Left Wink!" / "Right Wink!"
+CPU_ESTIMATE_SMOOTHING = 0.1
+
+# rotation is matrix[:3, :3]; the full 4x4 matrix is kept for trace recording.
+# detect_s is the inference time, for the quality controller; 0 when reused.
+Detection = collections.namedtuple("Detection", "landmarks rotation reused cpu_s matrix detect_s", defaults=(None, 0.0))
+
+def eyes_closing(landmarks, settings, open_thresholds=None):
+    """True if either eye is not clearly open in this frame (unsmoothed).
+    open_thresholds is WinkDetector.open_thresholds(); without it, the
+    settings' wink ratios plus the detector's warm-up margin."""
+    if landmarks is None:
+        return False
+    if open_thresholds is None:
+        open_thresholds = (settings.left_wink_ratio + WINK_OPEN_MARGIN, settings.right_wink_ratio + WINK_OPEN_MARGIN)
+    left_ear, right_ear = eye_aspect_ratios(landmarks).tolist()
+    return left_ear <= open_thresholds[0] or right_ear <= open_thresholds[1]
+
+# --- Detect ---
+def downscale(frame_bgr, width):
+    """frame_bgr shrunk to width pixels across, or as it is when it is not wider."""
+    frame_h, frame_w = frame_bgr.shape[:2]
+    if not width or frame_w <= width:
+        return frame_bgr
+    return cv2.resize(frame_bgr, (width, round(frame_h * width / frame_w)), interpolation=cv2.INTER_AREA)
+
+class DetectStage:
+    """Build it where detection runs: open() imports mediapipe and loads the model."""
+
+    def __init__(self, model_path, detector_mode=None):
+        self.model_path = model_path
+        self.detector_mode = detector_mode or detector_mode_from_env()
+        self.landmarker = None
+        self.roi_tracker = None
+        # Reuses the last result while the frame has not changed; see motion_gate.py
+        self.motion_gate = MotionGate() if motion_gate_enabled_from_env() else None
+        self._last = (None, None)  # (landmarks, matrix)
+        self._mp = None
+
+    def open(self, startup=None):
+        import mediapipe as mp
+        from face_roi import FaceRoiTracker, face_roi_enabled_from_env
+        self._mp = mp
+        if startup: startup.mark("mediapipe_imported")
+        self.landmarker = FaceLandmarkerRunner(self.model_path, self.detector_mode)
+        if startup: startup.mark("model_loaded")
+        # live_stream results can belong to an earlier frame, so they cannot be mapped back from this frame's crop
+        if face_roi_enabled_from_env() and self.landmarker.mode != "live_stream":
+            self.roi_tracker = FaceRoiTracker()
+        return self
+
+    def process(self, frame_bgr, captured_at, settings, stats=None, inference_width=None, open_thresholds=None):
+        """inference_width downscales wider frames before inference (see
+        quality_controller.py). open_thresholds are the wink detector's, so
+        the motion gate never reuses landmarks while it may be timing a wink."""
+        t_start = time.perf_counter()
+        cpu_start = time.process_time() # Includes MediaPipe's own threads, which thread_time() would miss
+        reused = self.motion_gate is not None and self.motion_gate.can_reuse(frame_bgr)
+        t_gated = time.perf_counter()
+        if reused:
+            landmarks, matrix = self._last
+        else:
+            if self.roi_tracker:
+                detection_result = self.roi_tracker.detect(self.landmarker, frame_bgr, captured_at * 1000)
+                t_converted = t_gated + self.roi_tracker.last_prepare_seconds
+            else:
+                # The ROI tracker above picks its own input size
+                frame_rgb = cv2.cvtColor(downscale(frame_bgr, inference_width), cv2.COLOR_BGR2RGB)
+                t_converted = time.perf_counter()
+                mp_image = self._mp.Image(image_format=self._mp.ImageFormat.SRGB, data=frame_rgb)
+                detection_result = self.landmarker.detect(mp_image, captured_at * 1000)
+            t_detected = time.perf_counter()
+            landmarks, matrix = result_to_matrix_arrays(detection_result)
+            self._last = (landmarks, matrix)
+            if self.motion_gate:
+                # A closing eye is exactly what the gate's frame difference may miss
+                self.motion_gate.update(frame_bgr, landmarks, hold=eyes_closing(landmarks, settings, open_thresholds))
+        if stats:
+            stats.record("queue_wait", t_start - captured_at)
+            if self.motion_gate:
+                stats.record("motion_gate", t_gated - t_start)
+            if reused:
+                stats.increment("frames_gate_reused")
+            else:
+                stats.record("cvt_color", t_converted - t_gated) # Includes the downscale
+                stats.record("detect", t_detected - t_converted)
+                stats.record("to_arrays", time.perf_counter() - t_detected)
+        rotation = matrix[:3, :3] if matrix is not None else None
+        detect_s = 0.0 if reused else t_detected - t_converted
+        return Detection(landmarks, rotation, reused, time.process_time() - cpu_start, matrix, detect_s)
+
+    def close(self):
+        if self.landmarker:
+            self.landmarker.close()
+
+# --- Pose ---
+class PoseStage:
+    def __init__(self, pose_filter=None):
+        self.pose_filter = pose_filter or PoseFilter(pose_filter_from_env())
+
+    def process(self, rotation, captured_at, settings, now=None):
+        """(yaw, pitch, dx, dy): filtered head angles in degrees and the cursor
+        velocity in pixels per frame. All zero without a face, so the cursor
+        stops instead of coasting."""
+        if rotation is None:
+            return 0.0, 0.0, 0.0, 0.0
+        raw_yaw, raw_pitch = yaw_pitch_degrees(rotation).tolist()
+        return self.map(raw_yaw, raw_pitch, captured_at, settings, now)
+
+    def map(self, raw_yaw, raw_pitch, captured_at, settings, now=None):
+        """process() for angles already measured (trace replay computes them in bulk)."""
+        # Smoothed and predicted forward to now, so the cursor follows where the head is
+        yaw, pitch = self.pose_filter.update(raw_yaw, raw_pitch, captured_at, now)
+        dx = -self._speed(yaw, settings) * settings.sensitivity_yaw
+        dy = self._speed(pitch, settings) * settings.sensitivity_pitch
+        if settings.invert_horizontal: dx = -dx
+        if settings.invert_vertical: dy = -dy
+        return yaw, pitch, dx, dy
+
+    @staticmethod
+    def _speed(angle, settings):
+        """Joystick-style: 0 inside the dead zone, then linear up to +-1 at max_tilt_angle past it."""
+        if abs(angle) <= settings.dead_zone_degrees:
+            return 0.0
+        effective = angle - math.copysign(settings.dead_zone_degrees, angle)
+        return max(-1.0, min(1.0, effective / settings.max_tilt_angle))
+
+# --- Wink ---
+class WinkStage:
+    """Landmarks -> EARs -> WinkDetector; see wink_detector.py for the state machine."""
+
+    def __init__(self, detector=None):
+        self.detector = detector or WinkDetector()
+
+    @property
+    def eye_closing(self):
+        return self.detector.closing
+
+    def open_thresholds(self, settings):
+        return self.detector.open_thresholds(settings)
+
+    def process(self, landmarks, now, settings):
+        """Returns a Wink(side, closed_at) or None for this frame. With winks
+        disabled the detector still learns and tracks closures, for the motion gate."""
+        if landmarks is None:
+            self.detector.reset()
+            return None
+        left_ear, right_ear = eye_aspect_ratios(landmarks).tolist()
+        wink = self.detector.update(left_ear, right_ear, now, settings)
+        return wink if settings.winks_enabled else None
+
+# --- Actuate ---
+class ActuateStage:
+    """Hands velocity and clicks to the cursor thread; neither call blocks."""
+
+    def __init__(self, cursor_actuator):
+        self.cursor_actuator = cursor_actuator
+
+    def process(self, dx, dy, wink, captured_at):
+        self.cursor_actuator.set_velocity(dx, dy, captured_at)
+        if wink:
+            self.cursor_actuator.request_click(wink.side == "right", captured_at, wink.closed_at)
+
+    def stop(self):
+        self.cursor_actuator.stop_cursor()
+
+# --- Publish ---
+class PublishStage:
+    """Everything that leaves the pipeline besides the cursor. Any of the
+    outlets may be None: control_channel (pose samples), preview_publisher
+    (WINKS_PREVIEW=stream), or preview_throttle + preview_queue (=window)."""
+
+    def __init__(self, control_channel=None, preview_publisher=None, preview_throttle=None, preview_queue=None):
+        self.control_channel = control_channel
+        self.preview_publisher = preview_publisher
+        self.preview_throttle = preview_throttle
+        self.preview_queue = preview_queue
+        self._wink_text = ""
+        self._wink_text_until = 0.0
+
+    def wants_frame(self, captured_at):
+        """Whether a preview would use the frame captured at captured_at: a
+        client is connected and a frame is due. Executors that have to fetch
+        the frame (ProcessExecutor, from the ring) skip it otherwise."""
+        if self.preview_publisher:
+            return self.preview_publisher.wants_frame(captured_at)
+        return self.preview_queue is not None and self.preview_throttle.ready(captured_at)
+
+    def process(self, captured_at, frame_bgr, landmarks, yaw, pitch, face, wink, settings):
+        if wink:
+            emit_event("wink", side=wink.side, captured_at=captured_at, closed_at=wink.closed_at,
+                       hold_ms=round((captured_at - wink.closed_at) * 1000.0, 3))
+            self._wink_text, self._wink_text_until = f"{wink.side.title()} Wink!", captured_at + WINK_TEXT_SECONDS
+        if self.control_channel:
+            self.control_channel.publish_pose(captured_at, yaw, pitch, face)
+        if frame_bgr is None:
+            return
+        wink_text = self._wink_text if captured_at < self._wink_text_until else ""
+        if self.preview_publisher:
+            self.preview_publisher.offer(captured_at, frame_bgr, landmarks, yaw, pitch, settings.dead_zone_degrees, wink_text)
+        elif self.preview_queue is not None and self.preview_throttle.due(captured_at):
+            try:
+                self.preview_queue.put_nowait((frame_bgr, landmarks, yaw, pitch, settings.dead_zone_degrees, wink_text))
+            except queue.Full:
+                pass
+
+# --- Everything after detect ---
+class Pipeline:
+    """Runs pose -> wink -> actuate -> publish on each Detection, plus the
+    per-frame bookkeeping: idle scheduling, the quality level, settings
+    latency, stats and the startup "ready" event."""
+
+    def __init__(self, model_path, settings_store, pose, wink, actuate, publish,
+                 idle_scheduler=None, startup=None, detector_mode=None, recorder=None, quality=None):
+        self.model_path = model_path
+        self.detector_mode = detector_mode
+        self.settings_store = settings_store
+        self.pose = pose
+        self.wink = wink
+        self.actuate = actuate
+        self.publish = publish
+        # Drops frames before inference while there is no face or no movement; see activity_scheduler.py
+        self.idle_scheduler = idle_scheduler
+        # Lowers inference resolution and frame rate to hold a latency target; see quality_controller.py
+        self.quality = quality
+        self.startup = startup
+        # Appends every handled frame to a landmark trace (WINKS_TRACE); see landmark_trace.py
+        self.recorder = recorder
+        self.frame_cpu_estimate = 0.0 # Smoothed process CPU seconds per detected frame
+
+    @property
+    def inference_width(self):
+        return self.quality.inference_width if self.quality else None
+
+    def open_thresholds(self, settings):
+        """The wink detector's per-eye open thresholds, for DetectStage's motion gate."""
+        return self.wink.open_thresholds(settings)
+
+    def should_process(self, captured_at, stats=None):
+        """False for a frame the idle scheduler or the quality level skips; call before detection."""
+        if self.idle_scheduler is not None and not self.idle_scheduler.should_process(captured_at):
+            if stats:
+                stats.increment("frames_idle_skipped")
+                stats.increment("idle_cpu_saved_us", int(self.frame_cpu_estimate * 1e6))
+            return False
+        if self.quality is not None and not self.quality.should_process(captured_at):
+            if stats: stats.increment("frames_quality_skipped")
+            return False
+        return True
+
+    def handle(self, frame_bgr, captured_at, detection, stats=None):
+        """Run every stage after detect for one frame. frame_bgr may be None
+        when it is no longer available (only the preview needs it)."""
+        t_start = time.perf_counter()
+        cpu_start = time.process_time()
+        settings = self.settings_store.snapshot() # One snapshot per frame so an update applies all at once
+        landmarks, rotation = detection.landmarks, detection.rotation
+
+        if self.recorder:
+            self.recorder.record(captured_at, t_start, landmarks, detection.matrix)
+        yaw, pitch, dx, dy = self.pose.process(rotation, captured_at, settings, now=t_start)
+        t_pose = time.perf_counter()
+        wink = self.wink.process(landmarks, captured_at, settings)
+        t_wink = time.perf_counter()
+        self.actuate.process(dx, dy, wink, captured_at)
+        self.publish.process(captured_at, frame_bgr, landmarks, yaw, pitch, rotation is not None, wink, settings)
+
+        if self.idle_scheduler:
+            pose = (yaw, pitch) if rotation is not None else None
+            idle_state = self.idle_scheduler.observe(captured_at, settings, pose, self.wink.eye_closing)
+            if idle_state:
+                print(f"Pipeline: Scheduler is now '{idle_state}'.")
+                emit_event("idle_state", state=idle_state)
+        frame_cpu = detection.cpu_s + time.process_time() - cpu_start
+        if not detection.reused:
+            estimate = self.frame_cpu_estimate
+            self.frame_cpu_estimate = frame_cpu if not estimate else estimate + CPU_ESTIMATE_SMOOTHING * (frame_cpu - estimate)
+
+        if self.quality:
+            change = self.quality.observe(t_wink, t_wink - captured_at, None if detection.reused else detection.detect_s)
+            if change:
+                print(f"Pipeline: Quality stepped {change} to {self.quality.describe()}.")
+                emit_event("quality_level", level=self.quality.level, direction=change,
+                           inference_width=self.quality.inference_width, max_fps=self.quality.max_fps)
+                if stats: stats.increment("quality_changes")
+
+        settings_latency = self.settings_store.mark_applied(settings)
+        if settings_latency is not None:
+            emit_event("settings_applied", version=settings.version, latency_ms=round(settings_latency * 1000.0, 3))
+            if stats: stats.record("settings_apply", settings_latency)
+
+        if stats:
+            # Detection stages are recorded by DetectStage, input_dispatch and glass_to_cursor by the cursor thread
+            stats.record("pose", t_pose - t_start)
+            stats.record("wink", t_wink - t_pose)
+            stats.record("frame_age", t_wink - captured_at)
+            stats.record("frame_cpu", frame_cpu)
+            stats.increment("frames_processed")
+            if landmarks is not None:
+                stats.increment("frames_with_face")
+
+        if self.startup and "first_detection" not in self.startup.marks:
+            self.startup.mark("first_detection")
+            emit_event("ready", started_at=self.startup.started_at, startup_s=self.startup.seconds())
+
+    def finish(self):
+        self.actuate.stop()
+        if self.recorder:
+            self.recorder.close()
+            print(f"Pipeline: Recorded {self.recorder.frames} frames to {self.recorder.path}.")
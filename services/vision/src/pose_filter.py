@@ -0,0 +1,154 @@
+# pose_filter.py
+# Smoothing and latency compensation for yaw/pitch before the joystick mapping.
+#
+#   none      - raw angles, as before
+#   one_euro  - One Euro filter (Casiez et al. 2012): a low-pass whose cutoff
+#               rises with speed, so the cursor is steady near the dead zone but
+#               does not lag much during fast turns
+#   kalman    - constant-velocity Kalman filter per axis
+#
+# Both filters also estimate angular velocity, which is used to predict each
+# angle forward by the frame's age when it reaches the joystick mapping (now -
+# captured_at, capped at MAX_PREDICTION), so the cursor reacts to where the
+# head is rather than where it was when the frame was captured.
+#
+# The filter is chosen with WINKS_POSE_FILTER; every axis has its own
+# parameters (POSE_FILTER_PARAMS). Evaluate changes with
+# bench/pose_filter_eval.py.
+
+import math
+import os
+import time
+
+POSE_FILTERS = ("none", "one_euro", "kalman")
+DEFAULT_POSE_FILTER = "one_euro"
+MAX_PREDICTION = 0.1  # Seconds; never extrapolate further than this
+MAX_GAP = 0.5         # Seconds without a pose after which the filter starts over
+
+# Angles are in degrees, time in seconds.
+POSE_FILTER_PARAMS = {
+    "one_euro": {
+        "yaw": {"min_cutoff": 1.0, "beta": 0.2, "d_cutoff": 1.0},
+        "pitch": {"min_cutoff": 0.8, "beta": 0.2, "d_cutoff": 1.0},
+    },
+    "kalman": {
+        # accel_noise: white-noise acceleration density (deg^2/s^3); measurement_noise: variance (deg^2)
+        "yaw": {"accel_noise": 1000.0, "measurement_noise": 0.3},
+        "pitch": {"accel_noise": 1000.0, "measurement_noise": 0.5},
+    },
+}
+
+def pose_filter_from_env():
+    kind = os.environ.get("WINKS_POSE_FILTER", DEFAULT_POSE_FILTER).strip().lower()
+    if kind not in POSE_FILTERS:
+        print(f"WARNING: Unknown WINKS_POSE_FILTER '{kind}', using '{DEFAULT_POSE_FILTER}'.")
+        return DEFAULT_POSE_FILTER
+    return kind
+
+def _smoothing_factor(cutoff, dt):
+    tau = 1.0 / (2.0 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+class OneEuroFilter:
+    """One axis. update() returns (value, velocity)."""
+
+    def __init__(self, min_cutoff=1.0, beta=0.2, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self.value = None
+        self.velocity = 0.0
+        self.last_t = None
+
+    def update(self, measurement, t):
+        if self.value is None:
+            self.value, self.velocity, self.last_t = measurement, 0.0, t
+            return self.value, self.velocity
+        dt = max(t - self.last_t, 1e-4)
+        self.last_t = t
+        raw_velocity = (measurement - self.value) / dt
+        self.velocity += _smoothing_factor(self.d_cutoff, dt) * (raw_velocity - self.velocity)
+        cutoff = self.min_cutoff + self.beta * abs(self.velocity)
+        self.value += _smoothing_factor(cutoff, dt) * (measurement - self.value)
+        return self.value, self.velocity
+
+class ConstantVelocityKalman:
+    """One axis, state (angle, angular velocity). update() returns (value, velocity)."""
+
+    def __init__(self, accel_noise=1000.0, measurement_noise=0.3):
+        self.accel_noise = accel_noise
+        self.measurement_noise = measurement_noise
+        self.reset()
+
+    def reset(self):
+        self.value = None
+        self.velocity = 0.0
+        self.last_t = None
+        self._p = None  # Covariance [[p00, p01], [p01, p11]]
+
+    def update(self, measurement, t):
+        if self.value is None:
+            self.value, self.velocity, self.last_t = measurement, 0.0, t
+            self._p = [self.measurement_noise, 0.0, 1e4]  # Velocity unknown at first
+            return self.value, self.velocity
+        dt = max(t - self.last_t, 1e-4)
+        self.last_t = t
+        p00, p01, p11 = self._p
+        q = self.accel_noise
+
+        # Predict: x = F x, P = F P F' + Q (discretized white-noise acceleration)
+        value = self.value + self.velocity * dt
+        p00 = p00 + 2.0 * dt * p01 + dt * dt * p11 + q * dt ** 3 / 3.0
+        p01 = p01 + dt * p11 + q * dt * dt / 2.0
+        p11 = p11 + q * dt
+
+        # Correct with the measured angle
+        s = p00 + self.measurement_noise
+        k0, k1 = p00 / s, p01 / s
+        innovation = measurement - value
+        self.value = value + k0 * innovation
+        self.velocity = self.velocity + k1 * innovation
+        self._p = [(1.0 - k0) * p00, (1.0 - k0) * p01, p11 - k1 * p01]
+        return self.value, self.velocity
+
+_AXIS_FILTERS = {"one_euro": OneEuroFilter, "kalman": ConstantVelocityKalman}
+
+class PoseFilter:
+    """Filters (yaw, pitch) per frame and predicts them forward by the frame's age."""
+
+    def __init__(self, kind=DEFAULT_POSE_FILTER, params=None, predict=True, max_prediction=MAX_PREDICTION):
+        if kind not in POSE_FILTERS:
+            raise ValueError(f"Unknown pose filter '{kind}', expected one of {POSE_FILTERS}")
+        self.kind = kind
+        self.predict = predict
+        self.max_prediction = max_prediction
+        self.axes = None
+        if kind != "none":
+            params = params or POSE_FILTER_PARAMS[kind]
+            self.axes = (_AXIS_FILTERS[kind](**params["yaw"]), _AXIS_FILTERS[kind](**params["pitch"]))
+        self.last_lead = 0.0
+
+    def reset(self):
+        """Forget the current track (e.g. the face was lost)."""
+        if self.axes:
+            for axis in self.axes:
+                axis.reset()
+
+    def update(self, yaw, pitch, captured_at, now=None):
+        """Filter one measurement taken at captured_at (perf_counter seconds) and
+        return (yaw, pitch) predicted to now (default: time.perf_counter())."""
+        if self.axes is None:
+            return yaw, pitch
+        if self.axes[0].last_t is not None and captured_at - self.axes[0].last_t > MAX_GAP:
+            self.reset()
+        now = time.perf_counter() if now is None else now
+        lead = min(max(now - captured_at, 0.0), self.max_prediction) if self.predict else 0.0
+        self.last_lead = lead
+        results = []
+        for axis, measurement in zip(self.axes, (yaw, pitch)):
+            value, velocity = axis.update(measurement, captured_at)
+            results.append(value + velocity * lead)
+        return results[0], results[1]
@@ -0,0 +1,230 @@
+# preview.py
+# Optional preview of what the tracker sees: the camera frame with the face
+# mesh contours, landmark dots and yaw/pitch status drawn on it.
+#
+# Off by default, so the pipeline does no drawing at all and the detector does
+# not hand frames to the main thread. WINKS_PREVIEW selects where it goes:
+#
+#   off     - nothing is rendered (the default; Electron does not show it)
+#   window  - an OpenCV window, for development ('q' closes the app)
+#   stream  - downscaled JPEGs over a loopback socket, for the desktop app
+#
+# Frames are rendered at most WINKS_PREVIEW_FPS times a second (default 10).
+# Drawing works straight from the (N,3) landmark array: FACEMESH_CONTOURS is
+# chained into index paths once, so a frame is one fancy-indexing step and a
+# single cv2.polylines call, with no protobuf conversion per landmark.
+#
+# Stream mode (PreviewPublisher) keeps the preview off the stdin/stdout command
+# pipe. It listens on 127.0.0.1 at a free port and announces it with a
+# {"type": "preview_stream", "port": ...} event; Electron connects while a page
+# wants to show the preview and disconnects when it does not. The client first
+# sends the launch's session token (session_token.py); a connection without it
+# is closed before a single frame is sent. Each message is a
+# PREVIEW_HEADER (magic, JPEG length, width, height) followed by the JPEG.
+# The detector only drops the latest frame into a one-frame slot, and only
+# while a client is connected; drawing, encoding and sending happen on the
+# publisher's thread. A slow reader therefore just means frames get replaced
+# in the slot before they are sent, and detection never waits on it.
+
+import os
+import socket
+import struct
+import threading
+import cv2
+import numpy as np
+from session_token import authenticate
+from telemetry import emit_event
+
+PREVIEW_MODES = ("off", "window", "stream")
+DEFAULT_PREVIEW_MODE = "off"
+PREVIEW_FPS = 10.0
+PREVIEW_WINDOW_NAME = "Winks Head Tracking"
+PREVIEW_STREAM_WIDTH = 480  # Streamed frames are downscaled to this width
+PREVIEW_JPEG_QUALITY = 70
+PREVIEW_HEADER = struct.Struct("<4sIHH")  # magic, JPEG bytes, width, height
+PREVIEW_MAGIC = b"WKPV"
+
+CONTOUR_COLOR = (0, 255, 0)
+LANDMARK_COLOR = (255, 0, 0)
+TEXT_COLOR = (0, 0, 255)
+
+def preview_mode_from_env():
+    mode = os.environ.get("WINKS_PREVIEW", DEFAULT_PREVIEW_MODE).strip().lower()
+    if mode not in PREVIEW_MODES:
+        print(f"WARNING: Unknown WINKS_PREVIEW '{mode}', using '{DEFAULT_PREVIEW_MODE}'.")
+        return DEFAULT_PREVIEW_MODE
+    return mode
+
+def preview_fps_from_env():
+    try:
+        fps = float(os.environ.get("WINKS_PREVIEW_FPS", PREVIEW_FPS))
+    except ValueError:
+        fps = 0.0
+    if not 0.5 <= fps <= 60.0:
+        print(f"WARNING: Invalid WINKS_PREVIEW_FPS, using {PREVIEW_FPS:g}.")
+        return PREVIEW_FPS
+    return fps
+
+def chain_edges(edges):
+    """Join (start, end) edges into as few index paths as possible."""
+    neighbours = {}
+    for a, b in edges:
+        neighbours.setdefault(a, []).append(b)
+        neighbours.setdefault(b, []).append(a)
+    unused = {frozenset(edge) for edge in edges}
+    paths = []
+    # Start at path ends (odd degree) first so open contours come out whole
+    for start in sorted(neighbours, key=lambda node: len(neighbours[node]) % 2 == 0):
+        while any(frozenset((start, n)) in unused for n in neighbours[start]):
+            path, node = [start], start
+            while True:
+                step = next((n for n in neighbours[node] if frozenset((node, n)) in unused), None)
+                if step is None:
+                    break
+                unused.discard(frozenset((node, step)))
+                path.append(step)
+                node = step
+            paths.append(np.asarray(path, dtype=np.intp))
+    return paths
+
+class PreviewThrottle:
+    """due(now) is True at most fps times a second."""
+
+    def __init__(self, fps=PREVIEW_FPS):
+        self.interval = 1.0 / fps
+        self._next = 0.0
+
+    def due(self, now):
+        if now < self._next:
+            return False
+        self._next = max(self._next + self.interval, now)
+        return True
+
+    def ready(self, now):
+        """Whether due(now) would be True, without using up the slot."""
+        return now >= self._next
+
+class PreviewRenderer:
+    def __init__(self, connections=None):
+        if connections is None:
+            # Imported here so a headless run never loads mediapipe's solutions package
+            from mediapipe.python.solutions.face_mesh_connections import FACEMESH_CONTOURS
+            connections = FACEMESH_CONTOURS
+        self.paths = chain_edges(connections)
+
+    def draw_landmarks(self, frame_bgr, landmarks):
+        """Draw the contour paths and a dot per landmark from (N,3) normalized landmarks."""
+        height, width = frame_bgr.shape[:2]
+        points = np.rint(landmarks[:, :2] * (width, height)).astype(np.int32)
+        cv2.polylines(frame_bgr, [points[path] for path in self.paths], False, CONTOUR_COLOR, 1)
+        inside = (points[:, 0] >= 0) & (points[:, 0] < width) & (points[:, 1] >= 0) & (points[:, 1] < height)
+        frame_bgr[points[inside, 1], points[inside, 0]] = LANDMARK_COLOR
+
+    def render(self, frame_bgr, landmarks, yaw, pitch, dead_zone_degrees, wink_text=""):
+        """Draw the full preview onto frame_bgr in place and return it."""
+        if landmarks is not None:
+            self.draw_landmarks(frame_bgr, landmarks)
+        yaw_status = "Moving" if abs(yaw) > dead_zone_degrees else "Dead Zone"
+        pitch_status = "Moving" if abs(pitch) > dead_zone_degrees else "Dead Zone"
+        cv2.putText(frame_bgr, f"Yaw: {yaw:.1f} ({yaw_status})", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, TEXT_COLOR, 2)
+        cv2.putText(frame_bgr, f"Pitch: {pitch:.1f} ({pitch_status})", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, TEXT_COLOR, 2)
+        if wink_text:
+            cv2.putText(frame_bgr, wink_text, (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.7, TEXT_COLOR, 2)
+        return frame_bgr
+
+class PreviewPublisher:
+    """Streams annotated, downscaled JPEG frames to one loopback client that has sent token."""
+
+    def __init__(self, token, fps=PREVIEW_FPS, width=PREVIEW_STREAM_WIDTH, quality=PREVIEW_JPEG_QUALITY, host="127.0.0.1",
+                 renderer=None):
+        self.renderer = renderer # Built on the publisher thread when None (it imports mediapipe)
+        self.token = token
+        self.clients_rejected = 0
+        self.throttle = PreviewThrottle(fps)
+        self.width = width
+        self.quality = quality
+        self.frames_sent = 0
+        self.frames_replaced = 0 # Overwritten in the slot before the client took them
+        self._server = socket.create_server((host, 0))
+        self._server.settimeout(0.5)
+        self.port = self._server.getsockname()[1]
+        self._client_connected = False
+        self._slot = None
+        self._slot_lock = threading.Lock()
+        self._slot_filled = threading.Event()
+        self._thread = None
+
+    def start(self, stop_event):
+        self._thread = threading.Thread(target=self._run, args=(stop_event,), daemon=True)
+        self._thread.start()
+        emit_event("preview_stream", port=self.port, fps=round(1.0 / self.throttle.interval, 3))
+
+    def wants_frame(self, captured_at):
+        """Whether offer() would take a frame captured at captured_at."""
+        return self._client_connected and self.throttle.ready(captured_at)
+
+    def offer(self, captured_at, frame_bgr, landmarks, yaw, pitch, dead_zone_degrees, wink_text=""):
+        """Called by the detector for every frame; never blocks."""
+        if not self._client_connected or not self.throttle.due(captured_at):
+            return
+        with self._slot_lock:
+            if self._slot is not None:
+                self.frames_replaced += 1
+            self._slot = (frame_bgr, landmarks, yaw, pitch, dead_zone_degrees, wink_text)
+        self._slot_filled.set()
+
+    def encode(self, frame_bgr, landmarks, yaw, pitch, dead_zone_degrees, wink_text, renderer):
+        """One wire message: PREVIEW_HEADER plus the JPEG of the annotated, downscaled frame."""
+        height, width = frame_bgr.shape[:2]
+        if width > self.width:
+            height = round(height * self.width / width)
+            width = self.width
+            frame_bgr = cv2.resize(frame_bgr, (width, height), interpolation=cv2.INTER_AREA)
+        else:
+            frame_bgr = frame_bgr.copy() # Never draw on the detector's frame
+        renderer.render(frame_bgr, landmarks, yaw, pitch, dead_zone_degrees, wink_text)
+        ok, jpeg = cv2.imencode(".jpg", frame_bgr, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            return None
+        return PREVIEW_HEADER.pack(PREVIEW_MAGIC, len(jpeg), width, height) + jpeg.tobytes()
+
+    def _run(self, stop_event):
+        renderer = self.renderer or PreviewRenderer()
+        while not stop_event.is_set():
+            try:
+                client, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            if not authenticate(client, self.token):
+                self.clients_rejected += 1
+                print("Preview Thread: Rejected a client without the session token.")
+                client.close()
+                continue
+            client.settimeout(2.0) # A client that stops reading for this long is dropped
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            print("Preview Thread: Client connected.")
+            with self._slot_lock:
+                self._slot = None
+            self._client_connected = True
+            try:
+                while not stop_event.is_set():
+                    if not self._slot_filled.wait(0.5):
+                        continue
+                    with self._slot_lock:
+                        pending, self._slot = self._slot, None
+                        self._slot_filled.clear()
+                    if pending is None:
+                        continue
+                    message = self.encode(*pending, renderer)
+                    if message:
+                        client.sendall(message)
+                        self.frames_sent += 1
+            except OSError:
+                pass
+            finally:
+                self._client_connected = False
+                client.close()
+            print("Preview Thread: Client disconnected.")
+        self._server.close()
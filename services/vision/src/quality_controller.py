@@ -0,0 +1,160 @@
+# quality_controller.py
+# Latency target for the pipeline: when the machine cannot keep up, trade
+# inference resolution and frame rate for latency instead of letting the
+# drop-oldest hand-off silently discard most frames.
+#
+#   level  inference width  frame rate
+#   0      camera's         every frame
+#   1      960 px           every frame
+#   2      640 px           every frame
+#   3      640 px           20 FPS
+#   4      480 px           15 FPS
+#   5      480 px           10 FPS
+#
+# Frames wider than the level's width are downscaled before colour conversion
+# and inference (landmarks are normalized, so nothing downstream changes).
+# MediaPipe resizes to its own small inputs anyway, so this only pays off for
+# HD cameras; at 640x480 the frame rate steps do the work. Frames above the
+# rate are skipped before inference, like the idle scheduler's; the camera
+# keeps delivering (and capture keeps grabbing) at its own rate.
+#
+# Every WINDOW_FRAMES handled frames the controller takes the p95 of frame
+# latency (capture to pose and wink done: glass-to-cursor without the cursor
+# thread's tick) and of detect time:
+#
+#   over budget   latency over the target, or detect over DETECT_SHARE of it,
+#                 for DOWNGRADE_WINDOWS windows in a row: one level down
+#   well within   both under UPGRADE_HEADROOM of those for UPGRADE_WINDOWS
+#                 windows in a row: one level up
+#
+# Asking for more than one window ignores one-off spikes (the first
+# detections after the model loads, say). The gap between the two thresholds,
+# restarting the windows after every change, and holding off for
+# RETRY_SECONDS (doubling every time, up to MAX_RETRY_SECONDS) before
+# retrying a level that was just left for being over budget keep it from
+# oscillating. A level held for STABLE_SECONDS clears its hold-off.
+#
+# Off unless asked for: every frame is detected at the camera's resolution.
+# WINKS_LATENCY_TARGET_MS=N turns it on with an N ms target (50 is a sensible
+# start); unset, empty or 0 leaves it off.
+
+import os
+import numpy as np
+
+DEFAULT_TARGET_MS = 50.0
+QUALITY_LADDER = (    # (inference width or None for the camera's, max FPS or None for every frame)
+    (None, None),
+    (960, None),
+    (640, None),
+    (640, 20.0),
+    (480, 15.0),
+    (480, 10.0),
+)
+WINDOW_FRAMES = 30
+DETECT_SHARE = 0.8           # Detection may use this much of the target; the rest is queueing and logic
+DOWNGRADE_WINDOWS = 2
+UPGRADE_HEADROOM = 0.6
+UPGRADE_WINDOWS = 3
+RETRY_SECONDS = 5.0
+MAX_RETRY_SECONDS = 120.0
+STABLE_SECONDS = 60.0
+FRAME_INTERVAL_TOLERANCE = 0.8  # Camera timestamps jitter; accept a frame this much of an interval early
+
+def latency_target_from_env():
+    """Target in seconds, or None when the controller is off (the default)."""
+    value = os.environ.get("WINKS_LATENCY_TARGET_MS", "").strip()
+    try:
+        target_ms = float(value) if value else 0.0
+    except ValueError:
+        target_ms = -1.0
+    if target_ms == 0:
+        return None
+    if not 5.0 <= target_ms <= 1000.0:
+        print("WARNING: Invalid WINKS_LATENCY_TARGET_MS, leaving the latency target off.")
+        return None
+    return target_ms / 1000.0
+
+class QualityController:
+    """Call should_process() before detection and observe() with every handled
+    frame; inference_width is the width to downscale frames to, or None."""
+
+    def __init__(self, target_s=DEFAULT_TARGET_MS / 1000.0, ladder=QUALITY_LADDER, window_frames=WINDOW_FRAMES):
+        self.target_s = target_s
+        self.ladder = ladder
+        self.window_frames = window_frames
+        self.level = 0
+        self.changes = 0
+        self._latencies = []
+        self._detects = []
+        self._good_windows = 0
+        self._bad_windows = 0
+        self._level_since = None
+        self._retry_at = {}        # level -> perf_counter before which it is not tried again
+        self._retry_seconds = {}   # level -> current hold-off
+        self._last_processed = None
+
+    @property
+    def inference_width(self):
+        return self.ladder[self.level][0]
+
+    @property
+    def max_fps(self):
+        return self.ladder[self.level][1]
+
+    def describe(self):
+        width = f"{self.inference_width} px" if self.inference_width else "full resolution"
+        rate = f"{self.max_fps:g} FPS" if self.max_fps else "every frame"
+        return f"level {self.level}, {width}, {rate}"
+
+    def should_process(self, captured_at):
+        max_fps = self.max_fps
+        if max_fps and self._last_processed is not None \
+                and captured_at - self._last_processed < FRAME_INTERVAL_TOLERANCE / max_fps:
+            return False
+        self._last_processed = captured_at
+        return True
+
+    def observe(self, now, latency_s, detect_s=None):
+        """Record one handled frame: latency_s from capture, detect_s of
+        inference (None when the frame reused an earlier result). Returns
+        'down' or 'up' when the level changed, else None."""
+        if self._level_since is None:
+            self._level_since = now
+        self._latencies.append(latency_s)
+        if detect_s is not None:
+            self._detects.append(detect_s)
+        if len(self._latencies) < self.window_frames:
+            return None
+        latency_p95 = float(np.percentile(self._latencies, 95))
+        detect_p95 = float(np.percentile(self._detects, 95)) if self._detects else 0.0
+        self._latencies.clear()
+        self._detects.clear()
+
+        if now - self._level_since >= STABLE_SECONDS:
+            self._retry_seconds.pop(self.level, None)
+        if latency_p95 > self.target_s or detect_p95 > self.target_s * DETECT_SHARE:
+            self._good_windows = 0
+            self._bad_windows += 1
+            if self._bad_windows < DOWNGRADE_WINDOWS or self.level == len(self.ladder) - 1:
+                return None
+            retry = min(self._retry_seconds.get(self.level, RETRY_SECONDS / 2) * 2, MAX_RETRY_SECONDS)
+            self._retry_seconds[self.level] = retry
+            self._retry_at[self.level] = now + retry
+            return self._change(self.level + 1, now)
+        self._bad_windows = 0
+        if latency_p95 < self.target_s * UPGRADE_HEADROOM and detect_p95 < self.target_s * DETECT_SHARE * UPGRADE_HEADROOM:
+            self._good_windows += 1
+        else:
+            self._good_windows = 0
+        if self._good_windows >= UPGRADE_WINDOWS and self.level > 0 \
+                and now >= self._retry_at.get(self.level - 1, 0.0):
+            return self._change(self.level - 1, now)
+        return None
+
+    def _change(self, level, now):
+        direction = "down" if level > self.level else "up"
+        self.level = level
+        self.changes += 1
+        self._level_since = now
+        self._good_windows = self._bad_windows = 0
+        return direction
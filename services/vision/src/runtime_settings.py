@@ -0,0 +1,113 @@
+# runtime_settings.py
+# Cursor and wink settings that Electron can change while the pipeline runs.
+#
+# PipelineSettings is immutable. SettingsStore.update() validates a change,
+# builds a new PipelineSettings and swaps the reference under a lock, and the
+# detection loop takes one snapshot() per frame. A frame therefore sees either
+# all of an update or none of it, and the loop never waits on the lock.
+#
+# Stdin commands (see apply_settings_command):
+#   {"type": "update_sensitivities", "yaw": 45, "pitch": 45}
+#   {"type": "update_calibration", "yaw": 45, "pitch": 45, "deadZone": 6, "tiltAngle": 20,
+#    "invertHorizontal": false, "invertVertical": false, "leftWinkRatio": 0.23,
+#    "rightWinkRatio": 0.24, "winkHoldSeconds": 0.03, "winkCooldown": 0.5,
+#    "winksEnabled": true, "idleNoFaceSeconds": 2, "idleStillSeconds": 10}
+# Every update_calibration key is optional.
+
+import dataclasses
+import math
+import threading
+import time
+
+@dataclasses.dataclass(frozen=True)
+class PipelineSettings:
+    sensitivity_yaw: float = 45.0
+    sensitivity_pitch: float = 45.0
+    dead_zone_degrees: float = 5.0
+    max_tilt_angle: float = 20.0
+    invert_horizontal: bool = False
+    invert_vertical: bool = False
+    left_wink_ratio: float = 0.23     # Starting close thresholds; see wink_detector.py
+    right_wink_ratio: float = 0.24
+    # An eye closed this long (by capture time) is a wink. 0.03 fires on the second closed frame at
+    # 30 FPS, as the old two-frame count did, with a few ms of slack for capture jitter
+    wink_hold_seconds: float = 0.03
+    wink_cooldown: float = 0.5
+    winks_enabled: bool = True        # False: eyes are still tracked, but winks never click
+    idle_after_no_face: float = 2.0   # Seconds; see activity_scheduler.py. 0 never idles
+    idle_after_still: float = 10.0
+    version: int = 0
+    updated_at: float = 0.0  # time.perf_counter() of the update that produced this version
+
+# command key -> (field, kind, minimum, maximum)
+_COMMAND_FIELDS = {
+    "yaw": ("sensitivity_yaw", float, 0.0, 500.0),
+    "pitch": ("sensitivity_pitch", float, 0.0, 500.0),
+    "deadZone": ("dead_zone_degrees", float, 0.0, 45.0),
+    "tiltAngle": ("max_tilt_angle", float, 1.0, 90.0),
+    "invertHorizontal": ("invert_horizontal", bool, None, None),
+    "invertVertical": ("invert_vertical", bool, None, None),
+    "leftWinkRatio": ("left_wink_ratio", float, 0.0, 1.0),
+    "rightWinkRatio": ("right_wink_ratio", float, 0.0, 1.0),
+    "winkHoldSeconds": ("wink_hold_seconds", float, 0.0, 2.0),
+    "winkCooldown": ("wink_cooldown", float, 0.0, 10.0),
+    "winksEnabled": ("winks_enabled", bool, None, None),
+    "idleNoFaceSeconds": ("idle_after_no_face", float, 0.0, 3600.0),
+    "idleStillSeconds": ("idle_after_still", float, 0.0, 3600.0),
+}
+_COMMAND_KEYS = {
+    "update_sensitivities": ("yaw", "pitch"),
+    "update_calibration": tuple(_COMMAND_FIELDS),
+}
+
+def _coerce(key, value):
+    field, kind, minimum, maximum = _COMMAND_FIELDS[key]
+    if kind is bool:
+        if not isinstance(value, bool):
+            raise ValueError(f"{key} must be true or false")
+        return field, value
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"{key} must be a number")
+    value = float(value)
+    if not minimum <= value <= maximum:
+        raise ValueError(f"{key} must be between {minimum} and {maximum}")
+    return field, value
+
+class SettingsStore:
+    """Holds the current PipelineSettings; safe to share between threads."""
+
+    def __init__(self, initial=None):
+        self._lock = threading.Lock()
+        self._current = initial or PipelineSettings()
+        self._applied_version = self._current.version
+
+    def snapshot(self):
+        return self._current
+
+    def update(self, **changes):
+        """Apply field changes atomically and return the new settings."""
+        with self._lock:
+            current = self._current
+            self._current = dataclasses.replace(current, **changes, version=current.version + 1,
+                                                updated_at=time.perf_counter())
+            return self._current
+
+    def mark_applied(self, settings):
+        """Called by the detection loop after a frame has used settings. Returns the
+        seconds from update() to that frame the first time a version is seen, else None."""
+        if settings.version == self._applied_version:
+            return None
+        self._applied_version = settings.version
+        return time.perf_counter() - settings.updated_at
+
+def apply_settings_command(store, command):
+    """Apply an update_sensitivities / update_calibration stdin command.
+    Returns the new settings, or None if the command is not a settings command.
+    Raises ValueError (and changes nothing) if any value is invalid."""
+    keys = _COMMAND_KEYS.get(command.get("type"))
+    if keys is None:
+        return None
+    changes = dict(_coerce(key, command[key]) for key in keys if key in command)
+    if not changes:
+        raise ValueError(f"{command.get('type')} has no settings to change")
+    return store.update(**changes)
@@ -0,0 +1,43 @@
+# session_token.py
+# Proof that a loopback client is the Electron app that launched us.
+#
+# The control channel and the preview stream listen on 127.0.0.1, where any
+# local process can connect. Electron generates a random token for every
+# launch and passes it in WINKS_SESSION_TOKEN; a client sends it as its first
+# bytes. A connection that sends anything else, or nothing within
+# HANDSHAKE_TIMEOUT, is closed before anything is read from it or sent to it.
+#
+# Without WINKS_SESSION_TOKEN (the script run by hand) a random token nobody
+# knows is used, so no client can connect; stdin and stdout still work.
+
+import hmac
+import os
+import secrets
+
+HANDSHAKE_TIMEOUT = 1.0  # Seconds a new connection has to send the token
+
+def session_token_from_env():
+    token = os.environ.get("WINKS_SESSION_TOKEN", "").strip()
+    if not token:
+        print("WARNING: WINKS_SESSION_TOKEN is not set; local clients will not be able to connect.")
+        return secrets.token_hex(32)
+    return token
+
+def authenticate(client, token, timeout=HANDSHAKE_TIMEOUT):
+    """Read the token from a newly accepted socket. True if it matches; the
+    socket's timeout is left as it was."""
+    expected = token.encode()
+    received = bytearray()
+    previous = client.gettimeout()
+    client.settimeout(timeout)
+    try:
+        while len(received) < len(expected):
+            chunk = client.recv(len(expected) - len(received))
+            if not chunk:
+                return False
+            received += chunk
+    except OSError:
+        return False
+    finally:
+        client.settimeout(previous)
+    return hmac.compare_digest(bytes(received), expected)
@@ -0,0 +1,81 @@
+# shared_frame_ring.py
+# A ring of preallocated frame slots in multiprocessing.shared_memory. The
+# capture process writes frames into slots and only (slot, seq) pairs cross
+# process boundaries, so frames are never pickled.
+#
+# Each slot carries a sequence number. The writer marks a slot as "being
+# written" before copying pixels in and publishes the new sequence number
+# afterwards; a reader that sees a different sequence number before or after
+# using a slot knows the frame was overwritten and drops it.
+
+from multiprocessing import shared_memory
+import numpy as np
+
+SLOT_WRITING = -1
+SLOT_EMPTY = -2
+
+class SharedFrameRing:
+    def __init__(self, shm, slots, frame_shape, owner):
+        self.shm = shm
+        self.slots = slots
+        self.frame_shape = tuple(frame_shape)
+        self.owner = owner
+        header_bytes = slots * np.dtype(np.int64).itemsize
+        self.seqs = np.ndarray((slots,), dtype=np.int64, buffer=shm.buf, offset=0)
+        self.frames = np.ndarray((slots,) + self.frame_shape, dtype=np.uint8,
+                                 buffer=shm.buf, offset=header_bytes)
+        self.next_seq = 0
+
+    @classmethod
+    def create(cls, slots, frame_shape):
+        frame_bytes = int(np.prod(frame_shape))
+        size = slots * (np.dtype(np.int64).itemsize + frame_bytes)
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        ring = cls(shm, slots, frame_shape, owner=True)
+        ring.seqs[:] = SLOT_EMPTY
+        return ring
+
+    @classmethod
+    def attach(cls, spec):
+        name, slots, frame_shape = spec
+        return cls(shared_memory.SharedMemory(name=name), slots, frame_shape, owner=False)
+
+    def spec(self):
+        """Picklable description that other processes pass to attach()."""
+        return (self.shm.name, self.slots, self.frame_shape)
+
+    # --- Writer side (single producer) ---
+    def write(self, frame):
+        """Copy a frame into the next slot and return its (slot, seq)."""
+        seq = self.next_seq
+        slot = seq % self.slots
+        self.seqs[slot] = SLOT_WRITING
+        self.frames[slot][...] = frame
+        self.seqs[slot] = seq
+        self.next_seq += 1
+        return slot, seq
+
+    # --- Reader side ---
+    def is_current(self, slot, seq):
+        return int(self.seqs[slot]) == seq
+
+    def view(self, slot):
+        """Zero-copy view of a slot. Check is_current() after using it."""
+        return self.frames[slot]
+
+    def read(self, slot, seq):
+        """Return a private copy of the frame, or None if it was overwritten."""
+        if not self.is_current(slot, seq):
+            return None
+        frame = self.frames[slot].copy()
+        if not self.is_current(slot, seq):
+            return None
+        return frame
+
+    def close(self):
+        # Drop our numpy views first; SharedMemory refuses to close while exported.
+        self.seqs = None
+        self.frames = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,56 @@
+# stage_stats.py
+# Per-stage latency samples and counters for the vision pipeline.
+
+import threading
+from collections import defaultdict, deque
+import numpy as np
+
+class StageStats:
+    """Collects per-stage durations (in seconds) and event counters.
+    Safe to share between the capture and detector threads. With max_samples
+    set, each stage keeps only its most recent samples (a rolling window)."""
+
+    def __init__(self, max_samples=None):
+        self._lock = threading.Lock()
+        self.samples = defaultdict(lambda: deque(maxlen=max_samples))
+        self.counters = defaultdict(int)
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+    def increment(self, counter, amount=1):
+        with self._lock:
+            self.counters[counter] += amount
+
+    def counter_values(self):
+        with self._lock:
+            return dict(self.counters)
+
+    def histogram(self, stage, edges_ms):
+        """Sample counts per bin for edges_ms (ascending); the last bin is open-ended."""
+        with self._lock:
+            values = list(self.samples.get(stage, ()))
+        bins = np.append(np.asarray(edges_ms, dtype=np.float64), np.inf)
+        counts, _ = np.histogram(np.asarray(values) * 1000.0, bins=bins)
+        return [int(c) for c in counts]
+
+    def summary(self):
+        """Return {stage: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}}."""
+        with self._lock:
+            samples = {stage: list(values) for stage, values in self.samples.items()}
+        report = {}
+        for stage, values in samples.items():
+            if not values:
+                continue
+            ms = np.asarray(values) * 1000.0
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            report[stage] = {
+                "count": int(ms.size),
+                "mean_ms": round(float(ms.mean()), 3),
+                "p50_ms": round(float(p50), 3),
+                "p95_ms": round(float(p95), 3),
+                "p99_ms": round(float(p99), 3),
+                "max_ms": round(float(ms.max()), 3),
+            }
+        return report
@@ -0,0 +1,173 @@
+# telemetry.py
+# Structured events on stdout for the Electron main process.
+#
+# Every event is one JSON object per line with a "type" field, the same shape
+# as the commands Electron sends on stdin. Anything else on stdout is plain log
+# text. LatencyReporter turns a rolling StageStats window into a
+# "latency_stats" event every LATENCY_EVENT_INTERVAL seconds, along with the
+# CPU time the reporting process used in that interval (cpu_s), and whatever
+# extra_fields() returns (the current quality level, say).
+#
+# StartupTimeline collects named perf_counter marks from process start (camera
+# open, model loaded, first detection, first cursor move) for the "ready" and
+# "first_cursor_move" events and bench/startup_benchmark.py.
+#
+# set_event_sink() reroutes events, e.g. to control_channel.ControlChannel
+# while Electron is connected to it; None goes back to stdout.
+#
+# Events and log text share stdout and come from several threads. print()
+# writes its text and the newline in separate calls, so another thread's event
+# could land in between and be glued onto a log line, where Electron's parser
+# drops it. use_line_writer() (called at startup by every process that writes
+# to stdout) puts a LineWriter in front of stdout: each thread's text is held
+# until its newline and whole lines are written and flushed under
+# _stdout_lock, which emit_event() takes too. An explicit flush() and process
+# exit write out whatever is still held. One flushed write per line also
+# keeps the detector process's lines whole in the shared pipe.
+#
+# Timestamps: frames are stamped with time.perf_counter() as soon as the
+# capture read returns. perf_counter is system-wide on Windows, Linux and macOS,
+# so stamps taken in one process can be compared in another, and unlike
+# time.monotonic() on Windows before Python 3.13 it is not limited to 15.6 ms
+# ticks. "Glass" therefore means "frame handed to us by the driver"; sensor
+# exposure and driver buffering happen before that and are not included.
+
+import atexit
+import json
+import sys
+import threading
+import time
+
+LATENCY_EVENT_INTERVAL = 5.0     # Seconds between latency_stats events
+TELEMETRY_WINDOW_SAMPLES = 300   # Samples kept per stage (~10 s at 30 FPS)
+LATENCY_HISTOGRAM_EDGES_MS = (0, 10, 20, 30, 40, 50, 60, 80, 100, 150, 200, 300, 500)
+HISTOGRAM_STAGES = ("glass_to_cursor", "left_wink_to_click", "right_wink_to_click")
+
+_event_sink = None
+_stdout_lock = threading.RLock() # Reentrant: emit_event() writes through a LineWriter
+
+class LineWriter:
+    """Stands in for a text stream and passes on whole lines, each in one
+    locked write and flush. flush() also writes the calling thread's unfinished
+    line, and flush_all() every thread's (use_line_writer() runs it at exit).
+    Anything else is forwarded to the stream."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._pending = {} # Thread ident -> its text after the last newline
+
+    def write(self, text):
+        thread = threading.get_ident()
+        with _stdout_lock:
+            lines, newline, rest = (self._pending.pop(thread, "") + text).rpartition("\n")
+            if rest:
+                self._pending[thread] = rest
+            if newline:
+                self.stream.write(lines + newline)
+                self.stream.flush()
+        return len(text)
+
+    def flush(self):
+        with _stdout_lock:
+            rest = self._pending.pop(threading.get_ident(), "")
+            if rest:
+                self.stream.write(rest)
+            self.stream.flush()
+
+    def flush_all(self):
+        """Write every thread's unfinished line, each ended with a newline."""
+        with _stdout_lock:
+            pending, self._pending = self._pending, {}
+            for rest in pending.values():
+                self.stream.write(rest + "\n")
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+def use_line_writer():
+    """Put a LineWriter in front of sys.stdout; call once at process startup."""
+    if sys.stdout is not None and not isinstance(sys.stdout, LineWriter):
+        sys.stdout = LineWriter(sys.stdout)
+        atexit.register(_flush_at_exit, sys.stdout)
+
+def _flush_at_exit(writer):
+    try:
+        writer.flush_all()
+    except (OSError, ValueError):
+        pass # stdout already closed
+
+def set_event_sink(sink):
+    """sink(event_type, **fields) receives every event instead of stdout; None restores stdout."""
+    global _event_sink
+    _event_sink = sink
+
+def emit_event(event_type, **fields):
+    """Write one structured event line to stdout, or hand it to the event sink."""
+    sink = _event_sink
+    if sink is not None:
+        sink(event_type, **fields)
+        return
+    line = json.dumps({"type": event_type, **fields}) + "\n"
+    try:
+        with _stdout_lock:
+            sys.stdout.write(line)
+            sys.stdout.flush()
+    except (OSError, ValueError):
+        pass # stdout closed while shutting down
+
+class LatencyReporter:
+    """Emits a latency_stats event from a StageStats window at a fixed interval.
+    Call maybe_emit() from any loop that wakes up regularly."""
+
+    def __init__(self, stats, source, interval=LATENCY_EVENT_INTERVAL,
+                 histogram_stages=HISTOGRAM_STAGES, edges_ms=LATENCY_HISTOGRAM_EDGES_MS, extra_fields=None):
+        self.stats = stats
+        self.source = source
+        self.extra_fields = extra_fields
+        self.interval = interval
+        self.histogram_stages = histogram_stages
+        self.edges_ms = list(edges_ms)
+        self._last_emit = time.perf_counter()
+        self._last_cpu = time.process_time()
+        self._last_counters = {}
+
+    def maybe_emit(self):
+        now = time.perf_counter()
+        if now - self._last_emit >= self.interval:
+            self.emit(now)
+
+    def emit(self, now=None):
+        now = time.perf_counter() if now is None else now
+        elapsed = now - self._last_emit
+        counters = self.stats.counter_values()
+        counter_deltas = {name: value - self._last_counters.get(name, 0) for name, value in counters.items()}
+        self._last_counters = counters
+        self._last_emit = now
+        cpu = time.process_time()
+        cpu_elapsed, self._last_cpu = cpu - self._last_cpu, cpu
+
+        emit_event(
+            "latency_stats",
+            source=self.source,
+            interval_s=round(elapsed, 3),
+            cpu_s=round(cpu_elapsed, 3),
+            counters=counter_deltas,
+            stages=self.stats.summary(),
+            histograms={stage: {"edges_ms": self.edges_ms, "counts": self.stats.histogram(stage, self.edges_ms)}
+                        for stage in self.histogram_stages},
+            **(self.extra_fields() if self.extra_fields else {}))
+
+class StartupTimeline:
+    """First time each named startup step happened, in seconds from started_at."""
+
+    def __init__(self, started_at=None):
+        self.started_at = time.perf_counter() if started_at is None else started_at
+        self.marks = {}
+
+    def mark(self, name, at=None):
+        """Record name once; later marks of the same name are ignored."""
+        self.marks.setdefault(name, time.perf_counter() if at is None else at)
+
+    def seconds(self):
+        return {name: round(at - self.started_at, 3) for name, at in sorted(self.marks.items(), key=lambda item: item[1])}
@@ -0,0 +1,147 @@
+# wink_detector.py
+# Wink detection as a per-eye state machine on capture timestamps, with
+# thresholds learned from the user's own eyes.
+#
+# Frame counts and a moving average made the click latency depend on the
+# camera's frame rate, and fixed EAR ratios suit some eye shapes better than
+# others. Here every decision is in seconds of capture time, and each eye keeps
+# an exponentially weighted mean and variance of its EAR while both eyes are
+# clearly open (EyeBaseline). That distribution gives two thresholds per eye:
+#
+#   close   mean - max(CLOSE_SIGMAS * std, CLOSE_DROP * mean)   the eye starts closing
+#   reopen  mean - max(OPEN_SIGMAS * std, OPEN_DROP * mean)     the eye counts as open again
+#
+# The gap between them is the hysteresis band: noise around one threshold no
+# longer ends a closure or starts a new one. Until an eye has
+# BASELINE_WARMUP_SECONDS of open samples, the settings' left/right_wink_ratio
+# are its close threshold and ratio + WINK_OPEN_MARGIN its reopen threshold,
+# which is how winks were detected before.
+#
+# Per eye:
+#
+#   open     -> closing  EAR below close (closed_at = that frame's capture time)
+#   closing  -> fired    closed for wink_hold_seconds while the other eye is open,
+#                        and wink_cooldown since this eye's last wink: a Wink
+#   closing  -> blink    the other eye closed too
+#   any      -> open     EAR back above reopen
+#
+# A lost face cancels any closure in progress but keeps the baselines.
+# WinkDetector(limits) swaps in other CLOSE_*/OPEN_* values, for
+# bench/param_sweep.py.
+
+import collections
+import math
+
+CLOSE_SIGMAS = 4.0
+CLOSE_DROP = 0.2             # The close threshold is at least this fraction below the open mean
+OPEN_SIGMAS = 2.0
+OPEN_DROP = 0.1
+WINK_OPEN_MARGIN = 0.02      # Reopen threshold over the settings ratio until the baseline is ready
+BASELINE_TIME_CONSTANT = 30.0  # Seconds; the baseline follows slow changes in posture and lighting
+BASELINE_WARMUP_SECONDS = 2.0
+MAX_SAMPLE_GAP = 0.5         # A longer gap between open samples counts as this much time
+
+OPEN, CLOSING, FIRED, BLINK = "open", "closing", "fired", "blink"
+
+Wink = collections.namedtuple("Wink", "side closed_at")
+BaselineLimits = collections.namedtuple("BaselineLimits", "close_sigmas close_drop open_sigmas open_drop")
+DEFAULT_LIMITS = BaselineLimits(CLOSE_SIGMAS, CLOSE_DROP, OPEN_SIGMAS, OPEN_DROP)
+
+class EyeBaseline:
+    """Exponentially weighted mean and variance of one eye's open EAR, on a time constant."""
+
+    def __init__(self, time_constant=BASELINE_TIME_CONSTANT, limits=DEFAULT_LIMITS):
+        self.time_constant = time_constant
+        self.limits = limits
+        self.mean = None
+        self.variance = 0.0
+        self.seconds = 0.0 # Capture time covered by the samples so far
+        self._last_at = None
+        self._thresholds = None # (close, reopen), refreshed by update() once ready
+
+    @property
+    def ready(self):
+        return self.seconds >= BASELINE_WARMUP_SECONDS
+
+    def update(self, ear, now):
+        dt = 0.0 if self._last_at is None else min(max(now - self._last_at, 0.0), MAX_SAMPLE_GAP)
+        self._last_at = now
+        if self.mean is None:
+            self.mean = ear
+            return
+        if not dt:
+            return
+        self.seconds += dt
+        # Plain averaging during warm-up, then forgetting at the time constant
+        alpha = max(dt / (self.time_constant + dt), dt / self.seconds)
+        delta = ear - self.mean
+        self.mean += alpha * delta
+        self.variance = (1.0 - alpha) * (self.variance + alpha * delta * delta)
+        if self.seconds >= BASELINE_WARMUP_SECONDS:
+            std, limits = math.sqrt(self.variance), self.limits
+            self._thresholds = (self.mean - max(limits.close_sigmas * std, limits.close_drop * self.mean),
+                                self.mean - max(limits.open_sigmas * std, limits.open_drop * self.mean))
+
+    def thresholds(self, fallback_ratio):
+        """(close, reopen) EAR thresholds."""
+        if self._thresholds is None:
+            return fallback_ratio, fallback_ratio + WINK_OPEN_MARGIN
+        return self._thresholds
+
+class WinkDetector:
+    """Feed update() every frame's EARs and capture time; it returns a Wink
+    when one completes. closing is True while either eye is below its close
+    threshold."""
+
+    def __init__(self, limits=DEFAULT_LIMITS):
+        self.baselines = {"left": EyeBaseline(limits=limits), "right": EyeBaseline(limits=limits)}
+        self.states = {"left": OPEN, "right": OPEN}
+        self.closing = False
+        self._closed_at = {"left": None, "right": None}
+        self._last_wink = {"left": -math.inf, "right": -math.inf}
+
+    def thresholds(self, settings):
+        return {"left": self.baselines["left"].thresholds(settings.left_wink_ratio),
+                "right": self.baselines["right"].thresholds(settings.right_wink_ratio)}
+
+    def open_thresholds(self, settings):
+        """(left, right) EARs above which each eye counts as open; below either, a
+        closure may be in progress."""
+        return (self.baselines["left"].thresholds(settings.left_wink_ratio)[1],
+                self.baselines["right"].thresholds(settings.right_wink_ratio)[1])
+
+    def reset(self):
+        """No face: drop closures in progress, keep what was learned."""
+        self.states = {"left": OPEN, "right": OPEN}
+        self._closed_at = {"left": None, "right": None}
+        self.closing = False
+
+    def update(self, left_ear, right_ear, now, settings):
+        states, baselines = self.states, self.baselines
+        left_close, left_reopen = baselines["left"].thresholds(settings.left_wink_ratio)
+        right_close, right_reopen = baselines["right"].thresholds(settings.right_wink_ratio)
+        left_below, right_below = left_ear < left_close, right_ear < right_close
+        left_above, right_above = left_ear > left_reopen, right_ear > right_reopen
+        self.closing = left_below or right_below
+
+        if left_above and right_above:
+            baselines["left"].update(left_ear, now)
+            baselines["right"].update(right_ear, now)
+        for side, below, above in (("left", left_below, left_above), ("right", right_below, right_above)):
+            if above:
+                states[side], self._closed_at[side] = OPEN, None
+            elif below and states[side] == OPEN:
+                states[side], self._closed_at[side] = CLOSING, now
+        if states["left"] == CLOSING and states["right"] == CLOSING:
+            states["left"] = states["right"] = BLINK
+        if CLOSING not in states.values():
+            return None
+
+        wink = None
+        for side, other in (("left", "right"), ("right", "left")):
+            if (states[side] == CLOSING and states[other] == OPEN
+                    and now - self._closed_at[side] >= settings.wink_hold_seconds
+                    and now - self._last_wink[side] > settings.wink_cooldown):
+                states[side], self._last_wink[side] = FIRED, now
+                wink = wink or Wink(side, self._closed_at[side])
+        return wink
@@ -0,0 +1,7 @@
+# The vision scripts import each other as top-level modules, so put src/ on the path.
+import os
+import sys
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
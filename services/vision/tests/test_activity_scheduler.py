@@ -0,0 +1,57 @@
+from activity_scheduler import NO_FACE_PROBE_HZ, STILL_PROBE_HZ, ActivityScheduler
+from runtime_settings import PipelineSettings
+
+FRAME_INTERVAL = 1.0 / 30.0
+SETTINGS = PipelineSettings(dead_zone_degrees=5.0, idle_after_no_face=2.0, idle_after_still=10.0)
+
+def run(scheduler, seconds, start=0.0, pose=None, eye_closing=False, settings=SETTINGS):
+    """Feed frames at 30 FPS; return (processed count, time after the last frame)."""
+    processed, t = 0, start
+    while t < start + seconds:
+        if scheduler.should_process(t):
+            processed += 1
+            scheduler.observe(t, settings, pose, eye_closing)
+        t += FRAME_INTERVAL
+    return processed, t
+
+def test_no_face_drops_to_probe_rate():
+    scheduler = ActivityScheduler()
+    processed, t = run(scheduler, 2.1)
+    assert scheduler.state == "no_face"
+    assert processed >= 60  # Full rate until the idle period is over
+    processed, _ = run(scheduler, 10.0, start=t)
+    assert abs(processed - 10.0 * NO_FACE_PROBE_HZ) <= 1
+
+def test_face_reappearing_ramps_back_on_the_next_frame():
+    scheduler = ActivityScheduler()
+    _, t = run(scheduler, 5.0)
+    assert scheduler.state == "no_face"
+    while not scheduler.should_process(t):
+        t += FRAME_INTERVAL
+    assert scheduler.observe(t, SETTINGS, (0.0, 0.0)) == "active"
+    assert scheduler.should_process(t + FRAME_INTERVAL)
+
+def test_still_head_in_dead_zone_idles_and_movement_wakes_it():
+    scheduler = ActivityScheduler()
+    processed, t = run(scheduler, 10.5, pose=(1.0, -1.0))
+    assert scheduler.state == "still"
+    processed, t = run(scheduler, 10.0, start=t, pose=(1.0, -1.0))
+    assert abs(processed - 10.0 * STILL_PROBE_HZ) <= 1
+    while not scheduler.should_process(t):
+        t += FRAME_INTERVAL
+    assert scheduler.observe(t, SETTINGS, (9.0, -1.0)) == "active"  # Turned out of the dead zone
+
+def test_closing_eye_counts_as_activity():
+    scheduler = ActivityScheduler()
+    _, t = run(scheduler, 10.5, pose=(0.0, 0.0))
+    assert scheduler.state == "still"
+    while not scheduler.should_process(t):
+        t += FRAME_INTERVAL
+    assert scheduler.observe(t, SETTINGS, (0.0, 0.0), eye_closing=True) == "active"
+
+def test_zero_period_never_idles():
+    scheduler = ActivityScheduler()
+    settings = PipelineSettings(idle_after_no_face=0.0, idle_after_still=0.0)
+    processed, _ = run(scheduler, 30.0, settings=settings)
+    assert scheduler.state == "active"
+    assert processed >= 899
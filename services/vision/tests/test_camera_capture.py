@@ -0,0 +1,56 @@
+import time
+
+import pytest
+
+from camera_capture import CameraMode, choose_camera_mode, grab_freshest, parse_camera_mode
+
+MODES = [
+    CameraMode(1920, 1080, 30, "MJPG"), CameraMode(1280, 720, 60, "MJPG"), CameraMode(1280, 720, 30, "MJPG"),
+    CameraMode(640, 480, 30, "MJPG"), CameraMode(640, 480, 60, "MJPG"), CameraMode(640, 480, 30, "YUYV"),
+    CameraMode(1280, 720, 10, "YUYV"), CameraMode(320, 240, 120, "MJPG"),
+]
+
+def test_parse_camera_mode():
+    assert parse_camera_mode("640x480@30") == CameraMode(640, 480, 30.0, "")
+    assert parse_camera_mode("1280x720@60:mjpg") == CameraMode(1280, 720, 60.0, "MJPG")
+    with pytest.raises(ValueError):
+        parse_camera_mode("640x480@30:MJPEG")
+    with pytest.raises(ValueError):
+        parse_camera_mode("wide")
+
+def test_smallest_mode_meeting_the_target_at_the_highest_rate():
+    assert choose_camera_mode(MODES, CameraMode(640, 480, 30)) == CameraMode(640, 480, 60, "MJPG")
+    assert choose_camera_mode(MODES, CameraMode(1280, 720, 30)) == CameraMode(1280, 720, 60, "MJPG")
+
+def test_uncompressed_format_wins_a_tie():
+    modes = [CameraMode(640, 480, 30, "MJPG"), CameraMode(640, 480, 30, "YUYV")]
+    assert choose_camera_mode(modes, CameraMode(640, 480, 30)).fourcc == "YUYV"
+
+def test_forced_format_and_fallbacks():
+    assert choose_camera_mode(MODES, CameraMode(640, 480, 30, "YUYV")) == CameraMode(640, 480, 30, "YUYV")
+    # Nothing reaches 4K: keep the frame rate and get as close to the size as possible
+    assert choose_camera_mode(MODES, CameraMode(3840, 2160, 30)) == CameraMode(1920, 1080, 30, "MJPG")
+    assert choose_camera_mode([], CameraMode(640, 480, 30)) is None
+
+class QueuedCapture:
+    """Stands in for cv2.VideoCapture: queued frames come back at once, then
+    each grab waits for the next frame."""
+
+    def __init__(self, queued, interval=0.01):
+        self.queued = queued
+        self.interval = interval
+        self.grabs = 0
+
+    def grab(self):
+        self.grabs += 1
+        if self.queued:
+            self.queued -= 1
+        else:
+            time.sleep(self.interval)
+        return True
+
+def test_grab_freshest_drops_queued_frames():
+    capture = QueuedCapture(queued=3)
+    assert grab_freshest(capture) == (True, 3)
+    assert capture.grabs == 4
+    assert grab_freshest(QueuedCapture(queued=0)) == (True, 0)
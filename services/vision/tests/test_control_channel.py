@@ -0,0 +1,75 @@
+import socket
+import threading
+
+import pytest
+
+import telemetry
+from control_channel import KIND_ACK, KIND_COMMAND, KIND_EVENT, KIND_POSE, ControlChannel, encode_message, read_message
+
+TOKEN = "f" * 64
+
+def test_pose_samples_are_coalesced():
+    channel = ControlChannel(lambda command: None, TOKEN)
+    channel._client = object()  # As if connected, with the writer not yet awake
+    for i in range(3):
+        channel.publish_pose(i / 30.0, float(i), -float(i), True)
+    assert channel.poses_coalesced == 2
+    assert channel._pose[:3] == (2 / 30.0, 2.0, -2.0)
+    assert channel._pose[3] == pytest.approx(30.0)
+
+@pytest.fixture
+def connected():
+    commands = []
+
+    def on_command(command):
+        if command["type"] != "update_sensitivities":
+            raise ValueError("unknown command")
+        commands.append(command)
+
+    channel = ControlChannel(on_command, TOKEN)
+    stop = threading.Event()
+    channel.start(stop)
+    client = socket.create_connection(("127.0.0.1", channel.port), timeout=5)
+    client.sendall(TOKEN.encode())
+    yield channel, client, commands
+    client.close()
+    stop.set()
+    telemetry.set_event_sink(None)
+
+def test_commands_are_acked_by_id(connected):
+    channel, client, commands = connected
+    client.sendall(encode_message(KIND_COMMAND, {"id": 1, "type": "update_sensitivities", "yaw": 30}) +
+                   encode_message(KIND_COMMAND, {"id": 2, "type": "launch"}))
+    assert read_message(client) == (KIND_ACK, {"id": 1, "ok": True})
+    assert read_message(client) == (KIND_ACK, {"id": 2, "ok": False, "error": "unknown command"})
+    assert commands == [{"id": 1, "type": "update_sensitivities", "yaw": 30}]
+
+def test_events_and_pose_go_to_the_connected_client(connected):
+    channel, client, _ = connected
+    # The sink is installed once the channel has accepted the connection
+    client.sendall(encode_message(KIND_COMMAND, {"id": 1, "type": "update_sensitivities"}))
+    assert read_message(client)[0] == KIND_ACK
+    telemetry.emit_event("wink", side="left")
+    channel.publish_pose(1.0, 4.0, -2.0, True)
+    assert read_message(client) == (KIND_EVENT, {"type": "wink", "side": "left"})
+    kind, pose = read_message(client)
+    assert kind == KIND_POSE
+    assert (pose["yaw"], pose["pitch"], pose["face"]) == (4.0, -2.0, True)
+
+def test_clients_without_the_token_are_closed_unheard():
+    commands = []
+    channel = ControlChannel(commands.append, TOKEN)
+    stop = threading.Event()
+    channel.start(stop)
+    try:
+        for first_bytes in (encode_message(KIND_COMMAND, {"id": 1, "type": "stop"}).ljust(64, b"\0"), b"e" * 64):
+            with socket.create_connection(("127.0.0.1", channel.port), timeout=5) as intruder:
+                intruder.sendall(first_bytes)
+                assert intruder.recv(1) == b"" # Closed without a byte sent
+        with socket.create_connection(("127.0.0.1", channel.port), timeout=5) as client: # Not locked out
+            client.sendall(TOKEN.encode() + encode_message(KIND_COMMAND, {"id": 2, "type": "stop"}))
+            assert read_message(client) == (KIND_ACK, {"id": 2, "ok": True})
+    finally:
+        stop.set()
+        telemetry.set_event_sink(None)
+    assert channel.clients_rejected == 2 and commands == [{"id": 2, "type": "stop"}]
@@ -0,0 +1,44 @@
+import os
+import threading
+
+import cv2
+import pytest
+
+import cpu_budget
+from cpu_budget import CpuBudget, cpu_budget_from_env
+
+def test_budget_keeps_the_detector_off_the_core_the_light_threads_share(monkeypatch):
+    monkeypatch.setattr(cpu_budget.os, "sched_setaffinity", lambda pid, cores: None, raising=False)
+    budget = CpuBudget(max_cores=3, cores=[2, 4, 6, 8])
+    assert budget.cores == [2, 4, 6] and budget.cv_threads == 1
+    plan = budget.plan()
+    assert plan["capture"] == plan["logic"] == plan["cursor"] == {2}
+    assert plan["detect"] == {4, 6}
+    assert CpuBudget(max_cores=1, cores=[5]).plan() == {role: {5} for role in cpu_budget.THREAD_ROLES}
+    assert CpuBudget(cores=[0, 1]).plan() == {} # No limit: nothing is pinned
+
+def test_budget_from_env_ignores_invalid_values(monkeypatch):
+    monkeypatch.setenv("WINKS_MAX_CORES", "0")
+    monkeypatch.setenv("WINKS_CV_THREADS", "two")
+    monkeypatch.setenv("WINKS_PRIORITY", "urgent")
+    budget = cpu_budget_from_env()
+    assert (budget.max_cores, budget.cv_threads, budget.priority) == (None, None, "normal")
+
+@pytest.mark.skipif(not hasattr(os, "sched_setaffinity"), reason="thread affinity is Linux-only")
+def test_pinned_threads_run_on_their_cores(monkeypatch):
+    monkeypatch.setattr(cpu_budget, "_active", None)
+    original, cv_threads = os.sched_getaffinity(0), cv2.getNumThreads()
+    budget = CpuBudget(max_cores=1)
+    seen = {}
+    def worker():
+        cpu_budget.pin_current_thread("detect")
+        seen["detect"] = os.sched_getaffinity(0)
+    try:
+        budget.apply()
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+    finally:
+        os.sched_setaffinity(0, original)
+        cv2.setNumThreads(cv_threads)
+    assert seen["detect"] == set(budget.cores)
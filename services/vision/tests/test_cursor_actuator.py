@@ -0,0 +1,50 @@
+import threading
+import time
+
+from cursor_actuator import CURSOR_REFERENCE_FPS, CursorActuator
+from input_backends import RecordingBackend, open_input_backend
+
+def run_actuator(actuator, seconds):
+    stop = threading.Event()
+    thread = threading.Thread(target=actuator.run, args=(stop,))
+    thread.start()
+    time.sleep(seconds)
+    stop.set()
+    thread.join()
+
+def test_null_backend_is_selectable():
+    backend = open_input_backend("null")
+    assert isinstance(backend, RecordingBackend)
+    backend.move(3, -2)
+    backend.rightClick()
+    assert backend.calls == {"move": 1, "click": 0, "rightClick": 1}
+    assert [event[1:] for event in backend.events] == [("move", (3, -2)), ("rightClick", ())]
+
+def test_actuator_integrates_velocity_into_whole_pixel_moves():
+    backend = RecordingBackend()
+    actuator = CursorActuator(backend, rate_hz=200)
+    actuator.set_velocity(0.5, -0.25)  # 15 px/s right, 7.5 px/s up at the reference rate
+    run_actuator(actuator, 0.2)
+    moves = [args for _, name, args in backend.events if name == "move"]
+    assert moves
+    assert all(abs(dx) <= 1 and abs(dy) <= 1 for dx, dy in moves)
+    total_x = sum(dx for dx, _ in moves)
+    assert 0 < total_x <= 0.5 * CURSOR_REFERENCE_FPS * 0.2 + 1
+    assert sum(dy for _, dy in moves) <= 0
+
+def test_click_goes_out_without_waiting_for_a_tick():
+    backend = RecordingBackend()
+    actuator = CursorActuator(backend, rate_hz=10)
+    stop = threading.Event()
+    thread = threading.Thread(target=actuator.run, args=(stop,))
+    thread.start()
+    time.sleep(0.05)
+    requested = time.perf_counter()
+    actuator.request_click(is_right_click=False)
+    deadline = requested + 1.0
+    while not backend.calls["click"] and time.perf_counter() < deadline:
+        time.sleep(0.001)
+    stop.set()
+    thread.join()
+    clicked_at = next(t for t, name, _ in backend.events if name == "click")
+    assert clicked_at - requested < 0.05  # well inside one 100 ms tick
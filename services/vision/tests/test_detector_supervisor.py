@@ -0,0 +1,120 @@
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import pipeline_executors
+from detector_supervisor import DetectorSupervisor
+from pipeline_executors import ProcessExecutor, ThreadedExecutor
+from pipeline_stages import ActuateStage, Detection, Pipeline, PoseStage, PublishStage, WinkStage
+from pose_filter import PoseFilter
+from runtime_settings import PipelineSettings, SettingsStore
+from test_pipeline_stages import FakeActuator
+
+MODEL_PATH = os.path.join(os.path.dirname(pipeline_executors.__file__), "face_landmarker.task")
+
+class EndlessSource:
+    """A camera that keeps delivering blank frames at ~100 FPS."""
+    exhausted = False
+    fps = 100.0
+
+    def describe(self):
+        return "blank frames"
+
+    def open(self):
+        return True
+
+    def read(self):
+        time.sleep(0.01)
+        return True, np.zeros((48, 64, 3), dtype=np.uint8)
+
+    def release(self):
+        pass
+
+class FaultyDetect:
+    """DetectStage stand-in: the first one built fails on its tenth frame, by
+    raising or by hanging until released; later ones work."""
+    built = 0
+    fault = "raise"
+    release = threading.Event()
+
+    def __init__(self, model_path, detector_mode=None):
+        FaultyDetect.built += 1
+        self.failing = FaultyDetect.built == 1
+        self.frames = 0
+
+    def open(self, startup=None):
+        self.landmarker = type("Landmarker", (), {"mode": "fake"})()
+        return self
+
+    def process(self, frame_bgr, captured_at, settings, stats=None, inference_width=None, open_thresholds=None):
+        self.frames += 1
+        if self.failing and self.frames == 10:
+            if FaultyDetect.fault == "raise":
+                raise RuntimeError("injected detector fault")
+            FaultyDetect.release.wait()
+        return Detection(None, None, False, 0.0)
+
+    def close(self):
+        pass
+
+def build_pipeline(model_path=None):
+    return Pipeline(model_path, SettingsStore(PipelineSettings()), pose=PoseStage(PoseFilter("none", predict=False)),
+                    wink=WinkStage(), actuate=ActuateStage(FakeActuator()), publish=PublishStage())
+
+def run_until_recovered(executor, supervisor, timeout):
+    """Call supervisor.check() like the main loop does until one outage has been recovered from."""
+    deadline = time.perf_counter() + timeout
+    while not supervisor.recoveries and time.perf_counter() < deadline:
+        assert supervisor.check()
+        time.sleep(0.02)
+
+@pytest.mark.parametrize("fault", ["raise", "hang"])
+def test_thread_detector_is_restarted_while_capture_keeps_running(monkeypatch, fault):
+    monkeypatch.setattr(pipeline_executors, "DetectStage", FaultyDetect)
+    monkeypatch.setattr(FaultyDetect, "built", 0)
+    monkeypatch.setattr(FaultyDetect, "fault", fault)
+    FaultyDetect.release.clear()
+    stop = threading.Event()
+    executor = ThreadedExecutor(build_pipeline(), EndlessSource(), stop)
+    supervisor = DetectorSupervisor(executor, stall_seconds=0.3)
+    executor.start()
+    capture = executor._threads[1]
+    try:
+        run_until_recovered(executor, supervisor, timeout=5)
+        assert supervisor.restarts == 1 and FaultyDetect.built == 2
+        assert 0 < supervisor.recoveries[0] < 2
+        assert capture.is_alive() and executor._threads[1] is capture
+        handled = executor.last_detection_at
+        time.sleep(0.2)
+        assert executor.last_detection_at > handled
+    finally:
+        stop.set()
+        FaultyDetect.release.set()
+        executor.join(timeout=2)
+    assert executor.finished
+
+def test_killed_detector_process_is_restarted():
+    pytest.importorskip("mediapipe")
+    if not os.path.exists(MODEL_PATH):
+        pytest.skip("face_landmarker.task is not in src/")
+    stop = threading.Event()
+    executor = ProcessExecutor(build_pipeline(MODEL_PATH), EndlessSource(), stop)
+    supervisor = DetectorSupervisor(executor)
+    executor.start()
+    try:
+        assert executor.ready_event.wait(timeout=30)
+        deadline = time.perf_counter() + 10
+        while not executor.last_detection_at and time.perf_counter() < deadline:
+            time.sleep(0.05)
+        first_child = executor._process
+        first_child.kill() # Mid-stream
+        first_child.join(timeout=5)
+        run_until_recovered(executor, supervisor, timeout=30)
+        assert supervisor.restarts == 1 and executor._process is not first_child
+        assert supervisor.recoveries and executor.is_alive()
+    finally:
+        stop.set()
+        executor.join(timeout=5)
@@ -0,0 +1,14 @@
+import importlib
+import socket
+import sys
+
+import input_backends
+
+def test_importing_opens_no_backend_or_socket(monkeypatch):
+    def refuse(*args, **kwargs):
+        raise AssertionError("opened at import")
+    monkeypatch.setattr(input_backends, "open_input_backend", refuse)
+    monkeypatch.setattr(socket, "create_server", refuse)
+    monkeypatch.delitem(sys.modules, "head_wink_combined", raising=False)
+    head_wink_combined = importlib.import_module("head_wink_combined")
+    assert head_wink_combined.STARTING_SETTINGS.winks_enabled
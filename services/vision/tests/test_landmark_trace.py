@@ -0,0 +1,76 @@
+import numpy as np
+
+from landmark_trace import TRACE_HEADER, TraceRecorder, open_trace, replay_trace
+from pipeline_stages import PoseStage, WinkStage
+from pose_filter import PoseFilter
+from runtime_settings import PipelineSettings
+from test_pipeline_stages import face_with_ears, yaw_rotation
+
+def matrix(rotation):
+    transform = np.eye(4, dtype=np.float32)
+    transform[:3, :3] = rotation
+    return transform
+
+def frames():
+    """(captured_at, landmarks, matrix): a head turn, a left wink and a lost face."""
+    for i in range(30):
+        t = i / 30.0
+        left = 0.1 if 10 <= i < 16 else 0.3
+        if i in (20, 21):
+            yield t, None, None
+        else:
+            yield t, face_with_ears(left, 0.3), matrix(yaw_rotation(i))
+
+def test_trace_round_trip_ignores_a_partial_record(tmp_path):
+    path = str(tmp_path / "t.wktrace")
+    recorder = TraceRecorder(path)
+    for t, landmarks, transform in frames():
+        recorder.record(t, t + 0.01, landmarks, transform)
+    recorder.close()
+    with open(path, "ab") as f:
+        f.write(b"\0" * 100)
+
+    trace = open_trace(path)
+    assert len(trace) == 30 and recorder.frames == 30
+    assert trace["captured_at"][3] == 0.1 and trace["processed_at"][3] == 0.11
+    assert not trace["has_landmarks"][20] and not trace["has_matrix"][21]
+    assert np.array_equal(trace["landmarks"][12], face_with_ears(0.1, 0.3))
+    # Appending to an existing trace keeps its header
+    TraceRecorder(path).close()
+    assert open(path, "rb").read(TRACE_HEADER.size)[:4] == b"WKTR"
+
+def test_appending_after_a_torn_write_stays_aligned(tmp_path):
+    path = str(tmp_path / "t.wktrace")
+    recorder = TraceRecorder(path)
+    for t, landmarks, transform in list(frames())[:3]:
+        recorder.record(t, t, landmarks, transform)
+    recorder.close()
+    with open(path, "ab") as f:
+        f.write(b"\1" * 100) # A crash in the middle of the fourth record
+    recorder = TraceRecorder(path)
+    for t, landmarks, transform in list(frames())[3:6]:
+        recorder.record(t, t, landmarks, transform)
+    recorder.close()
+
+    trace = open_trace(path)
+    assert np.allclose(trace["captured_at"], np.arange(6) / 30.0)
+    assert np.array_equal(trace["landmarks"][4], face_with_ears(0.3, 0.3))
+
+def test_replay_matches_the_live_stages(tmp_path):
+    path = str(tmp_path / "t.wktrace")
+    settings = PipelineSettings(sensitivity_yaw=40.0, dead_zone_degrees=5.0, wink_hold_seconds=0.1, wink_cooldown=0.5)
+    recorder = TraceRecorder(path)
+    pose, wink = PoseStage(PoseFilter("none", predict=False)), WinkStage()
+    live_dx, live_winks = [], []
+    for index, (t, landmarks, transform) in enumerate(frames()):
+        recorder.record(t, t, landmarks, transform)
+        live_dx.append(pose.process(None if transform is None else transform[:3, :3], t, settings, now=t)[2])
+        event = wink.process(landmarks, t, settings)
+        if event:
+            live_winks.append((index, event))
+    recorder.close()
+
+    output, winks = replay_trace(open_trace(path), settings, pose=PoseStage(PoseFilter("none", predict=False)))
+    assert np.allclose(output["dx"], live_dx)
+    assert winks == live_winks and [event.side for _, event in winks] == ["left"]
+    assert np.isnan(output["left_ear"][20]) and not output["face"][21]
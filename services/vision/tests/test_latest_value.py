@@ -0,0 +1,76 @@
+import multiprocessing
+import queue
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from latest_value import LatestValueChannel
+from pipeline_stages import Detection
+
+MOUSE, DISPLAY = 0, 1
+
+def test_every_subscriber_sees_the_newest_value():
+    channel = LatestValueChannel(multiprocessing, subscribers=2, capacity=1024)
+    assert channel.publish("a") == 0
+    assert channel.get(MOUSE, timeout=1) == "a" and channel.get(DISPLAY, timeout=1) == "a"
+    # DISPLAY falls behind: it skips to the newest value and the skipped ones are counted
+    channel.publish("b")
+    assert channel.get(MOUSE, timeout=1) == "b"
+    assert channel.publish("c") == 1 and channel.publish("d") == 2
+    assert channel.get(DISPLAY, timeout=1) == "d" and channel.dropped(DISPLAY) == 2
+    assert channel.dropped(MOUSE) == 1
+    with pytest.raises(queue.Empty):
+        channel.get(DISPLAY, timeout=0.01)
+    assert not channel.wait_taken(timeout=0.01) and channel.wait_taken(timeout=0.01, subscriber=DISPLAY)
+
+@pytest.mark.skipif(sys.platform == "darwin", reason="macOS semaphores have no get_value()")
+def test_wakeups_do_not_pile_up():
+    channel = LatestValueChannel(multiprocessing, subscribers=2, capacity=1024)
+    for value in range(1000):
+        channel.publish(value)
+        if value % 2:
+            channel.get(MOUSE, timeout=1) # DISPLAY never reads
+    assert max(wakeup.get_value() for wakeup in channel._wakeups) <= 1
+    assert channel._taken_signal.get_value() <= 1
+    assert channel.get(DISPLAY, timeout=1) == 999
+
+def publish_detections(channel, count):
+    """Detector stand-in: publishes count detections, each once the mouse has taken the last, then None."""
+    for seq in range(count):
+        channel.wait_taken(timeout=5, subscriber=MOUSE)
+        channel.publish((seq, Detection(np.full((478, 3), seq, dtype=np.float32), np.eye(3), False, 0.0)))
+    channel.wait_taken(timeout=5, subscriber=MOUSE)
+    channel.publish(None)
+
+def test_every_detection_reaches_the_mouse_while_the_display_lags():
+    context = multiprocessing.get_context("spawn")
+    channel = LatestValueChannel(context, subscribers=2)
+    received = {MOUSE: [], DISPLAY: []}
+
+    def subscriber(index, delay):
+        while True:
+            value = channel.get(index, timeout=10)
+            if value is None:
+                return
+            seq, detection = value
+            assert detection.landmarks[0, 0] == seq
+            received[index].append(seq)
+            time.sleep(delay)
+
+    threads = [threading.Thread(target=subscriber, args=(MOUSE, 0.0)),
+               threading.Thread(target=subscriber, args=(DISPLAY, 0.02))]
+    for thread in threads:
+        thread.start()
+    detector = context.Process(target=publish_detections, args=(channel, 50))
+    detector.start()
+    detector.join(timeout=20)
+    for thread in threads:
+        thread.join(timeout=5)
+
+    # A queue shared by both would hand each detection to only one of them
+    assert received[MOUSE] == list(range(50)) and channel.dropped(MOUSE) == 0
+    assert 0 < len(received[DISPLAY]) < 50 and received[DISPLAY] == sorted(received[DISPLAY])
+    assert channel.dropped(DISPLAY) > 0
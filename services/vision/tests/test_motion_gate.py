@@ -0,0 +1,37 @@
+import numpy as np
+
+from motion_gate import MotionGate
+
+rng = np.random.default_rng(0)
+BASE = rng.integers(30, 220, (480, 640, 3)).astype(np.float32)
+
+def noisy(frame, sigma=2.0):
+    return np.clip(frame + rng.normal(0.0, sigma, frame.shape), 0, 255).astype(np.uint8)
+
+def test_first_frame_is_always_detected():
+    assert not MotionGate().can_reuse(noisy(BASE))
+
+def test_sensor_noise_is_reused_until_the_forced_refresh():
+    gate = MotionGate(max_reuse=2)
+    gate.update(noisy(BASE))
+    decisions = [gate.can_reuse(noisy(BASE)) for _ in range(3)]
+    assert decisions == [True, True, False]
+    gate.update(noisy(BASE))
+    assert gate.can_reuse(noisy(BASE))
+
+def test_change_in_the_face_box_forces_inference():
+    landmarks = np.array([[0.4, 0.3, 0.0], [0.6, 0.6, 0.0]], dtype=np.float32)
+    gate = MotionGate()
+    gate.update(noisy(BASE), landmarks)
+    assert gate.box == (224, 108, 416, 324)  # Landmark box plus 25% on every side
+    moved = BASE.copy()
+    moved[150:250, 280:360] = 255.0  # Something changes inside the face box
+    assert not gate.can_reuse(noisy(moved))
+    outside = BASE.copy()
+    outside[0:100, 0:100] = 255.0  # ...but not outside it
+    assert gate.can_reuse(noisy(outside))
+
+def test_hold_forces_inference_on_the_next_frame():
+    gate = MotionGate()
+    gate.update(noisy(BASE), hold=True)
+    assert not gate.can_reuse(noisy(BASE))
@@ -0,0 +1,84 @@
+import math
+
+import numpy as np
+
+from face_geometry import LEFT_EYE_LANDMARKS, RIGHT_EYE_LANDMARKS
+from pipeline_stages import ActuateStage, Detection, Pipeline, PoseStage, PublishStage, WinkStage, eyes_closing
+from pose_filter import PoseFilter
+from runtime_settings import PipelineSettings, SettingsStore
+
+def face_with_ears(left_ear, right_ear):
+    """(478, 3) landmarks whose eyes have exactly these aspect ratios."""
+    landmarks = np.zeros((478, 3), dtype=np.float32)
+    for eye, ear in ((LEFT_EYE_LANDMARKS, left_ear), (RIGHT_EYE_LANDMARKS, right_ear)):
+        p1, p2, p3, p4, _, _ = eye
+        landmarks[p4, 0] = 1.0
+        landmarks[[p2, p3], 1] = ear
+    return landmarks
+
+def yaw_rotation(degrees):
+    c, s = math.cos(math.radians(degrees)), math.sin(math.radians(degrees))
+    return np.array([[c, 0, s], [0, 1, 0], [-s, 0, c]], dtype=np.float32)
+
+def test_pose_stage_is_a_joystick_with_a_dead_zone():
+    settings = PipelineSettings(sensitivity_yaw=40.0, dead_zone_degrees=5.0, max_tilt_angle=20.0)
+    pose = PoseStage(PoseFilter("none", predict=False))
+    assert pose.process(yaw_rotation(4.0), 0.0, settings)[2] == 0.0
+    yaw, pitch, dx, dy = pose.process(yaw_rotation(15.0), 0.1, settings)
+    assert math.isclose(yaw, 15.0, abs_tol=1e-3) and math.isclose(pitch, 0.0, abs_tol=1e-3)
+    assert math.isclose(dx, -20.0, abs_tol=1e-2) and dy == 0.0
+    assert math.isclose(pose.process(yaw_rotation(-60.0), 0.2, settings)[2], 40.0, abs_tol=1e-3)
+    assert pose.process(None, 0.3, settings) == (0.0, 0.0, 0.0, 0.0)
+
+def test_wink_stage_reads_ears_from_landmarks():
+    settings = PipelineSettings(wink_hold_seconds=0.05, wink_cooldown=0.5)
+    wink = WinkStage()
+    events = [wink.process(face_with_ears(left, 0.3), t, settings)
+              for t, left in ((0.0, 0.3), (0.1, 0.1), (0.2, 0.1))]
+    assert events[:2] == [None, None] and events[2] == ("left", 0.1)
+    assert wink.eye_closing
+    # A lost face ends the closure
+    assert wink.process(None, 0.3, settings) is None and not wink.eye_closing
+
+def test_disabled_winks_are_tracked_but_never_reported():
+    settings = PipelineSettings(wink_hold_seconds=0.05, winks_enabled=False)
+    wink = WinkStage()
+    events = [wink.process(face_with_ears(left, 0.3), t, settings)
+              for t, left in ((0.0, 0.3), (0.1, 0.1), (0.2, 0.1))]
+    assert events == [None, None, None] and wink.eye_closing
+
+def test_motion_gate_hold_follows_the_learned_thresholds():
+    settings = PipelineSettings(left_wink_ratio=0.2, right_wink_ratio=0.2)
+    wink = WinkStage()
+    for i in range(90): # Three seconds of open eyes: the baselines are ready
+        wink.process(face_with_ears(0.3, 0.3), i / 30.0, settings)
+    half_closed = face_with_ears(0.25, 0.3) # Above the 0.2 ratio, below the learned reopen threshold
+    assert not eyes_closing(half_closed, settings)
+    assert eyes_closing(half_closed, settings, wink.open_thresholds(settings))
+    assert not eyes_closing(face_with_ears(0.3, 0.3), settings, wink.open_thresholds(settings))
+
+class FakeActuator:
+    def __init__(self):
+        self.velocity = None
+        self.clicks = []
+
+    def set_velocity(self, dx, dy, captured_at=None):
+        self.velocity = (dx, dy)
+
+    def request_click(self, is_right_click=False, captured_at=None, closed_at=None):
+        self.clicks.append((is_right_click, captured_at, closed_at))
+
+    def stop_cursor(self):
+        self.velocity = (0.0, 0.0)
+
+def test_pipeline_runs_the_stages_after_detect():
+    actuator = FakeActuator()
+    settings = PipelineSettings(wink_hold_seconds=0.0, wink_cooldown=0.0)
+    pipeline = Pipeline(None, SettingsStore(settings), pose=PoseStage(PoseFilter("none", predict=False)),
+                        wink=WinkStage(), actuate=ActuateStage(actuator), publish=PublishStage())
+    assert pipeline.should_process(0.0)
+    pipeline.handle(None, 0.0, Detection(face_with_ears(0.1, 0.3), yaw_rotation(30.0), False, 0.0))
+    assert actuator.clicks == [(False, 0.0, 0.0)]
+    assert actuator.velocity[0] < 0
+    pipeline.handle(None, 0.1, Detection(None, None, False, 0.0))
+    assert actuator.velocity == (0.0, 0.0)
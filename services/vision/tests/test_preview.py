@@ -0,0 +1,103 @@
+import os
+import socket
+import threading
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from pipeline_executors import ProcessExecutor
+from pipeline_stages import ActuateStage, Pipeline, PoseStage, PublishStage, WinkStage
+from pose_filter import PoseFilter
+from preview import PREVIEW_HEADER, PREVIEW_MAGIC, PreviewPublisher, PreviewRenderer, PreviewThrottle, chain_edges
+from runtime_settings import PipelineSettings, SettingsStore
+from shared_frame_ring import SharedFrameRing
+from test_detector_supervisor import MODEL_PATH, EndlessSource
+from test_pipeline_stages import FakeActuator
+
+TOKEN = "f" * 64
+SQUARE_AND_TAIL = [(0, 1), (1, 2), (2, 3), (3, 0), (3, 4), (4, 5)]
+
+def test_chained_paths_cover_every_edge_once():
+    paths = chain_edges(SQUARE_AND_TAIL)
+    walked = [frozenset((int(p[i]), int(p[i + 1]))) for p in paths for i in range(len(p) - 1)]
+    assert sorted(map(sorted, walked)) == sorted(map(sorted, SQUARE_AND_TAIL))
+    assert len(paths) == 1
+
+def test_throttle_limits_the_frame_rate():
+    throttle = PreviewThrottle(fps=10)
+    due = [throttle.due(i / 30.0) for i in range(90)]  # 3 s of 30 fps frames
+    assert sum(due) == 30
+
+def test_draws_from_the_landmark_array():
+    frame = np.zeros((100, 200, 3), np.uint8)
+    landmarks = np.array([[0.1, 0.1, 0.0], [0.9, 0.1, 0.0], [0.9, 0.9, 0.0], [1.5, 0.5, 0.0]], np.float32)
+    PreviewRenderer(connections=[(0, 1), (1, 2)]).draw_landmarks(frame, landmarks)
+    assert (frame[10, 100] == (0, 255, 0)).all()  # On the contour
+    assert (frame[10, 20] == (255, 0, 0)).all()   # A landmark dot
+
+def read_message(client):
+    data = b""
+    while len(data) < PREVIEW_HEADER.size or len(data) < PREVIEW_HEADER.size + PREVIEW_HEADER.unpack_from(data)[1]:
+        data += client.recv(65536)
+    magic, length, width, height = PREVIEW_HEADER.unpack_from(data)
+    return magic, width, height, data[PREVIEW_HEADER.size:PREVIEW_HEADER.size + length]
+
+def test_publisher_streams_only_to_a_connected_client():
+    publisher = PreviewPublisher(TOKEN, fps=30, width=160, renderer=PreviewRenderer(connections=[(0, 1)]))
+    frame = np.full((240, 320, 3), 128, np.uint8)
+    landmarks = np.array([[0.2, 0.2, 0.0], [0.8, 0.8, 0.0]], np.float32)
+    publisher.offer(0.0, frame, landmarks, 1.0, 2.0, 5.0)
+    assert publisher._slot is None  # Nobody is watching, so the detector hands nothing over
+
+    stop = threading.Event()
+    publisher.start(stop)
+    try:
+        with socket.create_connection(("127.0.0.1", publisher.port), timeout=5) as intruder:
+            intruder.sendall(b"e" * len(TOKEN))
+            assert intruder.recv(1) == b"" # Closed without a frame
+        assert not publisher._client_connected and publisher.clients_rejected == 1
+        with socket.create_connection(("127.0.0.1", publisher.port), timeout=5) as client:
+            client.sendall(TOKEN.encode())
+            deadline = time.perf_counter() + 5
+            while not publisher._client_connected and time.perf_counter() < deadline:
+                time.sleep(0.01)
+            publisher.offer(1.0, frame, landmarks, 1.0, 2.0, 5.0)
+            magic, width, height, jpeg = read_message(client)
+    finally:
+        stop.set()
+    assert (magic, width, height) == (PREVIEW_MAGIC, 160, 120)
+    assert cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_COLOR).shape == (120, 160, 3)
+    assert (frame == 128).all()  # Drawn on a copy
+
+def test_process_executor_reads_no_frames_while_no_client_is_connected(monkeypatch):
+    pytest.importorskip("mediapipe")
+    if not os.path.exists(MODEL_PATH):
+        pytest.skip("face_landmarker.task is not in src/")
+    reads = []
+    original_read = SharedFrameRing.read
+    monkeypatch.setattr(SharedFrameRing, "read", lambda ring, slot, seq: reads.append(seq) or original_read(ring, slot, seq))
+    publisher = PreviewPublisher(TOKEN, fps=30, renderer=PreviewRenderer(connections=[(0, 1)]))
+    pipeline = Pipeline(MODEL_PATH, SettingsStore(PipelineSettings()), pose=PoseStage(PoseFilter("none", predict=False)),
+                        wink=WinkStage(), actuate=ActuateStage(FakeActuator()), publish=PublishStage(preview_publisher=publisher))
+    stop = threading.Event()
+    executor = ProcessExecutor(pipeline, EndlessSource(), stop)
+    executor.start()
+    publisher.start(stop)
+    try:
+        assert executor.ready_event.wait(timeout=30)
+        deadline = time.perf_counter() + 10
+        while not executor.last_detection_at and time.perf_counter() < deadline:
+            time.sleep(0.05)
+        time.sleep(0.3)
+        assert executor.last_detection_at and reads == []
+        with socket.create_connection(("127.0.0.1", publisher.port), timeout=5) as client:
+            client.sendall(TOKEN.encode())
+            deadline = time.perf_counter() + 10
+            while not reads and time.perf_counter() < deadline:
+                time.sleep(0.05)
+        assert reads
+    finally:
+        stop.set()
+        executor.join(timeout=5)
@@ -0,0 +1,60 @@
+import numpy as np
+
+from pipeline_stages import Pipeline, downscale
+from runtime_settings import SettingsStore
+from quality_controller import DOWNGRADE_WINDOWS, QUALITY_LADDER, RETRY_SECONDS, UPGRADE_WINDOWS, QualityController, \
+    latency_target_from_env
+
+def feed(controller, start, windows, latency_s, fps=30.0):
+    """Feed whole windows of frames at fps, all with latency_s; returns the changes and the end time."""
+    changes, now = [], start
+    for _ in range(windows * controller.window_frames):
+        now += 1.0 / fps
+        change = controller.observe(now, latency_s, latency_s / 2)
+        if change:
+            changes.append(change)
+    return changes, now
+
+def test_controller_ignores_spikes_and_steps_back_up_only_with_headroom():
+    controller = QualityController(target_s=0.05, window_frames=10)
+    changes, now = feed(controller, 0.0, 1, 0.08) # A single slow window is a spike
+    assert changes == []
+    changes, now = feed(controller, now, 1 + DOWNGRADE_WINDOWS, 0.08)
+    assert changes == ["down", "down"] and controller.level == 2
+    # Just under the target is inside the hysteresis band: no change either way
+    changes, now = feed(controller, now, 10, 0.045)
+    assert changes == [] and controller.level == 2
+    changes, now = feed(controller, now + RETRY_SECONDS * 2, UPGRADE_WINDOWS, 0.02)
+    assert changes == ["up"] and controller.level == 1
+
+def test_controller_holds_off_longer_each_time_a_level_fails():
+    controller = QualityController(target_s=0.05, window_frames=10)
+    _, now = feed(controller, 0.0, DOWNGRADE_WINDOWS, 0.08)
+    assert controller.level == 1
+    changes, now = feed(controller, now, UPGRADE_WINDOWS, 0.02) # Within the first hold-off
+    assert changes == []
+    changes, now = feed(controller, now + RETRY_SECONDS, UPGRADE_WINDOWS, 0.02)
+    assert changes == ["up"]
+    _, now = feed(controller, now, DOWNGRADE_WINDOWS, 0.08) # Fails again: the hold-off doubles
+    changes, now = feed(controller, now + RETRY_SECONDS, UPGRADE_WINDOWS, 0.02)
+    assert changes == [] and controller.level == 1
+
+def test_frame_rate_levels_skip_frames_before_inference():
+    controller = QualityController(window_frames=10)
+    controller.level = len(QUALITY_LADDER) - 1 # 10 FPS
+    kept = [t for t in np.arange(60) / 30.0 if controller.should_process(t)]
+    assert len(kept) == 20
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    assert downscale(frame, controller.inference_width).shape == (270, 480, 3)
+    assert downscale(frame, None) is frame and downscale(frame, 1920) is frame
+
+def test_default_build_runs_at_full_quality(monkeypatch):
+    monkeypatch.delenv("WINKS_LATENCY_TARGET_MS", raising=False)
+    assert latency_target_from_env() is None
+    pipeline = Pipeline(None, SettingsStore(), None, None, None, None) # As head_wink_combined builds it without a target
+    assert pipeline.inference_width is None
+    assert all(pipeline.should_process(t) for t in np.arange(60) / 60.0)
+    monkeypatch.setenv("WINKS_LATENCY_TARGET_MS", "soon")
+    assert latency_target_from_env() is None
+    monkeypatch.setenv("WINKS_LATENCY_TARGET_MS", "40")
+    assert latency_target_from_env() == 0.04
@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+
+from runtime_settings import PipelineSettings, SettingsStore, apply_settings_command
+
+FRAME_INTERVAL = 1.0 / 30.0
+
+def test_calibration_command_maps_electron_keys():
+    store = SettingsStore()
+    settings = apply_settings_command(store, {"type": "update_calibration", "yaw": 60, "pitch": 50,
+                                              "deadZone": 8, "tiltAngle": 25, "winkHoldSeconds": 0.1,
+                                              "winksEnabled": False})
+    assert (settings.sensitivity_yaw, settings.sensitivity_pitch) == (60.0, 50.0)
+    assert (settings.dead_zone_degrees, settings.max_tilt_angle, settings.wink_hold_seconds) == (8.0, 25.0, 0.1)
+    assert settings.winks_enabled is False and settings.version == 1
+    assert store.snapshot() is settings
+
+def test_sensitivities_command_only_touches_sensitivities():
+    store = SettingsStore(PipelineSettings(dead_zone_degrees=7.0))
+    settings = apply_settings_command(store, {"type": "update_sensitivities", "yaw": 30, "pitch": 35, "deadZone": 1})
+    assert (settings.sensitivity_yaw, settings.sensitivity_pitch, settings.dead_zone_degrees) == (30.0, 35.0, 7.0)
+
+def test_invalid_value_rejects_whole_command():
+    store = SettingsStore()
+    before = store.snapshot()
+    with pytest.raises(ValueError):
+        apply_settings_command(store, {"type": "update_calibration", "yaw": 60, "deadZone": "wide"})
+    with pytest.raises(ValueError):
+        apply_settings_command(store, {"type": "update_calibration", "winkHoldSeconds": 5})
+    assert store.snapshot() is before
+
+def test_other_commands_are_not_settings():
+    store = SettingsStore()
+    assert apply_settings_command(store, {"type": "stop"}) is None
+    assert store.snapshot().version == 0
+
+def test_snapshots_never_mix_two_updates():
+    store = SettingsStore()
+    stop = threading.Event()
+    torn = []
+
+    def writer():
+        value = 10.0
+        while not stop.is_set():
+            value = 80.0 if value == 10.0 else 10.0
+            store.update(sensitivity_yaw=value, sensitivity_pitch=value, dead_zone_degrees=value / 10.0)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    deadline = time.perf_counter() + 0.3
+    while time.perf_counter() < deadline:
+        s = store.snapshot()
+        if not (s.sensitivity_yaw == s.sensitivity_pitch == s.dead_zone_degrees * 10.0):
+            torn.append(s)
+    stop.set()
+    thread.join()
+    assert store.snapshot().version > 0
+    assert not torn
+
+def test_change_to_effect_latency_is_within_next_frame(record_property):
+    """A detection loop running at 30 FPS picks an update up by the end of the next frame."""
+    store = SettingsStore()
+    latencies = []
+    stop = threading.Event()
+
+    def detection_loop():
+        while not stop.is_set():
+            settings = store.snapshot()
+            time.sleep(FRAME_INTERVAL)  # stands in for inference + cursor logic
+            latency = store.mark_applied(settings)
+            if latency is not None:
+                latencies.append((settings.sensitivity_yaw, latency))
+
+    thread = threading.Thread(target=detection_loop)
+    thread.start()
+    try:
+        for yaw in (20.0, 40.0, 60.0):
+            time.sleep(FRAME_INTERVAL * 1.5)  # land updates mid-frame
+            apply_settings_command(store, {"type": "update_sensitivities", "yaw": yaw, "pitch": yaw})
+            deadline = time.perf_counter() + 1.0
+            while not any(applied == yaw for applied, _ in latencies) and time.perf_counter() < deadline:
+                time.sleep(0.001)
+    finally:
+        stop.set()
+        thread.join()
+
+    assert [applied for applied, _ in latencies] == [20.0, 40.0, 60.0]
+    worst = max(latency for _, latency in latencies)
+    record_property("settings_change_to_effect_ms", round(worst * 1000.0, 3))
+    # Worst case: the update lands just after a frame took its snapshot, so it
+    # takes effect at the end of the following frame.
+    assert worst < 2 * FRAME_INTERVAL + 0.05
@@ -0,0 +1,48 @@
+import io
+import json
+import sys
+import threading
+import time
+
+from telemetry import LineWriter, emit_event
+
+class SlowStream(io.StringIO):
+    """A stream that yields to other threads on every write, as a pipe under load might."""
+
+    def write(self, text):
+        time.sleep(0)
+        return super().write(text)
+
+def test_log_lines_and_events_from_many_threads_stay_whole(monkeypatch):
+    stream = SlowStream()
+    monkeypatch.setattr(sys, "stdout", LineWriter(stream))
+    def log(thread):
+        for i in range(200):
+            print(f"Thread {thread}: message {i}")
+    def events():
+        for i in range(200):
+            emit_event("latency_stats", index=i)
+    threads = [threading.Thread(target=log, args=(n,)) for n in range(3)] + [threading.Thread(target=events)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    lines = stream.getvalue().splitlines()
+    assert len(lines) == 800
+    parsed = [json.loads(line) for line in lines if line.startswith("{")]
+    assert [event["index"] for event in parsed] == list(range(200))
+    assert all(line.startswith("Thread ") and "{" not in line for line in lines if not line.startswith("{"))
+
+def test_unfinished_lines_are_written_on_flush_and_at_exit():
+    stream = io.StringIO()
+    writer = LineWriter(stream)
+    writer.write("progress: ")
+    assert stream.getvalue() == ""
+    writer.flush()
+    assert stream.getvalue() == "progress: "
+    other = threading.Thread(target=writer.write, args=("Traceback (most recent",))
+    other.start()
+    other.join()
+    writer.write("done")
+    writer.flush_all()
+    assert sorted(stream.getvalue()[len("progress: "):].splitlines()) == ["Traceback (most recent", "done"]
@@ -0,0 +1,65 @@
+import math
+
+from runtime_settings import PipelineSettings
+from wink_detector import BASELINE_WARMUP_SECONDS, DEFAULT_LIMITS, EyeBaseline, WinkDetector
+
+SETTINGS = PipelineSettings(left_wink_ratio=0.23, right_wink_ratio=0.24, wink_hold_seconds=0.06, wink_cooldown=0.5)
+
+def feed(detector, fps, seconds, left, right, start=0.0, settings=SETTINGS):
+    """Constant EARs at fps for seconds; returns (capture time, wink) for every wink."""
+    winks = []
+    for i in range(round(seconds * fps)):
+        now = start + i / fps
+        wink = detector.update(left(now) if callable(left) else left, right(now) if callable(right) else right,
+                               now, settings)
+        if wink:
+            winks.append((now, wink))
+    return winks
+
+def test_baseline_learns_mean_and_spread():
+    baseline = EyeBaseline()
+    for i in range(300):
+        baseline.update(0.30 + (0.01 if i % 2 else -0.01), i / 30.0)
+    assert baseline.ready
+    assert math.isclose(baseline.mean, 0.30, abs_tol=1e-3)
+    assert math.isclose(math.sqrt(baseline.variance), 0.01, rel_tol=0.1)
+    close, reopen = baseline.thresholds(0.23)
+    assert close < reopen < baseline.mean
+    assert EyeBaseline().thresholds(0.23) == (0.23, 0.25)
+
+def test_hold_time_is_in_seconds_whatever_the_frame_rate():
+    for fps in (15, 30, 60):
+        detector = WinkDetector()
+        winks = feed(detector, fps, 1.0, lambda t: 0.1 if t >= 0.5 else 0.3, 0.3)
+        assert len(winks) == 1
+        fired_at, wink = winks[0]
+        assert wink.side == "left" and math.isclose(wink.closed_at, 0.5, abs_tol=1 / fps)
+        assert SETTINGS.wink_hold_seconds <= fired_at - wink.closed_at < SETTINGS.wink_hold_seconds + 1 / fps
+
+def test_thresholds_adapt_to_the_users_eyes():
+    # Wide-open eyes at 0.40: a wink that only gets down to 0.27 never crosses the fixed 0.23 ratio
+    assert feed(WinkDetector(), 30, 0.5, 0.27, 0.40) == []
+    detector = WinkDetector()
+    feed(detector, 30, BASELINE_WARMUP_SECONDS + 1.0, 0.40, 0.40)
+    close, reopen = detector.thresholds(SETTINGS)["left"]
+    assert 0.27 < close < reopen < 0.40
+    assert [wink.side for _, wink in feed(detector, 30, 0.5, 0.27, 0.40, start=10.0)] == ["left"]
+
+def test_limits_place_the_learned_thresholds():
+    thresholds = []
+    for limits in (DEFAULT_LIMITS, DEFAULT_LIMITS._replace(close_drop=0.4, open_drop=0.3)):
+        detector = WinkDetector(limits)
+        feed(detector, 30, BASELINE_WARMUP_SECONDS + 1.0, 0.40, 0.40)
+        thresholds.append(detector.thresholds(SETTINGS)["left"])
+    (close, reopen), (deeper_close, deeper_reopen) = thresholds
+    assert math.isclose(close, 0.40 * (1 - DEFAULT_LIMITS.close_drop))
+    assert math.isclose(deeper_close, 0.40 * 0.6) and math.isclose(deeper_reopen, 0.40 * 0.7)
+
+def test_hysteresis_ignores_flicker_and_blinks_do_not_click():
+    detector = WinkDetector()
+    feed(detector, 30, 3.0, 0.3, 0.3)
+    close, reopen = detector.thresholds(SETTINGS)["left"]
+    # Dithering inside the band after one wink does not produce a second one
+    winks = feed(detector, 30, 2.0, lambda t: 0.1 if t < 10.5 else (close + reopen) / 2, 0.3, start=10.0)
+    assert len(winks) == 1
+    assert feed(detector, 30, 1.0, 0.1, 0.1, start=20.0) == []